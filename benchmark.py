@@ -0,0 +1,237 @@
+"""
+Usage:
+    benchmark.py run [--scales=<list>] [--seed=<int>] [--repeat=<int>] [--samples=<int>] [--build_map_limit=<int>] [--label=<string>] [--output=<path>]
+    benchmark.py compare <baseline> <current>
+
+Options:
+    --scales=<list>            Comma separated galaxy scales to run (xs, s, m, l) [default: xs,s]
+    --seed=<int>               Seed for the galaxy generator [default: 0]
+    --repeat=<int>             Number of timed runs per operation [default: 3]
+    --samples=<int>            Number of planets sampled for per-planet operations [default: 50]
+    --build_map_limit=<int>    Largest galaxy (in planets) that build_map is timed on [default: 50000]
+    --label=<string>           Name recorded with the results, e.g. a version or branch [default: unlabelled]
+    --output=<path>            JSON file to write the results to [default: benchmark.json]
+"""
+import gzip
+import json
+import os
+import platform
+import random
+import statistics
+import tempfile
+from datetime import datetime, timezone
+from sys import argv
+from time import perf_counter
+
+import sqlalchemy
+from docopt import docopt
+
+import report
+from src import models
+from src.crud import combatCrud, factionCrud, galaxyCrud, gameCrud, planetCrud, reportCrud, shipCrud
+from src.utils.db import Database
+from src.utils.galaxyUtils import galaxy_scales, generate_galaxy
+
+
+def time_runs(operation, repeat: int):
+    """Runs an operation 'repeat' times and returns the duration of each run in seconds"""
+    durations = []
+    for _ in range(repeat):
+        start = perf_counter()
+        operation()
+        durations.append(perf_counter() - start)
+
+    return durations
+
+
+def summarize(durations: list, calls: int):
+    return {
+        'calls': calls,
+        'runs': durations,
+        'best': min(durations),
+        'median': statistics.median(durations),
+        'best_per_call': min(durations) / calls if calls > 0 else None
+    }
+
+
+def sample_ship_moves(db, rng: random.Random, samples: int):
+    """(ship ids, origin, destination) for groups of ships sharing an owner and a location"""
+    moves = []
+    planet_names = planetCrud.get_planet_names(db)
+    for planet_name in rng.sample(planet_names, min(samples, len(planet_names))):
+        ship = db.query(models.Ship).filter_by(location=planet_name).first()
+        connections = planetCrud.get_connection_names(db, planet_name)
+        if ship is None or len(connections) == 0:
+            continue
+
+        ship_ids = [ship_id for (ship_id,) in db.query(models.Ship.id).filter_by(location=planet_name, owner=ship.owner)]
+        moves.append((ship_ids, planet_name, rng.choice(connections)))
+
+    return moves
+
+
+def benchmark_scale(scale_name: str, seed: int, repeat: int, samples: int, build_map_limit: int):
+    scale = galaxy_scales[scale_name]
+    rng = random.Random(seed)
+    timings = {}
+
+    start = perf_counter()
+    galaxy = generate_galaxy(scale, seed)
+    generate_seconds = perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        if scale.planets <= build_map_limit:
+            def build_map():
+                planetCrud.build_map(Database("sqlite://").get_db(), galaxy.planets)
+
+            timings['build_map'] = summarize(time_runs(build_map, repeat), 1)
+
+        db = Database(f"sqlite:///{os.path.join(work_dir, 'galaxy.db')}").get_db()
+
+        start = perf_counter()
+        galaxyCrud.load_galaxy(db, galaxy)
+        load_seconds = perf_counter() - start
+
+        faction_names = factionCrud.get_faction_names(db)
+        sampled_planets = rng.sample([planet['name'] for planet in galaxy.planets], min(samples, scale.planets))
+
+        def get_planets_by_faction():
+            for faction_name in faction_names:
+                planetCrud.get_planets_by_faction(db, faction_name)
+
+        def get_visible_ships_on_planet():
+            for planet_name in sampled_planets:
+                for faction_name in faction_names:
+                    shipCrud.get_visible_ships_on_planet(db, planet_name, faction_name)
+
+        def get_resource_income():
+            for faction_name in faction_names:
+                for resource_type in ['mp', 'rp', 'lp']:
+                    factionCrud.get_resource_income(db, faction_name, resource_type)
+
+        timings['get_planets_by_faction'] = summarize(time_runs(get_planets_by_faction, repeat), len(faction_names))
+        timings['get_visible_ships_on_planet'] = summarize(time_runs(get_visible_ships_on_planet, repeat), len(sampled_planets) * len(faction_names))
+        timings['get_resource_income'] = summarize(time_runs(get_resource_income, repeat), len(faction_names) * 3)
+
+        moves = sample_ship_moves(db, rng, samples)
+
+        def move_ships():
+            # Every group is moved out and back, so each run starts from the same state
+            for ship_ids, origin, destination in moves:
+                shipCrud.move_ships(db, ship_ids, destination)
+                shipCrud.move_ships(db, ship_ids, origin)
+
+        timings['move_ships'] = summarize(time_runs(move_ships, repeat), len(moves) * 2)
+        timings['restore_all'] = summarize(time_runs(lambda: shipCrud.restore_all(db), repeat), 1)
+
+        report_dir = os.path.join(work_dir, 'reports')
+
+        def write_reports_uncached():
+            reportCrud.clear_report_cache(db)
+            report.write_all_reports(db, report_dir)
+
+        timings['report'] = summarize(time_runs(write_reports_uncached, repeat), len(faction_names))
+        timings['report_cached'] = summarize(time_runs(lambda: report.write_all_reports(db, report_dir), repeat), len(faction_names))
+
+        save_path = os.path.join(work_dir, 'game.jsonl.gz')
+
+        def save_game():
+            with gzip.open(save_path, 'wt', compresslevel=6) as f:
+                gameCrud.save_game(db, f)
+
+        def load_game():
+            load_db = Database("sqlite://").get_db()
+            with gzip.open(save_path, 'rt') as f:
+                gameCrud.load_game(load_db, f)
+            load_db.close()
+
+        timings['save_game'] = summarize(time_runs(save_game, repeat), 1)
+        timings['load_game'] = summarize(time_runs(load_game, repeat), 1)
+
+        # Last, since it destroys ships: each run fights one more round
+        contested_planets = combatCrud.get_contested_planets(db).count()
+        timings['resolve_combat'] = summarize(time_runs(lambda: combatCrud.resolve_combat(db, seed), repeat), contested_planets)
+
+        db.close()
+
+    return {
+        'scale': scale_name,
+        'planets': scale.planets,
+        'factions': scale.factions,
+        'ships': scale.ships,
+        'facilities': len(galaxy.facilities),
+        'connections': sum(len(planet['connections']) for planet in galaxy.planets) // 2,
+        'generate_seconds': generate_seconds,
+        'load_seconds': load_seconds,
+        'timings': timings
+    }
+
+
+def run(kwargs):
+    scale_names = [name.strip() for name in kwargs['--scales'].split(',') if name.strip()]
+    for scale_name in scale_names:
+        if scale_name not in galaxy_scales:
+            raise ValueError(f"Unknown scale '{scale_name}'. Valid scales are {', '.join(galaxy_scales.keys())}.")
+
+    results = {
+        'label': kwargs['--label'],
+        'created': datetime.now(timezone.utc).isoformat(),
+        'seed': int(kwargs['--seed']),
+        'repeat': int(kwargs['--repeat']),
+        'python': platform.python_version(),
+        'sqlalchemy': sqlalchemy.__version__,
+        'scales': []
+    }
+
+    for scale_name in scale_names:
+        print(f"Running scale '{scale_name}' ({galaxy_scales[scale_name].planets} planets)...")
+        result = benchmark_scale(scale_name, results['seed'], results['repeat'], int(kwargs['--samples']), int(kwargs['--build_map_limit']))
+        results['scales'].append(result)
+
+        for operation, timing in result['timings'].items():
+            print(f"  {operation:<28} {timing['best']:10.4f}s best of {len(timing['runs'])} ({timing['calls']} call(s))")
+
+    with open(kwargs['--output'], 'w') as f:
+        json.dump(results, f, indent=2)
+
+    print(f"Wrote {kwargs['--output']}")
+
+
+def compare(kwargs):
+    """Prints the ratio of current to baseline best times for every operation both files have"""
+    with open(kwargs['<baseline>']) as f:
+        baseline = json.load(f)
+    with open(kwargs['<current>']) as f:
+        current = json.load(f)
+
+    print(f"{baseline['label']} -> {current['label']}")
+
+    baseline_scales = {result['scale']: result for result in baseline['scales']}
+    for result in current['scales']:
+        baseline_result = baseline_scales.get(result['scale'])
+        if baseline_result is None:
+            continue
+
+        print(f"Scale '{result['scale']}':")
+        for operation, timing in result['timings'].items():
+            baseline_timing = baseline_result['timings'].get(operation)
+            if baseline_timing is None:
+                continue
+
+            ratio = timing['best'] / baseline_timing['best'] if baseline_timing['best'] > 0 else float('inf')
+            print(f"  {operation:<28} {baseline_timing['best']:10.4f}s -> {timing['best']:10.4f}s ({ratio:.2f}x)")
+
+
+switcher = {
+    'run': run,
+    'compare': compare
+}
+
+
+if __name__ == '__main__':
+    if len(argv) == 1:
+        argv.append('-h')
+    kwargs = docopt(__doc__)
+
+    method = argv[1]
+    switcher.get(method)(kwargs)
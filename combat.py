@@ -0,0 +1,93 @@
+"""
+Usage:
+    combat.py resolve [--db_url=<string>]
+    combat.py predict [--db_url=<string>]
+"""
+
+import random
+from sys import argv
+from time import perf_counter
+
+from InquirerPy import inquirer as iq
+from docopt import docopt
+
+from src.crud import combatCrud
+from src.utils import promptUtils
+from src.utils.db import Database
+from src.utils.promptUtils import faction_prompt
+from src.utils.shipUtils import validate_module_str
+
+
+def resolve(database):
+    contested_planets = combatCrud.get_contested_planets(database).count()
+    if contested_planets == 0:
+        return print("No planets are contested.")
+
+    # The seed is shown so that the same round can be replayed on a copy of the game
+    seed = promptUtils.number_prompt("Seed:", str(random.randrange(2 ** 32)))
+    if not iq.confirm(f"Resolve a round of combat on {contested_planets} contested planet(s)?").execute():
+        return
+
+    start = perf_counter()
+    losses = combatCrud.resolve_combat(database, seed)
+
+    planet_name = None
+    for faction_losses in losses:
+        if faction_losses.planet != planet_name:
+            planet_name = faction_losses.planet
+            print(f"{planet_name}:")
+        print(f"    {faction_losses.faction}: {faction_losses.damage} damage taken, "
+              f"{faction_losses.destroyed} of {faction_losses.ships} ship(s) destroyed")
+
+    print(f"Resolved combat on {contested_planets} planet(s) with seed {seed} in {perf_counter() - start:.2f}s")
+
+
+def hypothetical_ships_prompt(database):
+    extra_ships = []
+    while iq.confirm("Add hypothetical ships?", default=False).execute():
+        owner = faction_prompt(database)
+        modules = iq.text(
+            message="Modules:",
+            validate=lambda value: value.upper() == "COLONY" or validate_module_str(value),
+            invalid_message="Must be a modules string (e.g. W1D2) or COLONY."
+        ).execute().upper()
+        count = promptUtils.number_prompt("Number of ships:", "1")
+        extra_ships.append((owner, modules, count))
+
+    return extra_ships
+
+
+def predict(database):
+    planet_name = promptUtils.planet_prompt(database)
+    extra_ships = hypothetical_ships_prompt(database)
+    trials = promptUtils.number_prompt("Number of battles to simulate:", "10000")
+    seed = promptUtils.number_prompt("Seed:", str(random.randrange(2 ** 32)))
+
+    start = perf_counter()
+    try:
+        outcomes, draw_probability = combatCrud.predict_battle(database, planet_name, extra_ships, trials, seed)
+    except ValueError as e:
+        return print(e)
+
+    print(f"Battle at {planet_name} ({trials} simulations, seed {seed}):")
+    for outcome in outcomes:
+        print(f"    {outcome.faction}: wins {outcome.win_probability:.1%}, "
+              f"loses {outcome.expected_losses:.1f} of {outcome.units} ship(s) and facilities on average")
+    print(f"    Draws: {draw_probability:.1%}")
+    print(f"Simulated in {perf_counter() - start:.2f}s")
+
+
+switcher = {
+    'resolve': resolve,
+    'predict': predict
+}
+
+
+if __name__ == '__main__':
+    if len(argv) == 1:
+        argv.append('-h')
+    kwargs = docopt(__doc__)
+    db = Database(kwargs['--db_url']).get_db()
+
+    method = argv[1]
+    switcher.get(method)(db)
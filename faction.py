@@ -11,14 +11,15 @@ Usage:
 import json
 from sys import argv
 from textwrap import dedent
+from time import perf_counter
 
 from InquirerPy import inquirer as iq
 from docopt import docopt
 
 from src.crud import factionCrud
 from src.utils.db import Database
+from src.utils.designUtils import module_types
 from src.utils.factionUtils import resource_types
-from src.utils.shipUtils import module_types
 
 
 def generate_factions(database):
@@ -115,12 +116,13 @@ def update_all_resources(database):
     if not do_update_all_factions:
         faction_name = iq.text("Faction name:").execute()
 
-    factions = list(map(lambda fac: fac.faction_name, factionCrud.get_factions(database)))\
-        if faction_name is None\
-        else [faction_name]
+    faction_names = None if faction_name is None else [faction_name]
 
-    for faction in factions:
-        factionCrud.update_resources(database, faction)
+    start_time = perf_counter()
+    num_updated = factionCrud.update_all_resources(database, faction_names)
+    elapsed_time = perf_counter() - start_time
+
+    print(f"Updated resources for {num_updated} faction(s) in {elapsed_time:.3f}s")
 
 
 switcher = {
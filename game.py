@@ -0,0 +1,67 @@
+"""
+Usage:
+    game.py save_game [--db_url=<string>]
+    game.py load_game [--db_url=<string>]
+"""
+
+import gzip
+from sys import argv
+from time import perf_counter
+
+from InquirerPy import inquirer as iq
+from docopt import docopt
+
+from src.crud import gameCrud
+from src.utils.db import Database
+
+default_save_path = "game_resources/game.jsonl.gz"
+
+
+def save_path_prompt():
+    save_path = default_save_path
+    use_default_path = iq.confirm(f"Use default path? ({save_path})").execute()
+    if not use_default_path:
+        save_path = iq.text("Save file location:").execute()
+
+    return save_path
+
+
+def save_game(database):
+    save_path = save_path_prompt()
+
+    start = perf_counter()
+    with gzip.open(save_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+        gameCrud.save_game(database, f)
+
+    print(f"Saved the game to {save_path} in {perf_counter() - start:.2f}s")
+
+
+def load_game(database):
+    save_path = save_path_prompt()
+    if not iq.confirm("This replaces the current game. Continue?").execute():
+        return
+
+    start = perf_counter()
+    try:
+        with gzip.open(save_path, 'rt', encoding='utf-8') as f:
+            gameCrud.load_game(database, f)
+    except (OSError, ValueError) as e:
+        return print(f"Could not load {save_path}: {e}")
+
+    print(f"Loaded the game from {save_path} in {perf_counter() - start:.2f}s")
+
+
+switcher = {
+    'save_game': save_game,
+    'load_game': load_game
+}
+
+
+if __name__ == '__main__':
+    if len(argv) == 1:
+        argv.append('-h')
+    kwargs = docopt(__doc__)
+    db = Database(kwargs['--db_url']).get_db()
+
+    method = argv[1]
+    switcher.get(method)(db)
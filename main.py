@@ -2,8 +2,10 @@ import os
 
 from dotenv import load_dotenv
 
+import combat
 import facility
 import faction
+import game
 import planet
 import report
 import ship
@@ -16,8 +18,10 @@ if __name__ == '__main__':
     script_choice = iq.select(
         message="Which script should be run?",
         choices=[
+            {'name': 'combat', 'value': combat},
             {'name': 'facility', 'value': facility},
             {'name': 'faction', 'value': faction},
+            {'name': 'game', 'value': game},
             {'name': 'planet', 'value': planet},
             {'name': 'report', 'value': report},
             {'name': 'ship', 'value': ship}
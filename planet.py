@@ -1,6 +1,8 @@
 """
 Usage:
     planet.py generate_planets [--db_url=<string>]
+    planet.py update_planets [--db_url=<string>]
+    planet.py generate_random_map [--db_url=<string>]
     planet.py print_planets [--db_url=<string>]
     planet.py print_single_planet [--db_url=<string>]
     planet.py claim [--db_url=<string>]
@@ -9,22 +11,24 @@ Usage:
     planet.py upgrade [--db_url=<string>]
     planet.py damage [--db_url=<string>]
     planet.py restore [--db_url=<string>]
+    planet.py route [--db_url=<string>]
 """
 
 import json
 from sys import argv
 from textwrap import dedent
+from time import perf_counter
 
 from InquirerPy import inquirer as iq
 from docopt import docopt
 
-from src.crud import planetCrud, shipCrud
-from src.utils import planetUtils, promptUtils
+from src.crud import connectionCrud, planetCrud, shipCrud
+from src.utils import galaxyUtils, planetUtils, promptUtils, shipUtils
 from src.utils.colonyUtils import colony_type_to_str
 from src.utils.db import Database
 
 
-def get_planet_entry(database, planet, faction_name=None):
+def get_planet_entry(database, planet, faction_name=None, detection_matrix=None):
     size_map = {
         's': 'Small',
         'm': 'Medium',
@@ -39,20 +43,20 @@ def get_planet_entry(database, planet, faction_name=None):
     ships_on_planet = \
         shipCrud.get_ships_on_planet(database, planet.name) \
         if faction_name is None \
-        else shipCrud.get_visible_ships_on_planet(database, planet.name, faction_name)
+        else shipCrud.get_visible_ships_on_planet(database, planet.name, faction_name, detection_matrix)
 
     entry = f"""\
             {planet.name} ({size_map[planet.size]}-{planet.resources}) {col_size_display}
             Special: {planet.special.value}
-            Connections: {', '.join(list(map(lambda c: c.name, planet.connections)))}
+            Connections: {', '.join(planetCrud.get_connection_names(database, planet.name))}
             Facilities: {planet.facilities}
             Ships in orbit: {ships_on_planet}
             """
     return dedent(entry)
 
 
-def print_planet(database, planet, faction_name=None):
-    print(get_planet_entry(database, planet, faction_name))
+def print_planet(database, planet, faction_name=None, detection_matrix=None):
+    print(get_planet_entry(database, planet, faction_name, detection_matrix))
 
 
 def print_single_planet(database):
@@ -78,9 +82,10 @@ def print_planets(database):
         faction_name = None
 
     planet_info = planetCrud.get_planets(database)
+    detection_matrix = shipUtils.get_detection_matrix(database) if faction_name is not None else None
 
     for p in planet_info:
-        print_planet(database, p, faction_name)
+        print_planet(database, p, faction_name, detection_matrix)
 
 
 def generate_planets(database):
@@ -89,16 +94,70 @@ def generate_planets(database):
     if not use_default_path:
         planets_file_path = iq.text("Planets file location:").execute()
 
-    errors = planetUtils.validate_planets_file(planets_file_path)
+    planets_from_file, errors = planetUtils.read_planets_file(planets_file_path)
     if len(errors) > 0:
         return print('\n'.join(errors))
 
-    with open(planets_file_path) as f:
-        planets_from_file = json.load(f)['planets']
-
     planetCrud.build_map(database, planets_from_file)
 
 
+def update_planets(database):
+    planets_file_path = "game_resources/planets.json"
+    use_default_path = iq.confirm(f"Use default path? ({planets_file_path})").execute()
+    if not use_default_path:
+        planets_file_path = iq.text("Planets file location:").execute()
+
+    planets_from_file, errors = planetUtils.read_planets_file(planets_file_path, external_connections=True)
+    if len(errors) > 0:
+        return print('\n'.join(errors))
+
+    try:
+        changes = planetCrud.update_map(database, planets_from_file)
+    except ValueError as e:
+        return print(e)
+
+    print(dedent(f"""\
+                 Planets added: {changes.inserted}
+                 Planets updated: {changes.updated}
+                 Connections added: {changes.connections_added}
+                 Connections removed: {changes.connections_removed}\
+                 """))
+
+
+def generate_random_map(database):
+    seed = promptUtils.number_prompt("Seed:", "0")
+    num_planets = promptUtils.number_prompt("Number of planets:", "100")
+    average_degree = promptUtils.number_prompt("Average connections per planet:", "3", float)
+
+    specials = galaxyUtils.special_weights
+    use_default_specials = iq.confirm(f"Use default special world mix? ({', '.join(f'{special.value}: {weight}' for special, weight in specials.items())})").execute()
+    if not use_default_specials:
+        specials = {special: promptUtils.number_prompt(f"Relative weight of {special.value}:", str(weight)) for special, weight in specials.items()}
+
+    write_to_file = iq.select(
+        message="Output:",
+        choices=[
+            {'name': 'Write a planets file', 'value': True},
+            {'name': 'Load into the database', 'value': False}
+        ]
+    ).execute()
+    planets_file_path = iq.text("Planets file location:", default="game_resources/random_planets.json").execute() if write_to_file else None
+
+    start = perf_counter()
+    planets = galaxyUtils.generate_map(num_planets, seed, average_degree, specials)
+
+    if write_to_file:
+        with open(planets_file_path, 'w') as f:
+            json.dump({'planets': planets}, f, indent=2)
+        destination = planets_file_path
+    else:
+        planetCrud.build_map(database, planets)
+        destination = "the database"
+
+    num_connections = sum(len(planet['connections']) for planet in planets) // 2
+    print(f"Generated {len(planets)} planets with {num_connections} connections into {destination} in {perf_counter() - start:.2f}s")
+
+
 def claim_planet(database):
     confirmation = iq.confirm("This method should only be used for game setup. Otherwise, use 'colonize' or 'reassign'. Continue?").execute()
     if not confirmation:
@@ -146,8 +205,51 @@ def restore_planet(database):
     planetCrud.restore_garrison_points(database, planet_name)
 
 
+def route(database):
+    query = iq.select(
+        message="Find:",
+        choices=[
+            {'name': 'Shortest route between two planets', 'value': 'route'},
+            {'name': 'Planets within a number of jumps', 'value': 'within_jumps'},
+            {'name': 'Groups of connected planets', 'value': 'components'}
+        ]
+    ).execute()
+
+    if query == 'route':
+        origin = promptUtils.planet_prompt(database, "From:")
+        destination = promptUtils.planet_prompt(database, "To:")
+
+        planet_route = connectionCrud.get_route(database, origin, destination)
+        print(f"{' -> '.join(planet_route)} ({len(planet_route) - 1} jumps)")
+
+    elif query == 'within_jumps':
+        planet_name = promptUtils.planet_prompt(database)
+        jumps = int(iq.text(
+            message="Jumps:",
+            validate=lambda count: count.isdigit(),
+            invalid_message="Must be a non-negative integer."
+        ).execute())
+
+        planets_by_hops = {}
+        for other, hops in connectionCrud.get_planets_within_jumps(database, planet_name, jumps).items():
+            planets_by_hops.setdefault(hops, []).append(other)
+
+        for hops, planet_names in planets_by_hops.items():
+            print(f"{hops} jump{'s' if hops > 1 else ''}: {', '.join(planet_names)}")
+
+    else:
+        components = connectionCrud.get_connected_components(database)
+        if len(components) == 1:
+            return print(f"All {len(components[0])} planets are connected.")
+
+        for number, component in enumerate(components, start=1):
+            print(f"Group {number} ({len(component)} planets): {', '.join(component)}")
+
+
 switcher = {
     'generate_planets': generate_planets,
+    'update_planets': update_planets,
+    'generate_random_map': generate_random_map,
     'print_planets': print_planets,
     'print_single_planet': print_single_planet,
     'claim': claim_planet,
@@ -155,7 +257,8 @@ switcher = {
     'reassign': reassign_planet,
     'upgrade': upgrade_planet,
     'damage': damage_planet,
-    'restore': restore_planet
+    'restore': restore_planet,
+    'route': route
 }
 
 
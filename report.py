@@ -1,34 +1,38 @@
 """
 Usage:
-    python report.py [--db_url=<string>]
+    report.py print_report [--db_url=<string>]
+    report.py print_all_reports [--db_url=<string>]
 """
-from sys import argv
+import hashlib
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from sys import argv, stdout
 from textwrap import dedent
 
 from InquirerPy import inquirer as iq
 from docopt import docopt
 
-from src.crud import shipCrud, planetCrud, factionCrud
+from src.crud import factionCrud, reportCrud, snapshotCrud, stateCrud
+from src.utils import snapshotUtils
 from src.utils.colonyUtils import colony_type_to_str, maximum_facilities
 from src.utils.db import Database
 from src.utils.facilityUtils import display_facilities
 from src.utils.shipUtils import ships_to_str_observed, group_ships_by_faction, ships_to_str_owned
 
 
-def generate_resources_section(args):
-    database = args['db']
-    faction_name = args['--faction']
-
-    faction = factionCrud.query_faction_by_name(database, faction_name).first()
+def generate_resources_section(snapshot, faction_name):
+    faction = snapshot.factions[faction_name]
 
     rp_total = faction.rp
     mp_total = faction.mp
 
-    rp_income = factionCrud.get_resource_income(database, faction_name, "rp")
-    mp_income = factionCrud.get_resource_income(database, faction_name, "mp")
-    lp_income = factionCrud.get_resource_income(database, faction_name, "lp")
+    rp_income = snapshotUtils.get_resource_income(snapshot, faction_name, "rp")
+    mp_income = snapshotUtils.get_resource_income(snapshot, faction_name, "mp")
+    lp_income = snapshotUtils.get_resource_income(snapshot, faction_name, "lp")
 
-    return dedent(f"""\
+    yield dedent(f"""\
            ------------------------
            Available Resources
            ------------------------
@@ -38,12 +42,8 @@ def generate_resources_section(args):
            """)
 
 
-def generate_module_research_section(args):
-    database = args['db']
-    faction_name = args['--faction']
-
-    faction = factionCrud.query_faction_by_name(database, faction_name).first()
-    research = faction.research
+def generate_module_research_section(snapshot, faction_name):
+    research = snapshot.factions[faction_name].research
 
     armor_research = research['armor_plating']
     bridge_research = research['command_bridge']
@@ -55,7 +55,7 @@ def generate_module_research_section(args):
     barracks_research = research['marine_barracks']
     heavy_weapons_research = research['heavy_weapons_bay']
 
-    return dedent(f"""\
+    yield dedent(f"""\
            ------------------------
            Ship Module Research
            ------------------------
@@ -71,20 +71,20 @@ def generate_module_research_section(args):
            """)
 
 
-def get_planet_entry(database, planet, faction_name):
+def get_planet_entry(snapshot, planet, faction_name):
     size_map = {
         's': 'Small',
         'm': 'Medium',
         'l': 'Large'
     }
 
-    facilities = [fac.__repr__() for fac in planet.facilities]
+    facilities = [fac.__repr__() for fac in snapshotUtils.get_planet_facilities(snapshot, planet.name)]
 
     col_size_display = ""
     planet_owner = "unclaimed"
     num_facilities = len(facilities)
     if planet.colony_size and planet.owner:
-        max_garrison_points = planetCrud.get_max_garrison_points(database, planet.name)
+        max_garrison_points = snapshotUtils.get_max_garrison_points(snapshot, planet.name)
         col_size_display = f"- {colony_type_to_str.get(planet.colony_size)} ({planet.garrison_points}/{max_garrison_points} GP)"
         planet_owner = planet.owner
 
@@ -96,7 +96,7 @@ def get_planet_entry(database, planet, faction_name):
 
     facilities_display = display_facilities(facilities)
 
-    ships_on_planet = shipCrud.get_visible_ships_on_planet(database, planet.name, faction_name)
+    ships_on_planet = snapshotUtils.get_visible_ships_on_planet(snapshot, planet.name, faction_name)
     grouped_ships = group_ships_by_faction(ships_on_planet)
 
     owned_ships = grouped_ships.pop(faction_name, None)
@@ -115,61 +115,226 @@ def get_planet_entry(database, planet, faction_name):
            {planet.name} ({size_map[planet.size]}-{planet.resources}) {col_size_display}
            Special: {planet.special.value}
            Owner: {planet_owner}
-           Connections: {', '.join(list(map(lambda c: c.name, planet.connections)))}
+           Connections: {', '.join(snapshotUtils.get_connection_names(snapshot, planet.name))}
            Facilities: {facilities_display}
            {owned_ships_display}
            {observed_ships_display}
            """
 
 
-def get_planet_entries(database, planets, faction_name):
-    entries = []
-    for planet in planets:
-        entries.append(get_planet_entry(database, planet, faction_name))
-
-    return '\n'.join(entries)
+def get_planet_entries(snapshot, planets, faction_name):
+    """Yields the entries for the given planets one at a time, separated by blank lines"""
+    for index, planet in enumerate(planets):
+        if index > 0:
+            yield '\n'
+        yield dedent(get_planet_entry(snapshot, planet, faction_name))
 
 
-def generate_planets_section(args):
-    database = args['db']
-    faction_name = args['--faction']
+def generate_planets_section(snapshot, faction_name):
+    planets_in_report = snapshotUtils.get_planets_by_faction(snapshot, faction_name)
 
-    planets_in_report = planetCrud.get_planets_by_faction(database, faction_name)
-
-    return dedent(f"""\
+    yield dedent("""\
            ------------------------
            Controlled Planets
            ------------------------
-           {get_planet_entries(database, planets_in_report['controlled'], faction_name)}
+           """)
+
+    yield from get_planet_entries(snapshot, planets_in_report['controlled'], faction_name)
+
+    yield dedent("""
 
            ------------------------
            Observed Planets
            ------------------------
-           {get_planet_entries(database, planets_in_report['observed'], faction_name)}
            """)
 
+    yield from get_planet_entries(snapshot, planets_in_report['observed'], faction_name)
 
-def print_report(database):
+    yield '\n'
 
-    args = {
-        'db': database,
-        '--faction': iq.select(
-            message="Faction name:",
-            choices=factionCrud.get_faction_names(database)
-        ).execute()
-    }
 
-    resources_section = generate_resources_section(args)
-    module_research_section = generate_module_research_section(args)
-    planets_section = generate_planets_section(args)
+# Report sections in order, each with the state domains its content depends on
+report_sections = {
+    'resources': (generate_resources_section, (stateCrud.FACTIONS, stateCrud.PLANETS, stateCrud.FACILITIES)),
+    'research': (generate_module_research_section, (stateCrud.FACTIONS,)),
+    'planets': (generate_planets_section, (stateCrud.PLANETS, stateCrud.SHIPS, stateCrud.FACILITIES, stateCrud.CONNECTIONS))
+}
+
+
+def generate_report(snapshot, faction_name):
+    """Yields a faction's report chunk by chunk"""
+    for generate_section, _ in report_sections.values():
+        yield from generate_section(snapshot, faction_name)
+        yield '\n'
+
+
+def write_report(chunks, out):
+    for chunk in chunks:
+        out.write(chunk)
+
+
+def read_rendered_section(path: str, block_size: int = 64 * 1024):
+    """Yields the contents of a section rendered to a file by a worker, then removes the file"""
+    with open(path, newline='') as f:
+        yield from iter(lambda: f.read(block_size), '')
+    os.remove(path)
+
+
+# Snapshot shared by every report worker process, set once per process by the pool initializer
+_worker_snapshot = None
+
 
-    print(resources_section)
-    print(module_research_section)
-    print(planets_section)
+def _init_report_worker(snapshot):
+    global _worker_snapshot
+    _worker_snapshot = snapshot
+
+
+def _render_sections_in_worker(job):
+    """Streams each requested section to its own file in render_dir and returns the file paths"""
+    faction_name, sections, render_dir = job
+
+    paths = []
+    for section in sections:
+        fd, path = tempfile.mkstemp(dir=render_dir, suffix='.txt')
+        with open(fd, 'w', newline='') as f:
+            write_report(report_sections[section][0](_worker_snapshot, faction_name), f)
+        paths.append(path)
+
+    return paths
+
+
+def generate_cached_reports(database, faction_names, workers: int = 1):
+    """
+    Yields (faction_name, chunks) for each faction, where chunks is an iterator over the
+    faction's report. Each report has to be consumed before moving on to the next one;
+    nothing larger than a single planet entry (or cache batch) is held in memory.
+
+    Sections whose inputs have not changed since they were last rendered are streamed from
+    the report cache; the game snapshot is only loaded if at least one section has to be rebuilt.
+
+    With more than one worker, stale sections are rendered by a pool of processes that
+    each receive the snapshot once and stream their output to temporary files.
+    The output is identical to serial rendering.
+    """
+    versions = stateCrud.get_versions(database)
+    keys = {section: stateCrud.versions_key(versions, inputs) for section, (_, inputs) in report_sections.items()}
+    cached_versions = reportCrud.get_cached_versions(database, faction_names)
+
+    stale_sections = [
+        (faction_name, [
+            section for section in report_sections.keys()
+            if cached_versions.get((faction_name, section)) != keys[section]
+        ])
+        for faction_name in faction_names
+    ]
+    jobs = [(faction_name, sections) for faction_name, sections in stale_sections if len(sections) > 0]
+
+    if len(jobs) == 0:
+        yield from assemble_reports(database, stale_sections, iter([]), keys)
+    elif workers > 1 and len(jobs) > 1:
+        snapshot = snapshotCrud.load_snapshot(database)
+        with tempfile.TemporaryDirectory() as render_dir, \
+                ProcessPoolExecutor(max_workers=workers, initializer=_init_report_worker, initargs=(snapshot,)) as executor:
+            worker_jobs = [(faction_name, sections, render_dir) for faction_name, sections in jobs]
+            rendered_paths = executor.map(_render_sections_in_worker, worker_jobs, chunksize=max(1, len(jobs) // (4 * workers)))
+            rendered = ([read_rendered_section(path) for path in paths] for paths in rendered_paths)
+            yield from assemble_reports(database, stale_sections, rendered, keys)
+    else:
+        snapshot = snapshotCrud.load_snapshot(database)
+        rendered = (
+            [report_sections[section][0](snapshot, faction_name) for section in sections]
+            for faction_name, sections in jobs
+        )
+        yield from assemble_reports(database, stale_sections, rendered, keys)
+
+
+def assemble_reports(database, stale_sections, rendered, keys):
+    """Pairs each faction with its freshly rendered sections (in job order) and commits the cache once every report has been consumed"""
+    for faction_name, sections_to_render in stale_sections:
+        new_sections = dict(zip(sections_to_render, next(rendered))) if len(sections_to_render) > 0 else {}
+        yield faction_name, assemble_report(database, faction_name, new_sections, keys)
+
+    database.commit()
+
+
+def assemble_report(database, faction_name, new_sections, keys):
+    """Yields a report from new sections (storing them in the cache on the way through) and cached ones"""
+    for section in report_sections.keys():
+        if section in new_sections:
+            yield from reportCrud.stream_section_into_cache(database, faction_name, section, keys[section], new_sections[section])
+        else:
+            yield from reportCrud.iter_cached_section(database, faction_name, section)
+        yield '\n'
+
+
+def print_report(database):
+    faction_name = iq.select(
+        message="Faction name:",
+        choices=factionCrud.get_faction_names(database)
+    ).execute()
+
+    for _, chunks in generate_cached_reports(database, [faction_name]):
+        write_report(chunks, stdout)
+
+
+def report_file_stems(faction_names):
+    """
+    {faction name: report file name without '.txt'}. Faction names come from players, so anything that
+    could leave output_dir (like '/') is replaced, and a name that had to change gets a short hash of the
+    original added, so 'Red Star' and 'Red_Star' get files of their own. Raises a ValueError if two
+    factions would still share a file, including on file systems that ignore case.
+    """
+    stems = {}
+    stem_owners = {}
+    for faction_name in faction_names:
+        stem = re.sub(r'[^\w.-]', '_', faction_name)
+        if stem != faction_name:
+            stem = f"{stem}-{hashlib.sha1(faction_name.encode()).hexdigest()[:8]}"
+
+        owner = stem_owners.setdefault(stem.casefold(), faction_name)
+        if owner != faction_name:
+            raise ValueError(f"Factions '{owner}' and '{faction_name}' would share the report file {stem}.txt")
+        stems[faction_name] = stem
+
+    return stems
+
+
+def write_all_reports(database, output_dir: str, workers: int = 1):
+    """Streams one report file per faction. Anything that has to be rebuilt is computed from a single snapshot of the game."""
+    faction_names = factionCrud.get_faction_names(database)
+    file_stems = report_file_stems(faction_names)
+    os.makedirs(output_dir, exist_ok=True)
+
+    report_paths = []
+    for faction_name, chunks in generate_cached_reports(database, faction_names, workers):
+        report_path = os.path.join(output_dir, f"{file_stems[faction_name]}.txt")
+        with open(report_path, 'w') as f:
+            write_report(chunks, f)
+        report_paths.append(report_path)
+
+    return report_paths
+
+
+def print_all_reports(database):
+    output_dir = "reports"
+    use_default_path = iq.confirm(f"Use default output directory? ({output_dir})").execute()
+    if not use_default_path:
+        output_dir = iq.text("Output directory:").execute()
+
+    workers = int(iq.text(
+        message="Worker processes:",
+        default=str(os.cpu_count() or 1),
+        validate=lambda count: count.isdigit() and int(count) > 0,
+        invalid_message="Must be a positive integer."
+    ).execute())
+
+    for report_path in write_all_reports(database, output_dir, workers):
+        print(f"Wrote {report_path}")
 
 
 switcher = {
-    'print_report': print_report
+    'print_report': print_report,
+    'print_all_reports': print_all_reports
 }
 
 
@@ -1,26 +1,30 @@
 """
 Usage:
     ship.py create [--db_url=<string>]
+    ship.py import_ships [--db_url=<string>]
     ship.py retrofit [--db_url=<string>]
     ship.py destroy [--db_url=<string>]
     ship.py damage [--db_url=<string>]
     ship.py restore [--db_url=<string>]
     ship.py restore_all [--db_url=<string>]
     ship.py move [--db_url=<string>]
+    ship.py move_route [--db_url=<string>]
     ship.py get_all [--db_url=<string>]
 """
 
 from sys import argv
 from textwrap import dedent
+from time import perf_counter
 
 from InquirerPy import inquirer as iq
 from docopt import docopt
 
-from src.crud import shipCrud, factionCrud, planetCrud
+from src.crud import connectionCrud, shipCrud, factionCrud, planetCrud
 from src.utils import promptUtils
 from src.utils.db import Database
+from src.utils.designUtils import module_abbreviations
 from src.utils.promptUtils import faction_prompt
-from src.utils.shipUtils import module_abbreviations, module_options
+from src.utils.shipUtils import module_options, read_ships_file
 
 
 def choose_modules(database, ship_size, faction_name):
@@ -79,6 +83,25 @@ def create_ship(database):
     shipCrud.create_ship_from_dict(database, ship)
 
 
+def import_ships(database):
+    ships_file_path = "game_resources/ships.json"
+    use_default_path = iq.confirm(f"Use default path? ({ships_file_path})").execute()
+    if not use_default_path:
+        ships_file_path = iq.text("Ships file location (.json or .csv):").execute()
+
+    start = perf_counter()
+    ships_from_file, errors = read_ships_file(ships_file_path)
+    if len(errors) > 0:
+        return print('\n'.join(errors))
+
+    try:
+        imported = shipCrud.import_ships(database, ships_from_file)
+    except ValueError as e:
+        return print(e)
+
+    print(f"Imported {imported} ship(s) from {ships_file_path} in {perf_counter() - start:.2f}s")
+
+
 def retrofit_ship(database):
     all_ships = filter(lambda ship: ship.modules != "COLONY", shipCrud.get_ships(database))
     ship_choices = list(map(
@@ -127,6 +150,35 @@ def move_ship(database):
     shipCrud.move_ships(database, ship_ids, destination)
 
 
+def move_fleet_along_route(database):
+    origin_location = promptUtils.planet_prompt(database, "From:")
+
+    ships_on_origin = shipCrud.get_ships_on_planet(database, origin_location)
+    ship_ids_on_origin = list(map(lambda ship: f"{ship.id}, modules: {ship.modules}, owner: {ship.owner}", ships_on_origin))
+
+    ship_selection = iq.checkbox(
+        message="Ship:",
+        choices=ship_ids_on_origin
+    ).execute()
+
+    ship_ids = [ship.split(',')[0] for ship in ship_selection]
+
+    destination = promptUtils.planet_prompt(database, "To:")
+
+    max_hops = iq.text(
+        message="Maximum jumps (leave blank for no limit):",
+        validate=lambda count: count == "" or count.isdigit(),
+        invalid_message="Must be a non-negative integer."
+    ).execute()
+
+    route = connectionCrud.get_route(database, origin_location, destination)
+    confirmation = iq.confirm(f"Move {len(ship_ids)} ship(s) along {' -> '.join(route)} ({len(route) - 1} jumps)?").execute()
+    if not confirmation:
+        return
+
+    shipCrud.move_fleet_along_route(database, ship_ids, destination, int(max_hops) if max_hops != "" else None, route)
+
+
 def damage_ship(database):
     ship_id = iq.text("Ship id:").execute()
     damage = int(iq.text("Damage:").execute())
@@ -141,7 +193,20 @@ def restore_ship(database):
 
 
 def restore_all(database):
-    shipCrud.restore_all(database)
+    planet_name = None
+    do_filter_by_planet = iq.confirm("Filter by planet?").execute()
+    if do_filter_by_planet:
+        planet_name = promptUtils.planet_prompt(database)
+
+    faction_name = None
+    do_filter_by_faction = iq.confirm("Filter by faction?").execute()
+    if do_filter_by_faction:
+        faction_name = promptUtils.faction_prompt(database)
+
+    at_friendly_shipyard = iq.confirm("Only ships at a friendly shipyard?").execute()
+
+    restored = shipCrud.restore_all(database, faction_name, planet_name, at_friendly_shipyard)
+    print(f"Restored {restored} ship(s)")
 
 
 def get_all(database):
@@ -171,9 +236,11 @@ def get_all(database):
 
 switcher = {
     'create': create_ship,
+    'import_ships': import_ships,
     'retrofit': retrofit_ship,
     'destroy': destroy_ship,
     'move': move_ship,
+    'move_route': move_fleet_along_route,
     'damage': damage_ship,
     'restore': restore_ship,
     'restore_all': restore_all,
@@ -0,0 +1,164 @@
+from collections import namedtuple
+
+import numpy as np
+from sqlalchemy import and_, bindparam, func, select
+from sqlalchemy.orm import Session
+
+from src import models
+from src.crud import stateCrud
+from src.utils import combatUtils
+from src.utils.designUtils import design_stats
+from src.utils.facilityUtils import FacilityType, defense_grid_weapons
+
+# One faction's part in a battle: how many of its ships fought, how much damage they took and how many were destroyed
+CombatLosses = namedtuple('CombatLosses', ['planet', 'faction', 'ships', 'damage', 'destroyed'])
+
+# One faction's predicted battle: its ships and facilities, the share of battles it won and the average number of them lost
+FactionOutcome = namedtuple('FactionOutcome', ['faction', 'units', 'win_probability', 'expected_losses'])
+
+
+def get_contested_planets(db: Session):
+    """Names of the planets where ships of more than one faction are in orbit"""
+    return db.query(models.Ship.location)\
+        .filter(models.Ship.owner.isnot(None))\
+        .group_by(models.Ship.location)\
+        .having(func.count(models.Ship.owner.distinct()) > 1)
+
+
+def _load_ships(db: Session, condition):
+    """
+    The (id, owner, location, hit_points) rows of the ships matching a condition, and their
+    module counts (as combatUtils.module_counts, one row per ship)
+    """
+    ship = models.Ship.__table__
+    design = models.ShipDesign.__table__
+    rows = db.execute(
+        select([
+            ship.c.id, ship.c.owner, ship.c.location, ship.c.hit_points, ship.c.modules,
+            design.c.heavy_weapons_bay, design.c.hangar_bay, design.c.point_defense_battery, design.c.armor_plating
+        ])
+        .select_from(ship.outerjoin(design, ship.c.design_id == design.c.id))
+        .where(condition)
+    ).fetchall()
+
+    # Module counts come from the ships' designs, and are only worked out for ships without one
+    counts = np.array([tuple(row)[5:] for row in rows], dtype=object).reshape(-1, 4)
+    without_design = [index for index, row in enumerate(rows) if row.heavy_weapons_bay is None]
+    if len(without_design) > 0:
+        counts[without_design] = np.column_stack(combatUtils.module_counts([rows[index].modules for index in without_design]))
+
+    return [tuple(row)[:4] for row in rows], counts.astype(np.int64)
+
+
+def resolve_combat(db: Session, seed: int = None):
+    """
+    Fights one round of combat (see combatUtils) on every contested planet at once. Damaged ships
+    are updated and destroyed ships deleted in bulk, in one transaction. Returns the CombatLosses
+    of every faction involved, by planet.
+    """
+    ship = models.Ship.__table__
+    contested_planets = get_contested_planets(db).subquery()
+    ships, counts = _load_ships(db, and_(ship.c.owner.isnot(None), ship.c.location.in_(select([contested_planets.c.location]))))
+    if len(ships) == 0:
+        return []
+
+    ids, owners, locations, hit_points = zip(*ships)
+    planet_names, group = np.unique(np.array(locations, dtype=str), return_inverse=True)
+    faction_names, side = np.unique(np.array(owners, dtype=str), return_inverse=True)
+
+    combatants, order = combatUtils.sort_combatants(combatUtils.Combatants(
+        group.reshape(-1),
+        side.reshape(-1),
+        np.array(hit_points, dtype=np.int64),
+        *counts.T
+    ))
+    ids = np.array(ids, dtype=object)[order]
+
+    damage = combatUtils.fire_round(combatants, np.random.default_rng(seed))
+    remaining_hit_points = combatants.hit_points - damage
+    is_destroyed = remaining_hit_points <= 0
+    is_damaged = (damage > 0) & ~is_destroyed
+
+    if is_damaged.any():
+        db.execute(
+            ship.update().where(ship.c.id == bindparam('ship_id')).values(hit_points=bindparam('remaining_hit_points')),
+            [
+                {'ship_id': ship_id, 'remaining_hit_points': int(remaining)}
+                for ship_id, remaining in zip(ids[is_damaged], remaining_hit_points[is_damaged])
+            ]
+        )
+    if is_destroyed.any():
+        db.execute(ship.delete().where(ship.c.id == bindparam('ship_id')), [{'ship_id': ship_id} for ship_id in ids[is_destroyed]])
+
+    stateCrud.bump_versions(db, stateCrud.SHIPS)
+    db.commit()
+
+    # Combatants are sorted by planet then faction, so each faction's ships on a planet are one run
+    starts = np.flatnonzero(np.concatenate(([True], (combatants.group[1:] != combatants.group[:-1]) | (combatants.side[1:] != combatants.side[:-1]))))
+    return [
+        CombatLosses(planet=str(planet_names[group_index]), faction=str(faction_names[side_index]), ships=ships, damage=damage_taken, destroyed=destroyed)
+        for group_index, side_index, ships, damage_taken, destroyed in zip(
+            combatants.group[starts].tolist(),
+            combatants.side[starts].tolist(),
+            np.diff(np.append(starts, len(ids))).tolist(),
+            np.add.reduceat(damage, starts).tolist(),
+            np.add.reduceat(is_destroyed.astype(np.int64), starts).tolist()
+        )
+    ]
+
+
+def predict_battle(db: Session, planet_name: str, extra_ships=(), trials: int = 10_000, seed: int = None, workers: int = None):
+    """
+    Simulates 'trials' battles (see combatUtils.predict_battle) between everything at a planet: the
+    ships in orbit, hypothetical 'extra_ships' ((owner, modules, count) tuples, at full hit points),
+    and the planet's facilities, which fight for its owner (defense grids fire, see facilityUtils).
+    Returns the FactionOutcome of every faction involved, and the probability of a draw.
+    """
+    if trials < 1:
+        raise ValueError("At least one battle must be simulated")
+    planet = db.query(models.Planet.owner).filter_by(name=planet_name).first()
+    if planet is None:
+        raise ValueError(f"Planet '{planet_name}' does not exist")
+
+    ship = models.Ship.__table__
+    ships, ship_counts = _load_ships(db, and_(ship.c.owner.isnot(None), ship.c.location == planet_name))
+    owners = [owner for _, owner, _, _ in ships]
+    hit_points = [ship_hit_points for _, _, _, ship_hit_points in ships]
+    counts = [ship_counts]
+
+    for owner, modules, count in extra_ships:
+        owners += [owner] * count
+        hit_points += [design_stats(modules).max_hp] * count
+        counts.append(np.repeat(np.column_stack(combatUtils.module_counts([modules])), count, axis=0))
+
+    if planet.owner is not None:
+        for facility in db.query(models.Facility.facility_type, models.Facility.level, models.Facility.shields).filter_by(planet=planet_name):
+            owners.append(planet.owner)
+            hit_points.append(1 + facility.shields)
+            weapons = defense_grid_weapons[facility.level] if facility.facility_type == FacilityType.DEFENSE_GRID else 0
+            counts.append(np.array([[weapons, 0, 0, 0]], dtype=np.int64))
+
+    faction_names, side = np.unique(np.array(owners, dtype=str), return_inverse=True)
+    if len(faction_names) < 2:
+        raise ValueError(f"There is no battle at {planet_name}: fewer than two factions would take part")
+
+    fleet, _ = combatUtils.sort_combatants(combatUtils.Combatants(
+        np.zeros(len(owners), dtype=np.int64),
+        side.reshape(-1),
+        np.array(hit_points, dtype=np.int64),
+        *np.concatenate(counts).T
+    ))
+    totals = combatUtils.predict_battle(fleet, trials, seed, workers)
+
+    units = np.bincount(fleet.side, minlength=len(faction_names))
+    outcomes = [
+        FactionOutcome(
+            faction=str(faction_name),
+            units=int(units[index]),
+            win_probability=float(totals.wins[index] / trials),
+            expected_losses=float(totals.losses[index] / trials)
+        )
+        for index, faction_name in enumerate(faction_names)
+    ]
+
+    return outcomes, totals.draws / trials
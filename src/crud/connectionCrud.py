@@ -0,0 +1,120 @@
+from itertools import chain
+
+from sqlalchemy import and_, event, exists, inspect, select, union_all
+from sqlalchemy.orm import Session
+
+from src import models
+from src.crud import stateCrud
+from src.utils.graphUtils import AdjacencyGraph
+
+# Process-wide adjacency graph, as (bind, connections version, graph). It is rebuilt when
+# the database or the CONNECTIONS version differs from the one it was built from, and
+# dropped whenever a session flushes changes to planets or rolls back.
+_cached_graph = None
+
+
+def neighbor_pairs():
+    """
+    Every connection in both directions, as a (planet_id, neighbor_id) selectable. Each half
+    is served by the index on one column of PlanetConnection.
+    """
+    connection = models.PlanetConnection
+    return union_all(
+        select([connection.c.planet_a_id.label('planet_id'), connection.c.planet_b_id.label('neighbor_id')]),
+        select([connection.c.planet_b_id, connection.c.planet_a_id])
+    ).alias('PlanetNeighbor')
+
+
+def get_neighbor_names(db: Session, planet_name: str):
+    """Names of the planets connected to the given one, sorted, read from the database rather than the graph"""
+    planet = db.query(models.Planet.id).filter_by(name=planet_name).first()
+    if planet is None:
+        raise ValueError(f"Planet '{planet_name}' does not exist")
+
+    neighbors = neighbor_pairs()
+    neighbor_names = db.query(models.Planet.name) \
+        .join(neighbors, neighbors.c.neighbor_id == models.Planet.id) \
+        .filter(neighbors.c.planet_id == planet.id) \
+        .order_by(models.Planet.name)
+
+    return [name for (name,) in neighbor_names]
+
+
+def are_connected(db: Session, planet_name: str, other_name: str):
+    """Whether two planets are connected, read from the database (so within the caller's transaction)"""
+    planet_ids = dict(db.query(models.Planet.name, models.Planet.id).filter(models.Planet.name.in_([planet_name, other_name])))
+    for name in (planet_name, other_name):
+        if name not in planet_ids:
+            raise ValueError(f"Planet '{name}' does not exist")
+
+    planet_a_id, planet_b_id = sorted((planet_ids[planet_name], planet_ids[other_name]))
+    connection = models.PlanetConnection
+    return db.query(exists().where(and_(connection.c.planet_a_id == planet_a_id, connection.c.planet_b_id == planet_b_id))).scalar()
+
+
+def load_adjacency_graph(db: Session):
+    """Builds the adjacency graph of the whole map from the Planet and PlanetConnection tables"""
+    planet_names = dict(db.query(models.Planet.id, models.Planet.name))
+    edges = db.query(models.PlanetConnection.c.planet_a_id, models.PlanetConnection.c.planet_b_id)
+
+    return AdjacencyGraph.from_edges(
+        planet_names.values(),
+        ((planet_names[planet_a_id], planet_names[planet_b_id]) for planet_a_id, planet_b_id in edges)
+    )
+
+
+def get_adjacency_graph(db: Session):
+    global _cached_graph
+
+    bind = db.get_bind()
+    version = stateCrud.get_version(db, stateCrud.CONNECTIONS)
+    if _cached_graph is None or _cached_graph[0] is not bind or _cached_graph[1] != version:
+        _cached_graph = (bind, version, load_adjacency_graph(db))
+
+    return _cached_graph[2]
+
+
+def get_route(db: Session, origin: str, destination: str):
+    """Planet names on a shortest route from origin to destination, both included"""
+    route = get_adjacency_graph(db).shortest_path(origin, destination)
+    if route is None:
+        raise ValueError(f"There is no route from {origin} to {destination}")
+
+    return route
+
+
+def get_planets_within_jumps(db: Session, planet_name: str, jumps: int):
+    """{planet name: hops} for every other planet at most 'jumps' hops away, nearest first"""
+    if jumps < 0:
+        raise ValueError("Number of jumps cannot be negative")
+
+    return get_adjacency_graph(db).within_jumps(planet_name, jumps)
+
+
+def get_connected_components(db: Session):
+    """Groups of planets that can reach each other, the largest first"""
+    return get_adjacency_graph(db).connected_components()
+
+
+def invalidate_adjacency_graph():
+    global _cached_graph
+    _cached_graph = None
+
+
+@event.listens_for(Session, 'after_flush')
+def _invalidate_on_planet_flush(session, flush_context):
+    """ORM changes (e.g. Planet.make_connection) don't bump the CONNECTIONS version, so any flushed planet change drops the graph"""
+    for instance in chain(session.new, session.deleted):
+        if isinstance(instance, models.Planet):
+            return invalidate_adjacency_graph()
+
+    for instance in session.dirty:
+        if isinstance(instance, models.Planet):
+            attrs = inspect(instance).attrs
+            if attrs.higher_connections.history.has_changes() or attrs.lower_connections.history.has_changes():
+                return invalidate_adjacency_graph()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _invalidate_on_rollback(session):
+    invalidate_adjacency_graph()
@@ -1,7 +1,7 @@
 from sqlalchemy.orm import Session
 
 from src import models, schemas
-from src.crud import planetCrud
+from src.crud import planetCrud, stateCrud
 from src.utils.facilityUtils import FacilityType, FacilityLevel
 
 
@@ -43,6 +43,7 @@ def create_facility(db: Session, facility: schemas.FacilityCreate):
         planet=facility.planet
     )
     db.add(db_facility)
+    stateCrud.bump_versions(db, stateCrud.FACILITIES)
     db.commit()
 
 
@@ -59,6 +60,7 @@ def upgrade_facility(db: Session, facility_id: str):
         raise ValueError("Only basic and intermediate facilities can be upgraded.")
 
     facility_query.update({'level': facility.level})
+    stateCrud.bump_versions(db, stateCrud.FACILITIES)
     db.commit()
 
 
@@ -76,6 +78,7 @@ def downgrade_facility(db: Session, facility_id: str):
         return
 
     facility_query.update({'level': facility.level})
+    stateCrud.bump_versions(db, stateCrud.FACILITIES)
     db.commit()
 
 
@@ -87,11 +90,13 @@ def damage_facility(db: Session, facility_id: str):
         downgrade_facility(db, facility_id)
     else:
         query_facility_by_id(db, facility_id).update({'shields': current_shields - 1})
+    stateCrud.bump_versions(db, stateCrud.FACILITIES)
     db.commit()
 
 
 def destroy_facility(db: Session, facility_id: str):
     query_facility_by_id(db, facility_id).delete()
+    stateCrud.bump_versions(db, stateCrud.FACILITIES)
     db.commit()
 
 
@@ -117,6 +122,7 @@ def set_facility_shields(db: Session, facilities, total_shields: int):
     for facility in facilities:
         query_facility_by_id(db, facility.id).update({'shields': total_shields})
 
+    stateCrud.bump_versions(db, stateCrud.FACILITIES)
     db.commit()
 
 
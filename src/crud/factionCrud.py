@@ -1,19 +1,71 @@
+from sqlalchemy import and_, bindparam, case, func
 from sqlalchemy.orm import Session
 
 from src import models
 from src import schemas
-from src.crud import planetCrud
+from src.crud import stateCrud
+from src.utils.facilityUtils import FacilityType, factory_multiplier, laboratory_output, fleet_hq_output
+from src.utils.factionUtils import resource_types
+from src.utils.planetUtils import SpecialPlanet
+
+
+def _facility_output(facility_type: FacilityType, output_by_level: dict, value=1):
+    return case(
+        [
+            (and_(models.Facility.facility_type == facility_type, models.Facility.level == level), output * value)
+            for level, output in output_by_level.items()
+        ],
+        else_=0
+    )
 
 
-def get_resource_income(db: Session, faction_name: str, resource_type: str):
-    income = 0
+def _special_bonus(facility_type: FacilityType, special: SpecialPlanet):
+    return case(
+        [(and_(models.Facility.facility_type == facility_type, models.Planet.special == special), 1)],
+        else_=0
+    )
+
+
+def query_resource_incomes(db: Session):
+    """mp, rp and lp income of every planet-owning faction, summed over facilities joined to planets in one grouped query.
+    Uses the same rules as planetUtils.calculate_production."""
+    mp = _facility_output(FacilityType.FACTORY, factory_multiplier, models.Planet.resources)
+    rp = _facility_output(FacilityType.LABORATORY, laboratory_output) + _special_bonus(FacilityType.LABORATORY, SpecialPlanet.ARTIFACT)
+    lp = _facility_output(FacilityType.FLEET_HQ, fleet_hq_output) + _special_bonus(FacilityType.FLEET_HQ, SpecialPlanet.LOGISTICS)
 
-    owned_planets = planetCrud.query_planets_by_owner(db, faction_name).all()
+    return db.query(
+        models.Planet.owner,
+        func.coalesce(func.sum(mp), 0).label('mp'),
+        func.coalesce(func.sum(rp), 0).label('rp'),
+        func.coalesce(func.sum(lp), 0).label('lp')
+    )\
+        .join(models.Facility, models.Facility.planet == models.Planet.name)\
+        .filter(models.Planet.owner.isnot(None))\
+        .group_by(models.Planet.owner)
 
-    for planet in owned_planets:
-        income += planetCrud.get_resource_production(db, planet.name, resource_type)
 
-    return income
+def get_resource_incomes(db: Session, faction_names: list = None):
+    """Returns {faction_name: {'mp': income, 'rp': income, 'lp': income}}.
+    Covers every faction, or only the given ones; factions without production get 0."""
+    incomes_query = query_resource_incomes(db)
+
+    if faction_names is None:
+        faction_names = get_faction_names(db)
+    else:
+        incomes_query = incomes_query.filter(models.Planet.owner.in_(faction_names))
+
+    incomes = {faction_name: {resource: 0 for resource in resource_types} for faction_name in faction_names}
+    for row in incomes_query:
+        incomes[row.owner] = {'mp': row.mp, 'rp': row.rp, 'lp': row.lp}
+
+    return incomes
+
+
+def get_resource_income(db: Session, faction_name: str, resource_type: str):
+    if resource_type.lower() not in resource_types:
+        raise ValueError("Only 'mp', 'rp', and 'lp' are valid resource types.")
+
+    return get_resource_incomes(db, [faction_name])[faction_name][resource_type.lower()]
 
 
 def set_research(db: Session, faction_name: str, module_name: str, tech_level: int):
@@ -22,6 +74,7 @@ def set_research(db: Session, faction_name: str, module_name: str, tech_level: i
     faction_research[module_name] = tech_level
 
     faction_query.update({'research': faction_research})
+    stateCrud.bump_versions(db, stateCrud.FACTIONS)
     db.commit()
     return faction_query
 
@@ -32,19 +85,30 @@ def get_research(db: Session, faction_name: str):
 
 
 def update_resources(db: Session, faction_name: str):
-    faction_query = query_faction_by_name(db, faction_name)
-    faction = faction_query.first()
-
-    mp_income = get_resource_income(db, faction_name, "mp")
-    rp_income = get_resource_income(db, faction_name, "rp")
-    lp_income = get_resource_income(db, faction_name, "lp")
-
-    current_mp = faction.mp
-    current_rp = faction.rp
+    update_all_resources(db, [faction_name])
+
+
+def update_all_resources(db: Session, faction_names: list = None):
+    """Turn-end update: adds each faction's mp and rp income to its pool and sets lp to its income.
+    All factions (or only the given ones) are updated by a single executemany UPDATE and one commit.
+    Returns the number of factions updated; names that don't belong to a faction are ignored."""
+    incomes = get_resource_incomes(db, faction_names)
+    if len(incomes) == 0:
+        return 0
+
+    faction_table = models.Faction.__table__
+    statement = faction_table.update()\
+        .where(faction_table.c.faction_name == bindparam('b_faction_name'))\
+        .values(mp=faction_table.c.mp + bindparam('b_mp'), rp=faction_table.c.rp + bindparam('b_rp'), lp=bindparam('b_lp'))
+
+    result = db.execute(statement, [
+        {'b_faction_name': faction_name, 'b_mp': income['mp'], 'b_rp': income['rp'], 'b_lp': income['lp']}
+        for faction_name, income in incomes.items()
+    ])
+    stateCrud.bump_versions(db, stateCrud.FACTIONS)
+    db.commit()
 
-    set_resource(db, faction_name, "mp", current_mp + mp_income)
-    set_resource(db, faction_name, "rp", current_rp + rp_income)
-    set_resource(db, faction_name, "lp", lp_income)
+    return result.rowcount
 
 
 def spend_resource(db: Session, faction_name: str, resource_type: str, amount_spent: int):
@@ -72,6 +136,7 @@ def set_resource(db: Session, faction_name: str, resource: str, new_total: int):
     faction_query = query_faction_by_name(db, faction_name)
 
     faction_query.update({resource: new_total})
+    stateCrud.bump_versions(db, stateCrud.FACTIONS)
     db.commit()
 
 
@@ -93,6 +158,7 @@ def create_faction(db: Session, faction: schemas.FactionCreate):
         faction_name=faction.faction_name
     )
     db.add(db_faction)
+    stateCrud.bump_versions(db, stateCrud.FACTIONS)
     db.commit()
     db.refresh(db_faction)
     return db_faction
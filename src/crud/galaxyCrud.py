@@ -0,0 +1,51 @@
+from sqlalchemy.orm import Session
+
+from src import models
+from src.crud import shipDesignCrud, stateCrud
+from src.utils.db import insert_in_batches, reset_id_counters
+from src.utils.galaxyUtils import Galaxy, galaxy_id, generate_ships
+from src.utils.planetUtils import special_str_to_enum
+
+
+def load_galaxy(db: Session, galaxy: Galaxy, batch_size: int = 10_000):
+    """
+    Writes a generated galaxy with bulk inserts (one executemany per batch of rows) and commits once.
+    Meant for setting up large benchmark games quickly; none of the per-row validation of the
+    regular crud functions is applied.
+    """
+    db.execute(models.Faction.__table__.insert(), [
+        {'id': galaxy_id(index), 'faction_name': faction_name}
+        for index, faction_name in enumerate(galaxy.factions)
+    ])
+
+    planet_ids = {planet['name']: galaxy_id(index) for index, planet in enumerate(galaxy.planets)}
+
+    def planet_rows():
+        for planet in galaxy.planets:
+            owner, colony_size, garrison_points = galaxy.colonies.get(planet['name'], (None, None, 0))
+            yield {
+                'id': planet_ids[planet['name']],
+                'name': planet['name'],
+                'size': planet['size'],
+                'resources': planet['resources'],
+                'special': special_str_to_enum[planet['special']],
+                'owner': owner,
+                'colony_size': colony_size,
+                'garrison_points': garrison_points
+            }
+
+    def connection_rows():
+        for planet in galaxy.planets:
+            for neighbor in planet['connections']:
+                # Each connection is listed by both planets; only the lower id's entry is stored
+                if planet_ids[planet['name']] < planet_ids[neighbor]:
+                    yield {'planet_a_id': planet_ids[planet['name']], 'planet_b_id': planet_ids[neighbor]}
+
+    insert_in_batches(db, models.Planet.__table__, planet_rows(), batch_size)
+    insert_in_batches(db, models.PlanetConnection, connection_rows(), batch_size)
+    insert_in_batches(db, models.Facility.__table__, galaxy.facilities, batch_size)
+    insert_in_batches(db, models.Ship.__table__, shipDesignCrud.with_designs(db, generate_ships(galaxy), batch_size), batch_size)
+    reset_id_counters(db, models.Faction.__table__, models.Planet.__table__, models.Facility.__table__, models.Ship.__table__)
+
+    stateCrud.bump_versions(db, *stateCrud.all_domains)
+    db.commit()
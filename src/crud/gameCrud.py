@@ -0,0 +1,123 @@
+import json
+from enum import Enum
+from itertools import groupby
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from src import models
+from src.crud import shipDesignCrud, stateCrud
+from src.utils.db import insert_in_batches, reset_id_counters
+
+# Save files are gzipped JSON lines. The first line is a header recording the format version and
+# the columns of each table; every other line is one row, as [table name, [column values]].
+# Tables are written in foreign key order so that a save can be loaded in a single pass.
+# Version 2 added ShipDesign and Ship.design_id; ships in older saves get their designs on load.
+save_format = 'spaceGame save'
+save_format_version = 2
+supported_versions = [1, 2]
+
+saved_tables = [
+    models.Faction.__table__,
+    models.Planet.__table__,
+    models.PlanetConnection,
+    models.Facility.__table__,
+    models.ShipDesign.__table__,
+    models.Ship.__table__
+]
+
+
+def _encode(value):
+    if isinstance(value, Enum):
+        return value.name
+    raise TypeError(f"Cannot save values of type {type(value).__name__}")
+
+
+def save_game(db: Session, f, batch_size: int = 10_000):
+    """Writes every table of the game to an open text file (e.g. from gzip.open), one row per line"""
+    encoder = json.JSONEncoder(separators=(',', ':'), default=_encode)
+
+    header = {
+        'format': save_format,
+        'version': save_format_version,
+        'tables': {table.name: [column.name for column in table.columns] for table in saved_tables}
+    }
+    f.write(encoder.encode(header) + '\n')
+
+    for table in saved_tables:
+        order_columns = list(table.primary_key.columns) or list(table.columns)
+        rows = db.execute(select([table]).order_by(*order_columns))
+        for batch in iter(lambda: rows.fetchmany(batch_size), []):
+            f.writelines(f'["{table.name}",{encoder.encode(list(row))}]\n' for row in batch)
+
+
+def _read_header(line: str):
+    try:
+        header = json.loads(line)
+    except json.JSONDecodeError:
+        header = None
+
+    if not isinstance(header, dict) or header.get('format') != save_format:
+        raise ValueError("Not a save file")
+    if header.get('version') not in supported_versions:
+        raise ValueError(f"Unsupported save file version {header.get('version')} (expected {save_format_version})")
+
+    # Columns missing from older saves are filled in with their defaults
+    current_columns = {table.name: set(column.name for column in table.columns) for table in saved_tables}
+    tables = header.get('tables')
+    if not isinstance(tables, dict) or not all(
+        name in current_columns and set(columns) <= current_columns[name]
+        for name, columns in tables.items()
+    ):
+        raise ValueError("Save file tables do not match the current schema")
+
+    return tables
+
+
+def _read_rows(lines, saved_columns: dict):
+    """Yields (table name, {column name: value}) for each row, checked against the columns in the header"""
+    for line_number, line in enumerate(lines, start=2):
+        try:
+            table_name, values = json.loads(line)
+        except (ValueError, TypeError):
+            raise ValueError(f"Invalid row at line {line_number}")
+
+        if table_name not in saved_columns:
+            raise ValueError(f"Unknown table '{table_name}' in save file")
+
+        column_names = saved_columns[table_name]
+        if not isinstance(values, list) or len(values) != len(column_names):
+            raise ValueError(f"Save file is inconsistent: the {table_name} row at line {line_number} does not have {len(column_names)} values")
+
+        yield table_name, dict(zip(column_names, values))
+
+
+def load_game(db: Session, f, batch_size: int = 10_000):
+    """
+    Replaces the whole game with the contents of a save file, read from an open text file.
+    Rows are written with bulk inserts, and everything (including clearing the current game)
+    happens in a single transaction, so a bad save file leaves the database unchanged.
+    """
+    saved_columns = _read_header(f.readline())
+    tables = {table.name: table for table in saved_tables}
+
+    try:
+        db.query(models.ReportCache).delete(synchronize_session=False)
+        for table in reversed(saved_tables):
+            db.execute(table.delete())
+        # Loaded rows keep their ids, so the counters start over past them
+        reset_id_counters(db)
+
+        for table_name, rows in groupby(_read_rows(f, saved_columns), key=lambda row: row[0]):
+            insert_in_batches(db, tables[table_name], (row for _, row in rows), batch_size)
+
+        shipDesignCrud.assign_missing_designs(db)
+        stateCrud.bump_versions(db, *stateCrud.all_domains)
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        raise ValueError(f"Save file is inconsistent: {e.orig}") from e
+    except Exception:
+        db.rollback()
+        raise
@@ -1,10 +1,14 @@
+from collections import namedtuple
+
+from sqlalchemy import and_, bindparam, exists, or_
 from sqlalchemy.orm import Session
 
 from src import models, schemas
-from src.crud import shipCrud
+from src.crud import connectionCrud, shipCrud, stateCrud
 from src.utils.colonyUtils import ColonyType
+from src.utils.db import allocate_ids, rows_matching
+from src.utils import planetUtils
 from src.utils.facilityUtils import FacilityType, FacilityLevel
-from src.utils.planetUtils import SpecialPlanet
 
 
 def get_planets(db: Session):
@@ -20,18 +24,16 @@ def get_planets_by_faction(db: Session, faction_name: str):
     Returns an object containing planets owned by the given faction
     and planets observed by (but not owned by) the given faction
     """
-    owned_planets = db.query(models.Planet).filter_by(owner=faction_name).order_by(models.Planet.name.asc()).all()
-
-    all_planets = get_planets(db)
-    unowned_planets = [planet for planet in all_planets if planet not in owned_planets]
-    unowned_observed_planets = list(filter(
-        lambda planet: planet_visible_by_faction(db, planet.name, faction_name),
-        unowned_planets
-    ))
+    # Planets owned by the faction UNION planets where the faction has ships in orbit, in a single query
+    faction_ship_locations = db.query(models.Ship.location).filter_by(owner=faction_name)
+    visible_planets = db.query(models.Planet)\
+        .filter(or_(models.Planet.owner == faction_name, models.Planet.name.in_(faction_ship_locations)))\
+        .order_by(models.Planet.name.asc())\
+        .all()
 
     return {
-        'controlled': owned_planets,
-        'observed': list(unowned_observed_planets)
+        'controlled': [planet for planet in visible_planets if planet.owner == faction_name],
+        'observed': [planet for planet in visible_planets if planet.owner != faction_name]
     }
 
 
@@ -56,6 +58,7 @@ def claim_planet(db: Session, planet_name: str, faction_name: str):
     planet_query = db.query(models.Planet).filter_by(name=planet_name)
 
     planet_query.update({'owner': faction_name})
+    stateCrud.bump_versions(db, stateCrud.PLANETS)
     db.commit()
 
 
@@ -67,6 +70,7 @@ def reassign_planet(db: Session, planet_name, faction_name: str):
         raise ValueError(f"{planet_name} not owned. Please use 'claim' or 'colonize'.")
 
     planet_query.update({'owner': faction_name})
+    stateCrud.bump_versions(db, stateCrud.PLANETS)
     db.commit()
 
 
@@ -92,6 +96,7 @@ def colonize_planet(db: Session, planet_name, faction_name: str):
         shipCrud.destroy_ship(db, ship.id)
 
     planet_query.update({'owner': faction_name, 'colony_size': ColonyType.COLONY})
+    stateCrud.bump_versions(db, stateCrud.PLANETS)
     db.commit()
 
 
@@ -111,6 +116,7 @@ def upgrade_colony_type(db: Session, planet_name: str):
             raise ValueError("Only colonies, outposts, and strongholds can be upgraded.")
 
         planet_query.update({'colony_size': new_colony_size})
+        stateCrud.bump_versions(db, stateCrud.PLANETS)
         db.commit()
     else:
         raise ValueError(f"{planet_name} is unowned. Cannot be upgraded.")
@@ -124,107 +130,196 @@ def create_planet(db: Session, planet: schemas.PlanetCreate):
         special=planet.special
     )
     db.add(db_planet)
+    stateCrud.bump_versions(db, stateCrud.PLANETS)
     db.commit()
     db.refresh(db_planet)
     return db_planet
 
 
 def build_map(db: Session, planets):
-    for planet in planets:
-        create_planet(db, schemas.PlanetCreate.parse_obj(planet))
+    """
+    Imports a map (a list of planets-file entries) in a single transaction. All planets are
+    inserted with one executemany, then all connections with another; neighbour names are
+    resolved to ids in memory. Neighbours that are not part of the map must already exist.
+    """
+    new_planets = [schemas.PlanetCreate.parse_obj(planet) for planet in planets]
+    if len(new_planets) == 0:
+        return get_planets(db)
 
+    planet_ids = dict(zip((planet.name for planet in new_planets), allocate_ids(db, models.Planet.__table__, len(new_planets))))
+
+    neighbor_names = set(neighbor for planet in planets for neighbor in planet['connections'])
+    missing_names = neighbor_names - planet_ids.keys()
+    if len(missing_names) > 0:
+        existing_planets = db.query(models.Planet.name, models.Planet.id).filter(models.Planet.name.in_(missing_names))
+        planet_ids.update({name: planet_id for name, planet_id in existing_planets})
+
+        unknown_names = sorted(missing_names - planet_ids.keys())
+        if len(unknown_names) > 0:
+            raise ValueError(f"Planet '{unknown_names[0]}' does not exist")
+
+    # One row per connection, lower id first (see models.PlanetConnection)
+    connections = set()
     for planet in planets:
-        db_planet = get_planet_by_name(db, planet['name'])
         for neighbor in planet['connections']:
-            db_planet.make_connection(get_planet_by_name(db, neighbor))
-
-        db.commit()
-        db.refresh(db_planet)
+            planet_id, neighbor_id = planet_ids[planet['name']], planet_ids[neighbor]
+            if planet_id != neighbor_id:
+                connections.add((min(planet_id, neighbor_id), max(planet_id, neighbor_id)))
+
+    db.execute(models.Planet.__table__.insert(), [
+        {
+            'id': planet_ids[planet.name],
+            'name': planet.name,
+            'size': planet.size,
+            'resources': planet.resources,
+            'special': planet.special
+        }
+        for planet in new_planets
+    ])
+
+    if len(connections) > 0:
+        db.execute(models.PlanetConnection.insert(), [
+            {'planet_a_id': planet_a_id, 'planet_b_id': planet_b_id}
+            for planet_a_id, planet_b_id in sorted(connections)
+        ])
+
+    stateCrud.bump_versions(db, stateCrud.PLANETS, stateCrud.CONNECTIONS)
+    db.commit()
 
     return get_planets(db)
 
 
+# Numbers of rows changed by update_map
+MapUpdate = namedtuple('MapUpdate', ['inserted', 'updated', 'connections_added', 'connections_removed'])
+
+
+def update_map(db: Session, planets, batch_size: int = 500):
+    """
+    Applies a planets file to the existing map in a single transaction. Planets that are not on the
+    map yet are inserted, existing planets get their size, resources and special designation updated,
+    and the connections of every planet in the file are made to match its entry. Planets left out of
+    the file are kept, and ownership, colonies, ships and facilities are never touched.
+    Only the rows of the planets in the file (and their neighbours) are read, unless the file
+    covers a good part of the map, and only the differences are written. Returns a MapUpdate with the number of rows changed.
+    """
+    new_planets = {planet.name: planet for planet in (schemas.PlanetCreate.parse_obj(planet) for planet in planets)}
+    listed_connections = {planet['name']: set(planet['connections']) - {planet['name']} for planet in planets}
+    neighbor_names = set().union(*listed_connections.values()) - new_planets.keys()
+
+    planet_rows = db.query(models.Planet.id, models.Planet.name, models.Planet.size, models.Planet.resources, models.Planet.special)
+    existing_planets = {row.name: row for row in rows_matching(planet_rows, [models.Planet.name], new_planets.keys() | neighbor_names, batch_size)}
+
+    unknown_names = sorted(neighbor_names - existing_planets.keys())
+    if len(unknown_names) > 0:
+        raise ValueError(f"Planet '{unknown_names[0]}' does not exist")
+
+    planet_ids = {name: row.id for name, row in existing_planets.items()}
+    inserted_names = [name for name in new_planets.keys() if name not in existing_planets]
+
+    planet_ids.update(zip(inserted_names, allocate_ids(db, models.Planet.__table__, len(inserted_names))))
+
+    updated_planets = []
+    for name, planet in new_planets.items():
+        existing = existing_planets.get(name)
+        if existing is not None and (planet.size, planet.resources, planet.special) != (existing.size, existing.resources, existing.special):
+            updated_planets.append({'planet_id': existing.id, 'size': planet.size, 'resources': planet.resources, 'special': planet.special})
+
+    # Connections are compared as canonical (lower id, higher id) pairs, see models.PlanetConnection
+    connection = models.PlanetConnection
+    connection_rows = db.query(connection.c.planet_a_id, connection.c.planet_b_id)
+    listed_ids = set(planet_ids[name] for name in new_planets.keys() if name in existing_planets)
+    current_connections = set(rows_matching(connection_rows, [connection.c.planet_a_id, connection.c.planet_b_id], listed_ids, batch_size))
+
+    connections = set()
+    for name, neighbors in listed_connections.items():
+        for neighbor in neighbors:
+            planet_id, neighbor_id = planet_ids[name], planet_ids[neighbor]
+            connections.add((min(planet_id, neighbor_id), max(planet_id, neighbor_id)))
+
+    added_connections = sorted(connections - current_connections)
+    removed_connections = sorted(current_connections - connections)
+
+    if len(inserted_names) > 0:
+        db.execute(models.Planet.__table__.insert(), [
+            {
+                'id': planet_ids[name],
+                'name': name,
+                'size': new_planets[name].size,
+                'resources': new_planets[name].resources,
+                'special': new_planets[name].special
+            }
+            for name in inserted_names
+        ])
+
+    if len(updated_planets) > 0:
+        planet_table = models.Planet.__table__
+        db.execute(
+            planet_table.update()
+            .where(planet_table.c.id == bindparam('planet_id'))
+            .values(size=bindparam('size'), resources=bindparam('resources'), special=bindparam('special')),
+            updated_planets
+        )
+
+    if len(removed_connections) > 0:
+        db.execute(
+            connection.delete().where(and_(connection.c.planet_a_id == bindparam('a'), connection.c.planet_b_id == bindparam('b'))),
+            [{'a': planet_a_id, 'b': planet_b_id} for planet_a_id, planet_b_id in removed_connections]
+        )
+
+    if len(added_connections) > 0:
+        db.execute(connection.insert(), [
+            {'planet_a_id': planet_a_id, 'planet_b_id': planet_b_id}
+            for planet_a_id, planet_b_id in added_connections
+        ])
+
+    changed_domains = []
+    if len(inserted_names) > 0 or len(updated_planets) > 0:
+        changed_domains.append(stateCrud.PLANETS)
+    # Every planet is a node of the adjacency graph (see connectionCrud), so new planets change the graph even without connections
+    if len(inserted_names) > 0 or len(added_connections) > 0 or len(removed_connections) > 0:
+        changed_domains.append(stateCrud.CONNECTIONS)
+
+    stateCrud.bump_versions(db, *changed_domains)
+    db.commit()
+
+    return MapUpdate(len(inserted_names), len(updated_planets), len(added_connections), len(removed_connections))
+
+
 def planet_visible_by_faction(db: Session, planet_name: str, faction_name: str):
     # Visible if the planet is owned by the faction or if the faction has ships on it
-    planet = get_planet_by_name(db, planet_name)
-    faction_owns_planet = planet.owner == faction_name
+    faction_has_ship = exists().where(and_(models.Ship.location == planet_name, models.Ship.owner == faction_name))
+    planet = db.query(models.Planet.owner, faction_has_ship).filter_by(name=planet_name).first()
 
-    all_ships_on_planet = shipCrud.get_ships_on_planet(db, planet_name)
-    faction_has_ship = faction_name in list(map(lambda ship: ship.owner, all_ships_on_planet))
+    if planet is None:
+        raise ValueError(f"Planet '{planet_name}' does not exist")
 
-    return faction_owns_planet | faction_has_ship
+    owner, has_ship = planet
+    return (owner == faction_name) | bool(has_ship)
 
 
 def get_connection_names(db: Session, planet_name: str):
-    connections = get_planet_by_name(db, planet_name).connections
+    graph = connectionCrud.get_adjacency_graph(db)
+    if planet_name not in graph:
+        query_planet_by_name(db, planet_name)
 
-    return list(map(lambda planet: planet.name, connections))
+    return graph.neighbors(planet_name)
 
 
 # ---------- FACILITIES ----------
 
 def get_lp_production(db: Session, planet_name: str):
-    production = 0
-
     planet = get_planet_by_name(db, planet_name)
-    facilities = planet.facilities
-
-    headquarters = filter(lambda f: f.facility_type == FacilityType.FLEET_HQ, facilities)
-
-    for hq in headquarters:
-        if hq.level == FacilityLevel.BASIC:
-            production += 2
-        elif hq.level == FacilityLevel.INTERMEDIATE:
-            production += 4
-        elif hq.level == FacilityLevel.ADVANCED:
-            production += 8
-
-        if planet.special == SpecialPlanet.LOGISTICS:
-            production += 1
-
-    return production
+    return planetUtils.calculate_production(planet, planet.facilities, "lp")
 
 
 def get_rp_production(db: Session, planet_name: str):
-    production = 0
-
     planet = get_planet_by_name(db, planet_name)
-    facilities = planet.facilities
-
-    labs = filter(lambda f: f.facility_type == FacilityType.LABORATORY, facilities)
-
-    for lab in labs:
-        if lab.level == FacilityLevel.BASIC:
-            production += 1
-        elif lab.level == FacilityLevel.INTERMEDIATE:
-            production += 2
-        elif lab.level == FacilityLevel.ADVANCED:
-            production += 4
-
-        if planet.special == SpecialPlanet.ARTIFACT:
-            production += 1
-
-    return production
+    return planetUtils.calculate_production(planet, planet.facilities, "rp")
 
 
 def get_mp_production(db: Session, planet_name: str):
-    production = 0
-
     planet = get_planet_by_name(db, planet_name)
-    planet_resources = planet.resources
-    facilities = planet.facilities
-
-    factories = filter(lambda f: f.facility_type == FacilityType.FACTORY, facilities)
-
-    for factory in factories:
-        if factory.level == FacilityLevel.BASIC:
-            production += planet_resources
-        elif factory.level == FacilityLevel.INTERMEDIATE:
-            production += 2 * planet_resources
-        elif factory.level == FacilityLevel.ADVANCED:
-            production += 3 * planet_resources
-
-    return production
+    return planetUtils.calculate_production(planet, planet.facilities, "mp")
 
 
 def get_resource_production(db: Session, planet_name: str, resource_type: str):
@@ -258,6 +353,7 @@ def get_max_garrison_points(db: Session, planet_name: str):
 
 def set_garrison_points(db: Session, planet_name: str, new_total: int):
     query_planet_by_name(db, planet_name).update({'garrison_points': new_total})
+    stateCrud.bump_versions(db, stateCrud.PLANETS)
     db.commit()
 
 
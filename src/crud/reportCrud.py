@@ -0,0 +1,74 @@
+from sqlalchemy.orm import Session
+
+from src import models
+
+# Sections are stored as consecutive chunks (one row per chunk, ordered by 'chunk'),
+# so they can be written and read back without holding a whole section in memory.
+# Every section has at least a chunk 0, which carries the versions it was rendered at.
+
+
+def get_cached_versions(db: Session, faction_names: list):
+    """Returns {(faction_name, section): versions} for every cached section of the given factions"""
+    cached_sections = db.query(models.ReportCache.faction_name, models.ReportCache.section, models.ReportCache.versions) \
+        .filter(models.ReportCache.faction_name.in_(faction_names)) \
+        .filter(models.ReportCache.chunk == 0)
+
+    return {
+        (faction_name, section): versions
+        for faction_name, section, versions in cached_sections
+    }
+
+
+def iter_cached_section(db: Session, faction_name: str, section: str, batch_size: int = 500):
+    """Yields the chunks of a cached section in order"""
+    chunks = db.query(models.ReportCache.text) \
+        .filter_by(faction_name=faction_name, section=section) \
+        .order_by(models.ReportCache.chunk) \
+        .yield_per(batch_size)
+
+    for (text,) in chunks:
+        yield text
+
+
+def stream_section_into_cache(db: Session, faction_name: str, section: str, versions: str, chunks, batch_size: int = 500):
+    """
+    Yields each of the given chunks while storing them as the new cached copy of a section.
+    The versions are only recorded once the generator is exhausted, so a section that was
+    not streamed to the end is never served from the cache.
+    Does not commit and does not bump any state version.
+    """
+    db.query(models.ReportCache) \
+        .filter_by(faction_name=faction_name, section=section) \
+        .delete(synchronize_session=False)
+
+    rows = []
+    count = 0
+    for text in chunks:
+        rows.append({'faction_name': faction_name, 'section': section, 'chunk': count, 'versions': None, 'text': text})
+        count += 1
+        if len(rows) >= batch_size:
+            db.execute(models.ReportCache.__table__.insert(), rows)
+            rows = []
+        yield text
+
+    if count == 0:
+        # An empty section still needs a chunk 0 to record its versions
+        rows.append({'faction_name': faction_name, 'section': section, 'chunk': 0, 'versions': None, 'text': ''})
+
+    if len(rows) > 0:
+        db.execute(models.ReportCache.__table__.insert(), rows)
+
+    db.query(models.ReportCache) \
+        .filter_by(faction_name=faction_name, section=section, chunk=0) \
+        .update({models.ReportCache.versions: versions}, synchronize_session=False)
+
+
+def cache_section(db: Session, faction_name: str, section: str, versions: str, chunks):
+    """Stores a rendered report section. Does not commit and does not bump any state version."""
+    for _ in stream_section_into_cache(db, faction_name, section, versions, chunks):
+        pass
+
+
+def clear_report_cache(db: Session):
+    db.query(models.ReportCache).delete()
+    db.commit()
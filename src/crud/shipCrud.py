@@ -1,8 +1,12 @@
+from sqlalchemy import and_, exists, func
 from sqlalchemy.orm import Session
 
 from src import models
 from src import schemas
+from src.crud import connectionCrud, shipDesignCrud, stateCrud
 from src.utils import shipUtils
+from src.utils.db import allocate_ids, existing_values, insert_in_batches
+from src.utils.facilityUtils import FacilityType
 
 
 def get_ships(db: Session):
@@ -17,10 +21,14 @@ def query_ships_filtered(db: Session, filters: dict):
     return db.query(models.Ship).filter_by(**filters)
 
 
-def get_visible_ships_on_planet(db: Session, planet_name: str, faction_name: str):
-    """Gets all ships in orbit of a planet which are visible to a faction"""
+def get_visible_ships_on_planet(db: Session, planet_name: str, faction_name: str, detection_matrix: dict = None):
+    """Gets all ships in orbit of a planet which are visible to a faction.
+    Pass a detection matrix (shipUtils.get_detection_matrix) when checking many planets."""
 
-    effective_detection_level = shipUtils.determine_effective_detection_level(db, planet_name, faction_name)
+    if detection_matrix is None:
+        effective_detection_level = shipUtils.determine_effective_detection_level(db, planet_name, faction_name)
+    else:
+        effective_detection_level = shipUtils.get_detection_level(detection_matrix, planet_name, faction_name)
     visible_ships = []
 
     ships_on_planet = get_ships_on_planet(db, planet_name)
@@ -37,17 +45,83 @@ def get_ships_on_planet(db: Session, planet_name: str):
 
 
 def move_ships(db: Session, ship_ids: list, destination_name: str):
-    ships = [query_ships_filtered(db, {'id': ship_id}) for ship_id in ship_ids]
-    ship_origins = [ship.first().location for ship in ships]
+    """
+    Moves ships sharing an origin to a planet connected to it, with a constant number of statements:
+    one grouped SELECT for the origin, one check of the connection, and one UPDATE for all the ships.
+    """
+    ship_ids = list(dict.fromkeys(ship_ids))
+    if len(ship_ids) == 0:
+        raise ValueError("No ships to move.")
+
+    ship_counts = db.query(models.Ship.location, func.count(models.Ship.id))\
+        .filter(models.Ship.id.in_(ship_ids))\
+        .group_by(models.Ship.location)\
+        .all()
+
+    if sum(count for _, count in ship_counts) != len(ship_ids):
+        found_ids = set(ship_id for (ship_id,) in db.query(models.Ship.id).filter(models.Ship.id.in_(ship_ids)))
+        missing_id = next(ship_id for ship_id in ship_ids if ship_id not in found_ids)
+        raise ValueError(f"Ship '{missing_id}' does not exist")
+
+    if len(ship_counts) != 1:
+        raise ValueError("Ships must have the same origin location.")
+    origin_name = ship_counts[0][0]
+
+    if not connectionCrud.are_connected(db, origin_name, destination_name):
+        raise ValueError(f"{origin_name} is not connected to {destination_name}")
+
+    db.query(models.Ship)\
+        .filter(models.Ship.id.in_(ship_ids))\
+        .update({'location': destination_name}, synchronize_session=False)
+
+    stateCrud.bump_versions(db, stateCrud.SHIPS)
+    db.commit()
 
-    if len(set(ship_origins)) != 1:
+
+def move_fleet_along_route(db: Session, ship_ids: list, destination_name: str, max_hops: int = None, route: list = None):
+    """
+    Moves ships sharing an origin to a destination any number of jumps away, with a single UPDATE.
+    Follows the given route (a list of planet names from the origin to the destination), which is
+    checked against the map, or a shortest route otherwise. Returns the route taken.
+    """
+    ship_ids = list(dict.fromkeys(ship_ids))
+    if len(ship_ids) == 0:
+        raise ValueError("No ships to move.")
+
+    ship_locations = dict(db.query(models.Ship.id, models.Ship.location).filter(models.Ship.id.in_(ship_ids)))
+    for ship_id in ship_ids:
+        if ship_id not in ship_locations:
+            raise ValueError(f"Ship '{ship_id}' does not exist")
+
+    origins = set(ship_locations.values())
+    if len(origins) != 1:
         raise ValueError("Ships must have the same origin location.")
+    origin_name = origins.pop()
+
+    graph = connectionCrud.get_adjacency_graph(db)
+    if route is None:
+        route = connectionCrud.get_route(db, origin_name, destination_name)
+    else:
+        if len(route) == 0 or route[0] != origin_name or route[-1] != destination_name:
+            raise ValueError(f"Route must start at {origin_name} and end at {destination_name}")
 
-    for ship in ships:
-        ship.update({'location': destination_name})
+        for planet_name, next_planet_name in zip(route, route[1:]):
+            if not graph.has_edge(planet_name, next_planet_name):
+                raise ValueError(f"{planet_name} is not connected to {next_planet_name}")
 
+    hops = len(route) - 1
+    if max_hops is not None and hops > max_hops:
+        raise ValueError(f"Route from {origin_name} to {destination_name} takes {hops} jumps, more than the maximum of {max_hops}")
+
+    db.query(models.Ship)\
+        .filter(models.Ship.id.in_(ship_ids))\
+        .update({'location': destination_name}, synchronize_session=False)
+
+    stateCrud.bump_versions(db, stateCrud.SHIPS)
     db.commit()
 
+    return route
+
 
 def move_ship(db: Session, ship_id: str, destination_name: str):
     move_ships(db, [ship_id], destination_name)
@@ -63,9 +137,11 @@ def create_ship(db: Session, ship: schemas.ShipCreate):
     db_ship = models.Ship(
         owner=ship.owner,
         modules=ship.modules,
+        design=shipDesignCrud.get_or_create_design(db, ship.modules),
         location=ship.location
     )
     db.add(db_ship)
+    stateCrud.bump_versions(db, stateCrud.SHIPS)
     db.commit()
     db.refresh(db_ship)
     return db_ship
@@ -75,9 +151,11 @@ def create_colony_ship(db: Session, ship: schemas.ShipCreate):
     db_ship = models.Ship(
         owner=ship.owner,
         modules="COLONY",
+        design=shipDesignCrud.get_or_create_design(db, "COLONY"),
         location=ship.location
     )
     db.add(db_ship)
+    stateCrud.bump_versions(db, stateCrud.SHIPS)
     db.commit()
     return db_ship
 
@@ -86,7 +164,41 @@ def create_ship_from_dict(db: Session, ship):
     create_ship(db, schemas.ShipCreate.parse_obj(ship))
 
 
+def import_ships(db: Session, ships: list, batch_size: int = 10_000):
+    """
+    Creates ships in bulk from dicts with 'owner', 'location' and valid 'modules' (see
+    shipUtils.read_ships_file), with one executemany per batch and a single commit. Owners and
+    locations are checked up front with one set-based lookup each, and a ValueError naming every
+    one that doesn't exist is raised before anything is written. Returns the number of ships created.
+    """
+    if len(ships) == 0:
+        return 0
+
+    errors = []
+    for label, column, names in [
+        ('Faction', models.Faction.faction_name, set(ship['owner'] for ship in ships)),
+        ('Planet', models.Planet.name, set(ship['location'] for ship in ships))
+    ]:
+        missing = sorted(names - existing_values(db, column, names))
+        errors.extend(f"{label} '{name}' does not exist" for name in missing)
+    if len(errors) > 0:
+        raise ValueError('\n'.join(errors))
+
+    ship_ids = allocate_ids(db, models.Ship.__table__, len(ships))
+    try:
+        rows = (dict(ship, id=ship_id) for ship, ship_id in zip(ships, ship_ids))
+        insert_in_batches(db, models.Ship.__table__, shipDesignCrud.with_designs(db, rows, batch_size), batch_size)
+        stateCrud.bump_versions(db, stateCrud.SHIPS)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return len(ships)
+
+
 def retrofit_ship(db: Session, ship_id: str, new_modules: str):
+    """Replaces a ship's modules, keeping its size. Stealth and detection levels come from the new design."""
     ship_query = query_ships_filtered(db, {'id': ship_id})
 
     ship_current = ship_query.first()
@@ -101,7 +213,15 @@ def retrofit_ship(db: Session, ship_id: str, new_modules: str):
     if not shipUtils.validate_module_str(new_modules):
         raise ValueError(f"New modules '{new_modules}' includes invalid modules")
 
-    ship_query.update({'modules': new_modules})
+    design = shipDesignCrud.get_or_create_design(db, new_modules)
+    ship_query.update({
+        'modules': new_modules,
+        'design_id': design.id,
+        'max_hp': design.max_hp,
+        'stealth_level': design.stealth_level,
+        'detection_level': design.detection_level
+    })
+    stateCrud.bump_versions(db, stateCrud.SHIPS)
     db.commit()
 
 
@@ -112,17 +232,35 @@ def restore_ship_hp_without_commit(db: Session, ship_id: str):
 
 def restore_ship_hp(db: Session, ship_id: str):
     restore_ship_hp_without_commit(db, ship_id)
+    stateCrud.bump_versions(db, stateCrud.SHIPS)
     db.commit()
 
 
-def restore_all(db: Session):
-    ships = db.query(models.Ship).all()
-
-    for ship in ships:
-        restore_ship_hp_without_commit(db, ship.id)
-
+def restore_all(db: Session, faction_name: str = None, planet_name: str = None, at_friendly_shipyard: bool = False):
+    """
+    Restores ships to full hit points with a single UPDATE. The filters are combined: only ships
+    owned by 'faction_name', only ships on 'planet_name', and only ships on one of their owner's
+    planets that has a shipyard. Returns the number of ships restored.
+    """
+    ships = db.query(models.Ship)
+    if faction_name is not None:
+        ships = ships.filter(models.Ship.owner == faction_name)
+    if planet_name is not None:
+        ships = ships.filter(models.Ship.location == planet_name)
+    if at_friendly_shipyard:
+        # Facility.planet isn't indexed, so shipyards are looked up once (uncorrelated) rather than per ship
+        shipyard_planets = db.query(models.Facility.planet).filter(models.Facility.facility_type == FacilityType.SHIPYARD)
+        ships = ships\
+            .filter(models.Ship.location.in_(shipyard_planets.subquery()))\
+            .filter(exists().where(and_(models.Planet.name == models.Ship.location, models.Planet.owner == models.Ship.owner)))
+
+    restored = ships.update({'hit_points': models.Ship.max_hp}, synchronize_session=False)
+
+    stateCrud.bump_versions(db, stateCrud.SHIPS)
     db.commit()
 
+    return restored
+
 
 def damage_ship(db: Session, ship_id: str, damage: int = 1):
     ship_to_damage = get_ship_by_id(db, ship_id)
@@ -132,6 +270,7 @@ def damage_ship(db: Session, ship_id: str, damage: int = 1):
         destroy_ship(db, ship_id)
     else:
         db.query(models.Ship).filter_by(id=ship_id).update({'hit_points': damaged_hp})
+        stateCrud.bump_versions(db, stateCrud.SHIPS)
         db.commit()
 
 
@@ -139,5 +278,6 @@ def destroy_ship(db: Session, ship_id: str):
     ship_to_delete = get_ship_by_id(db, ship_id)
 
     db.query(models.Ship).filter_by(id=ship_id).delete()
+    stateCrud.bump_versions(db, stateCrud.SHIPS)
     db.commit()
     return ship_to_delete
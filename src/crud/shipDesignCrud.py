@@ -0,0 +1,87 @@
+from sqlalchemy import and_, bindparam, select
+from sqlalchemy.orm import Session
+
+from src import models
+from src.utils.db import allocate_ids, chunks, rows_matching
+from src.utils.designUtils import design_stats
+
+
+def intern_designs(db: Session, modules_strings, batch_size: int = 500):
+    """
+    {modules string: design id} for the given modules strings. Designs that don't exist yet are
+    inserted with one executemany, with their stats precomputed. Does not commit.
+    """
+    design = models.ShipDesign.__table__
+    modules_strings = set(modules_strings)
+
+    design_ids = dict(rows_matching(db.query(design.c.modules, design.c.id), [design.c.modules], modules_strings, batch_size))
+
+    new_modules = sorted(modules_strings - design_ids.keys())
+    new_designs = [
+        dict(design_stats(modules)._asdict(), id=design_id, modules=modules)
+        for modules, design_id in zip(new_modules, allocate_ids(db, design, len(new_modules)))
+    ]
+    if len(new_designs) > 0:
+        db.execute(design.insert(), new_designs)
+        design_ids.update((new_design['modules'], new_design['id']) for new_design in new_designs)
+
+    return design_ids
+
+
+def get_or_create_design(db: Session, modules: str):
+    design_id = intern_designs(db, [modules])[modules]
+    return db.query(models.ShipDesign).get(design_id)
+
+
+def with_designs(db: Session, ships, batch_size: int = 10_000):
+    """
+    Yields ship rows (dicts with 'modules') with their 'design_id' and stats set (hit points
+    default to max_hp), interning the designs of each batch of ships
+    """
+    for batch in chunks(ships, batch_size):
+        design_ids = intern_designs(db, (ship['modules'] for ship in batch))
+        for ship in batch:
+            stats = design_stats(ship['modules'])
+            yield {
+                'max_hp': stats.max_hp,
+                'hit_points': stats.max_hp,
+                'stealth_level': stats.stealth_level,
+                'detection_level': stats.detection_level,
+                **ship,
+                'design_id': design_ids[ship['modules']]
+            }
+
+
+def assign_missing_designs(db: Session):
+    """
+    Gives every ship without a design the design of its modules string, and refreshes its max_hp,
+    stealth and detection levels from it. Returns the number of ships updated. Does not commit.
+    """
+    ship = models.Ship.__table__
+    modules_strings = [modules for (modules,) in db.execute(select([ship.c.modules]).where(and_(ship.c.design_id.is_(None), ship.c.modules.isnot(None))).distinct())]
+    if len(modules_strings) == 0:
+        return 0
+
+    design_ids = intern_designs(db, modules_strings)
+    result = db.execute(
+        ship.update()
+        .where(and_(ship.c.design_id.is_(None), ship.c.modules == bindparam('design_modules')))
+        .values(
+            design_id=bindparam('new_design_id'),
+            max_hp=bindparam('new_max_hp'),
+            stealth_level=bindparam('new_stealth_level'),
+            detection_level=bindparam('new_detection_level')
+        ),
+        [
+            {
+                'design_modules': modules,
+                'new_design_id': design_ids[modules],
+                'new_max_hp': design_stats(modules).max_hp,
+                'new_stealth_level': design_stats(modules).stealth_level,
+                'new_detection_level': design_stats(modules).detection_level
+            }
+            for modules in modules_strings
+        ]
+    )
+
+    return result.rowcount
@@ -0,0 +1,72 @@
+from sqlalchemy.orm import Session
+
+from src import models
+from src.crud import connectionCrud, factionCrud
+from src.utils.snapshotUtils import GameSnapshot, PlanetRecord, ShipRecord, FacilityRecord, FactionRecord, build_detection_matrix
+
+
+def load_snapshot(db: Session):
+    """Reads factions, planets, ships and facilities with one query each, connections from
+    the cached adjacency graph, plus one grouped query for every faction's income"""
+    factions = {
+        row.faction_name: FactionRecord(*row)
+        for row in db.query(
+            models.Faction.faction_name,
+            models.Faction.mp,
+            models.Faction.rp,
+            models.Faction.lp,
+            models.Faction.research
+        )
+    }
+
+    planets = {}
+    for row in db.query(
+        models.Planet.id,
+        models.Planet.name,
+        models.Planet.size,
+        models.Planet.special,
+        models.Planet.colony_size,
+        models.Planet.resources,
+        models.Planet.owner,
+        models.Planet.garrison_points
+    ):
+        planets[row.name] = PlanetRecord(*row)
+
+    graph = connectionCrud.get_adjacency_graph(db)
+    connections = {name: tuple(graph.neighbors(name)) for name in graph.names if graph.degree(name) > 0}
+
+    ships = {}
+    for row in db.query(
+        models.Ship.id,
+        models.Ship.owner,
+        models.Ship.modules,
+        models.Ship.location,
+        models.Ship.max_hp,
+        models.Ship.hit_points,
+        models.Ship.stealth_level,
+        models.Ship.detection_level
+    ):
+        ships.setdefault(row.location, []).append(ShipRecord(*row))
+
+    facilities = {}
+    for row in db.query(
+        models.Facility.id,
+        models.Facility.facility_type,
+        models.Facility.level,
+        models.Facility.planet,
+        models.Facility.shields
+    ):
+        facilities.setdefault(row.planet, []).append(FacilityRecord(*row))
+
+    ships = {name: tuple(ship_list) for name, ship_list in ships.items()}
+    facilities = {name: tuple(facility_list) for name, facility_list in facilities.items()}
+
+    return GameSnapshot(
+        factions=factions,
+        planets=planets,
+        connections=connections,
+        ships=ships,
+        facilities=facilities,
+        detection=build_detection_matrix(planets, connections, ships, facilities),
+        incomes=factionCrud.get_resource_incomes(db, list(factions.keys()))
+    )
@@ -0,0 +1,44 @@
+from sqlalchemy.orm import Session
+
+from src import models
+
+# Each domain has its own version counter, bumped by every crud write path that
+# changes it. Anything derived from the game state (e.g. cached reports) can
+# record the versions it was built from and be reused while they are unchanged.
+FACTIONS = 'faction'
+PLANETS = 'planet'
+SHIPS = 'ship'
+FACILITIES = 'facility'
+CONNECTIONS = 'connection'
+
+all_domains = [FACTIONS, PLANETS, SHIPS, FACILITIES, CONNECTIONS]
+
+
+def bump_versions(db: Session, *domains: str):
+    """Increments the version of each domain. Does not commit, so the bump is part of the caller's transaction."""
+    for domain in domains:
+        updated = db.query(models.StateVersion)\
+            .filter_by(domain=domain)\
+            .update({'version': models.StateVersion.version + 1}, synchronize_session=False)
+
+        if updated == 0:
+            db.add(models.StateVersion(domain=domain, version=1))
+            db.flush()
+
+
+def get_versions(db: Session):
+    versions = {domain: 0 for domain in all_domains}
+    for state_version in db.query(models.StateVersion.domain, models.StateVersion.version):
+        versions[state_version.domain] = state_version.version
+
+    return versions
+
+
+def get_version(db: Session, domain: str):
+    version = db.query(models.StateVersion.version).filter_by(domain=domain).scalar()
+    return 0 if version is None else version
+
+
+def versions_key(versions: dict, domains):
+    """Compact string identifying the versions of the given domains, e.g. 'faction:3,planet:12'"""
+    return ','.join(f"{domain}:{versions.get(domain, 0)}" for domain in domains)
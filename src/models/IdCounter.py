@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String
+
+from .Base import Base
+
+
+class IdCounter(Base):
+    """The next id to hand out for a table (see db.allocate_ids), as a number written in base 36"""
+    __tablename__ = 'IdCounter'
+
+    table_name = Column(String, primary_key=True)
+    next_id = Column(Integer)
+
+    def __repr__(self):
+        return f'IdCounter<{self.table_name}: {self.next_id}>'
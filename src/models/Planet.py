@@ -1,17 +1,20 @@
-from sqlalchemy import Table, Column, Integer, String, ForeignKey, UniqueConstraint, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Table, Column, Integer, String, ForeignKey, UniqueConstraint, CheckConstraint, Enum
+from sqlalchemy.orm import object_session, relationship
 
 from src.utils.colonyUtils import ColonyType
-from src.utils.db import generate_id
+from src.utils.db import allocate_ids, generate_id
 from src.utils.planetUtils import SpecialPlanet
 from .Base import Base
 from .Faction import Faction
 
+# One row per connection, stored with planet_a_id < planet_b_id. Connections are undirected,
+# so lookups have to check both columns (see connectionCrud.neighbor_pairs).
 connection = Table(
     'PlanetConnection', Base.metadata,
     Column('planet_a_id', String, ForeignKey('Planet.id'), index=True),
-    Column('planet_b_id', String, ForeignKey('Planet.id')),
-    UniqueConstraint('planet_a_id', 'planet_b_id', name='unique_connections')
+    Column('planet_b_id', String, ForeignKey('Planet.id'), index=True),
+    UniqueConstraint('planet_a_id', 'planet_b_id', name='unique_connections'),
+    CheckConstraint('planet_a_id < planet_b_id', name='canonical_connections')
 )
 
 
@@ -28,20 +31,34 @@ class Planet(Base):
     owner = Column(String, ForeignKey(Faction.faction_name), nullable=True)
     garrison_points = Column(Integer, default=0)
 
-    connections = relationship('Planet',
-                               secondary=connection,
-                               primaryjoin=id == connection.c.planet_a_id,
-                               secondaryjoin=id == connection.c.planet_b_id
-                               )
+    # Connections to planets with a greater id; the other half is the 'lower_connections' backref
+    higher_connections = relationship('Planet',
+                                      secondary=connection,
+                                      primaryjoin=id == connection.c.planet_a_id,
+                                      secondaryjoin=id == connection.c.planet_b_id,
+                                      backref='lower_connections'
+                                      )
     ships = relationship('Ship', back_populates="location_relationship")
     facilities = relationship('Facility', back_populates="planet_relationship")
 
     owner_relationship = relationship(Faction, back_populates='planets')
 
+    @property
+    def connections(self):
+        return self.lower_connections + self.higher_connections
+
     def make_connection(self, other):
-        if other not in self.connections:
-            self.connections.append(other)
-            other.connections.append(self)
+        # Ids are normally assigned on flush, but the row's direction depends on them
+        for planet in (self, other):
+            if planet.id is None:
+                session = object_session(planet)
+                if session is None:
+                    raise ValueError("Planets must be added to a session before they can be connected")
+                planet.id = allocate_ids(session, Planet.__table__, 1)[0]
+
+        if other is not self and other not in self.connections:
+            lower, higher = sorted((self, other), key=lambda planet: planet.id)
+            lower.higher_connections.append(higher)
 
     def __repr__(self):
         return '<Planet(name="%s", connections="%s")>' % (self.name, list(map(lambda c: c.name, self.connections)))
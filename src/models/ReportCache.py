@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String
+
+from .Base import Base
+
+
+class ReportCache(Base):
+    __tablename__ = 'ReportCache'
+
+    faction_name = Column(String, primary_key=True)
+    section = Column(String, primary_key=True)
+    chunk = Column(Integer, primary_key=True, autoincrement=False)
+    versions = Column(String)
+    text = Column(String)
+
+    def __repr__(self):
+        return f'ReportCache<{self.faction_name} {self.section}[{self.chunk}] @ {self.versions}>'
@@ -2,29 +2,19 @@ from sqlalchemy import Column, ForeignKey, Integer, String
 from sqlalchemy.orm import relationship
 
 from src.utils.db import generate_id
+from src.utils.designUtils import design_stats
 from .Base import Base
 from .Faction import Faction
 from .Planet import Planet
+from .ShipDesign import ShipDesign
 
 
-def get_size(context):
-    if context.get_current_parameters()['modules'] == "COLONY":
-        return 1
-    else:
-        return len(context.get_current_parameters()['modules']) / 2
+def design_stat(stat: str):
+    """Column default copying one of the design stats of the ship's modules string (see designUtils.design_stats)"""
+    def default(context):
+        return getattr(design_stats(context.get_current_parameters()['modules']), stat)
 
-
-def count_module(context, module):
-    modules = context.get_current_parameters()['modules']
-    return modules.count(module)
-
-
-def get_stealth_level(context):
-    return count_module(context, 'C')  # C represents an ecm suite
-
-
-def get_detection_level(context):
-    return count_module(context, 'S')  # S represents a sensor array
+    return default
 
 
 class Ship(Base):
@@ -32,14 +22,17 @@ class Ship(Base):
 
     id = Column(String, primary_key=True, index=True, default=generate_id)
     modules = Column(String)
+    design_id = Column(String, ForeignKey(ShipDesign.id), index=True)
     owner = Column(String, ForeignKey(Faction.faction_name))
     location = Column(String, ForeignKey(Planet.name))
 
-    max_hp = Column(Integer, default=get_size)
-    hit_points = Column(Integer, default=get_size)
-    stealth_level = Column(Integer, default=get_stealth_level)
-    detection_level = Column(Integer, default=get_detection_level)
+    # Copies of the design's stats (hit_points aside), so that queries can filter and aggregate on them directly
+    max_hp = Column(Integer, default=design_stat('max_hp'))
+    hit_points = Column(Integer, default=design_stat('max_hp'))
+    stealth_level = Column(Integer, default=design_stat('stealth_level'))
+    detection_level = Column(Integer, default=design_stat('detection_level'))
 
+    design = relationship(ShipDesign)
     owner_relationship = relationship(Faction, back_populates='ships')
     location_relationship = relationship(Planet, back_populates='ships')
 
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String
+
+from src.utils.db import generate_id
+from .Base import Base
+
+
+class ShipDesign(Base):
+    """
+    A distinct modules string, stored once however many ships share it, with everything derived
+    from it (see designUtils.design_stats)
+    """
+    __tablename__ = 'ShipDesign'
+
+    id = Column(String, primary_key=True, index=True, default=generate_id)
+    modules = Column(String, unique=True, index=True)
+
+    armor_plating = Column(Integer, default=0)
+    command_bridge = Column(Integer, default=0)
+    ecm_suite = Column(Integer, default=0)
+    warp_drive = Column(Integer, default=0)
+    hangar_bay = Column(Integer, default=0)
+    marine_barracks = Column(Integer, default=0)
+    point_defense_battery = Column(Integer, default=0)
+    sensor_array = Column(Integer, default=0)
+    heavy_weapons_bay = Column(Integer, default=0)
+
+    size = Column(Integer)
+    max_hp = Column(Integer)
+    stealth_level = Column(Integer)
+    detection_level = Column(Integer)
+
+    def __repr__(self):
+        return f'ShipDesign<id: {self.id}, modules: {self.modules}>'
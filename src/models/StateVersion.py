@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String
+
+from .Base import Base
+
+
+class StateVersion(Base):
+    __tablename__ = 'StateVersion'
+
+    domain = Column(String, primary_key=True)
+    version = Column(Integer, default=0)
+
+    def __repr__(self):
+        return f'StateVersion<{self.domain}: {self.version}>'
@@ -1,7 +1,12 @@
-from . import Base, Planet, Faction, Ship, Facility
+from . import Base, Planet, Faction, ShipDesign, Ship, Facility, StateVersion, ReportCache, IdCounter
 
 Base = Base.Base
+PlanetConnection = Planet.connection
 Planet = Planet.Planet
 Faction = Faction.Faction
+ShipDesign = ShipDesign.ShipDesign
 Ship = Ship.Ship
 Facility = Facility.Facility
+StateVersion = StateVersion.StateVersion
+ReportCache = ReportCache.ReportCache
+IdCounter = IdCounter.IdCounter
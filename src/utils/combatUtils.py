@@ -0,0 +1,158 @@
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src.utils.designUtils import design_stats
+
+# A round of combat: every combatant fires once per heavy weapons bay and launches one fighter per
+# hangar bay, all at the same time. Each shot picks a random hostile combatant in the same group
+# (e.g. on the same planet) and hits it for 1 damage with these chances:
+weapon_hit_chance = 0.5
+fighter_hit_chance = 0.5
+# Each point defense battery on the target shoots down this share of the fighters attacking it
+point_defense_intercept = 0.5
+# Each armor plating on the target deflects this share of the hits it takes
+armor_deflection = 0.25
+
+# Battles that still have more than one side standing after this many rounds are draws
+max_rounds = 20
+
+# Parallel arrays, one entry per combatant. 'group' is the battle it is part of (e.g. a planet) and
+# 'side' its faction; only combatants of different sides in the same group fire at each other.
+Combatants = namedtuple('Combatants', ['group', 'side', 'hit_points', 'weapons', 'fighters', 'point_defense', 'armor'])
+
+
+def module_counts(modules_strings):
+    """(heavy weapons bays, hangar bays, point defense batteries, armor platings) arrays for a list of modules strings"""
+    unique_modules, design_index = np.unique(np.array(modules_strings, dtype=str), return_inverse=True)
+    stats = [design_stats(modules) for modules in unique_modules]
+    counts = np.array(
+        [(s.heavy_weapons_bay, s.hangar_bay, s.point_defense_battery, s.armor_plating) for s in stats],
+        dtype=np.int64
+    ).reshape(-1, 4)
+
+    return tuple(counts[design_index.reshape(-1), column] for column in range(4))
+
+
+def sort_combatants(combatants: Combatants):
+    """Combatants ordered by group, then side, as fire_round expects. Also returns the order used."""
+    order = np.lexsort((combatants.side, combatants.group))
+    return Combatants(*(column[order] for column in combatants)), order
+
+
+def block_bounds(keys):
+    """For a sorted array, the [start, end) of the run of equal keys each element belongs to"""
+    boundaries = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+    starts = np.concatenate(([0], boundaries))
+    ends = np.concatenate((boundaries, [len(keys)]))
+    run = np.repeat(np.arange(len(starts)), ends - starts)
+
+    return starts[run], ends[run]
+
+
+def fire_round(combatants: Combatants, rng: np.random.Generator):
+    """
+    Damage taken by each combatant in one round of fire, for every group at once. Combatants must be
+    sorted by group, then side (see sort_combatants); combatants with no hostiles in their group
+    don't fire.
+    """
+    count = len(combatants.hit_points)
+    if count == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    group_start, group_end = block_bounds(combatants.group)
+    side_start, side_end = block_bounds(combatants.group * (combatants.side.max() + 1) + combatants.side)
+
+    shooters = np.concatenate((
+        np.repeat(np.arange(count), combatants.weapons),
+        np.repeat(np.arange(count), combatants.fighters)
+    ))
+    is_fighter = np.arange(len(shooters)) >= combatants.weapons.sum()
+
+    hostiles = (group_end - group_start - (side_end - side_start))[shooters]
+    is_firing = hostiles > 0
+    shooters, is_fighter, hostiles = shooters[is_firing], is_fighter[is_firing], hostiles[is_firing]
+
+    # A random hostile is picked by index among the group's combatants, skipping over the shooter's own side
+    targets = group_start[shooters] + (rng.random(len(shooters)) * hostiles).astype(np.int64)
+    own_side = targets >= side_start[shooters]
+    targets[own_side] += (side_end - side_start)[shooters][own_side]
+
+    hit_chances = np.where(
+        is_fighter,
+        fighter_hit_chance * (1 - point_defense_intercept) ** combatants.point_defense[targets],
+        weapon_hit_chance
+    ) * (1 - armor_deflection) ** combatants.armor[targets]
+    hits = rng.random(len(shooters)) < hit_chances
+
+    return np.bincount(targets[hits], minlength=count)
+
+
+def is_contested(combatants: Combatants):
+    """Whether any group still has combatants of more than one side (combatants sorted as for fire_round)"""
+    group_change = combatants.group[1:] != combatants.group[:-1]
+    side_change = combatants.side[1:] != combatants.side[:-1]
+    return bool((side_change & ~group_change).any())
+
+
+# Totals over a number of simulated battles between the sides of a fleet, with one entry per side in
+# 'wins' (battles it was the only side left standing in) and 'losses' (combatants it lost)
+BattleTotals = namedtuple('BattleTotals', ['trials', 'wins', 'draws', 'losses'])
+
+
+def simulate_battles(fleet: Combatants, trials: int, rng: np.random.Generator, rounds: int = max_rounds):
+    """
+    Fights 'trials' independent battles between the sides of a fleet (a single group, sorted by side)
+    until at most one side is left or 'rounds' rounds have passed. All the battles are fought at
+    once, with each trial as its own group.
+    """
+    fleet_size = len(fleet.hit_points)
+    sides = int(fleet.side.max()) + 1
+    battles = Combatants(np.repeat(np.arange(trials), fleet_size), *(np.tile(column, trials) for column in fleet[1:]))
+
+    for _ in range(rounds):
+        if not is_contested(battles):
+            break
+        hit_points = battles.hit_points - fire_round(battles, rng)
+        survivors = hit_points > 0
+        battles = Combatants(*(column[survivors] for column in battles._replace(hit_points=hit_points)))
+
+    survivors = np.bincount(battles.group * sides + battles.side, minlength=trials * sides).reshape(trials, sides)
+    sides_left = (survivors > 0).sum(axis=1)
+    fleet_sizes = np.bincount(fleet.side, minlength=sides)
+
+    return BattleTotals(
+        trials=trials,
+        wins=((survivors > 0) & (sides_left == 1)[:, None]).sum(axis=0),
+        draws=int((sides_left != 1).sum()),
+        losses=trials * fleet_sizes - survivors.sum(axis=0)
+    )
+
+
+def _simulate_chunk(fleet: Combatants, trials: int, seed_sequence: np.random.SeedSequence, rounds: int):
+    return simulate_battles(fleet, trials, np.random.default_rng(seed_sequence), rounds)
+
+
+def predict_battle(fleet: Combatants, trials: int, seed: int = None, workers: int = None, chunk_size: int = 1_000, rounds: int = max_rounds):
+    """
+    BattleTotals over 'trials' simulated battles, run in chunks across a process pool ('workers'
+    processes, one per CPU by default; 1 runs them in this process). Each chunk has its own seed
+    spawned from 'seed', so the totals only depend on the seed, not on the number of workers.
+    """
+    chunks = [min(chunk_size, trials - start) for start in range(0, trials, chunk_size)]
+    seed_sequences = np.random.SeedSequence(seed).spawn(len(chunks))
+    arguments = ([fleet] * len(chunks), chunks, seed_sequences, [rounds] * len(chunks))
+
+    if workers == 1:
+        results = list(map(_simulate_chunk, *arguments))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_simulate_chunk, *arguments))
+
+    return BattleTotals(
+        trials=trials,
+        wins=sum(result.wins for result in results),
+        draws=sum(result.draws for result in results),
+        losses=sum(result.losses for result in results)
+    )
@@ -1,13 +1,115 @@
-from uuid import uuid4
+import re
+from itertools import islice
 
-from sqlalchemy import create_engine, event
+from sqlalchemy import bindparam, create_engine, event, or_, select
 from sqlalchemy.orm import sessionmaker
 
 from src import models
+from src.utils.migrationUtils import run_migrations
 
 
-def generate_id():
-    return str(uuid4())[:7]
+_base36_digits = '0123456789abcdefghijklmnopqrstuvwxyz'
+_base36_id = re.compile('[0-9a-z]+')
+
+
+def to_base36(value: int):
+    digits = []
+    while True:
+        value, digit = divmod(value, 36)
+        digits.append(_base36_digits[digit])
+        if value == 0:
+            return ''.join(reversed(digits))
+
+
+def _first_free_counter(db, table):
+    """One past the largest id in the table that reads as a base 36 number (e.g. the old 7 hex character ids)"""
+    ids = (row_id for (row_id,) in db.execute(select([table.c.id])))
+    return max((int(row_id, 36) for row_id in ids if row_id is not None and _base36_id.fullmatch(row_id)), default=-1) + 1
+
+
+def allocate_ids(db, table, count: int):
+    """
+    Reserves 'count' new ids for a table (e.g. models.Ship.__table__) with a single update of its
+    counter, and returns them as short base 36 strings. Ids come from a counter per table, so they
+    never repeat. A table's counter starts past every id already in it the first time it is used,
+    so existing ids are kept as they are. Works with a Session or a Connection; does not commit.
+    """
+    if count == 0:
+        return []
+
+    counter = models.IdCounter.__table__
+    reserved = db.execute(
+        counter.update()
+        .where(counter.c.table_name == table.name)
+        .values(next_id=counter.c.next_id + count)
+    ).rowcount
+
+    if reserved == 0:
+        start = _first_free_counter(db, table)
+        db.execute(counter.insert().values(table_name=table.name, next_id=start + count))
+    else:
+        start = db.execute(select([counter.c.next_id]).where(counter.c.table_name == table.name)).scalar() - count
+
+    return [to_base36(value) for value in range(start, start + count)]
+
+
+def reset_id_counters(db, *tables):
+    """
+    Makes the counters of the given tables (all of them by default) start over past the ids in the
+    table. Needed after inserting rows with ids of their own, as when loading a game.
+    """
+    counter = models.IdCounter.__table__
+    if len(tables) == 0:
+        db.execute(counter.delete())
+    else:
+        db.execute(counter.delete().where(counter.c.table_name.in_([table.name for table in tables])))
+
+
+def generate_id(context):
+    """Default for the 'id' column of every model: the next id from the table's counter (see allocate_ids)"""
+    return allocate_ids(context.connection, context.current_column.table, 1)[0]
+
+
+def chunks(values, size: int):
+    """Lists of at most 'size' of the given values, taken from the iterable only as each one is needed"""
+    values = iter(values)
+    chunk = list(islice(values, size))
+    while len(chunk) > 0:
+        yield chunk
+        chunk = list(islice(values, size))
+
+
+def rows_matching(query, columns, values, batch_size: int = 500):
+    """
+    Rows of a query (e.g. db.query(Planet.id, Planet.name)) where any of the given columns, which the
+    query has to select, holds one of 'values'. Building IN lists costs much more per value than scanning
+    rows, so once there are more values than a quarter of the rows the query is scanned once and filtered
+    here; otherwise it is run once per chunk of values. A row matching in several chunks is returned for each.
+    """
+    values = set(values)
+    if len(values) == 0:
+        return []
+    if len(values) * 4 > query.count():
+        return [row for row in query if any(getattr(row, column.key) in values for column in columns)]
+
+    # An expanding parameter is far cheaper to compile than an IN list of literal binds
+    query = query.filter(or_(*(column.in_(bindparam(f'values_{index}', expanding=True)) for index, column in enumerate(columns))))
+    rows = []
+    for chunk in chunks(values, batch_size):
+        rows.extend(query.params({f'values_{index}': chunk for index in range(len(columns))}))
+
+    return rows
+
+
+def existing_values(db, column, values, batch_size: int = 500):
+    """The subset of 'values' found in 'column', read with one scan of the column or in chunks, whichever is cheaper"""
+    return set(value for (value,) in rows_matching(db.query(column), [column], values, batch_size))
+
+
+def insert_in_batches(db, table, rows, batch_size: int):
+    """Inserts rows (dicts) with one executemany per batch, so they never have to be in memory all at once"""
+    for batch in chunks(rows, batch_size):
+        db.execute(table.insert(), batch)
 
 
 def _fk_pragma_on_connect(dbapi_con, con_record):
@@ -26,6 +128,7 @@ class Database:
     def get_db(self):
         engine = self.make_engine()
         models.Base.metadata.create_all(bind=engine)
+        run_migrations(engine)
         session_local = sessionmaker()
         db = session_local(autocommit=False, autoflush=False, bind=engine)
         return db
@@ -0,0 +1,46 @@
+from collections import namedtuple
+from functools import lru_cache
+
+# Ship module types and the letters they are written as in modules strings, e.g. 'W1D2' is a
+# level 1 heavy weapons bay and a level 2 warp drive. Colony ships have the modules string 'COLONY'.
+module_abbreviations = {
+    'armor_plating': 'A',
+    'command_bridge': 'B',
+    'ecm_suite': 'C',
+    'warp_drive': 'D',
+    'hangar_bay': 'H',
+    'marine_barracks': 'M',
+    'point_defense_battery': 'P',
+    'sensor_array': 'S',
+    'heavy_weapons_bay': 'W'
+}
+
+module_types = list(module_abbreviations.keys())
+
+colony_modules = "COLONY"
+
+DesignStats = namedtuple('DesignStats', module_types + ['size', 'max_hp', 'stealth_level', 'detection_level'])
+
+
+@lru_cache(maxsize=4096)
+def design_stats(modules: str):
+    """
+    Everything derived from a modules string, as stored on a ShipDesign: the number of modules of
+    each type, the size (number of modules, 1 for colony ships), max_hp, stealth_level (one per ECM
+    suite) and detection_level (one per sensor array).
+    """
+    if modules == colony_modules:
+        letters = ''
+        size = 1
+    else:
+        letters = modules[::2]
+        size = len(modules) // 2
+
+    return DesignStats(
+        *(letters.count(abbreviation) for abbreviation in module_abbreviations.values()),
+        size=size,
+        max_hp=size,
+        # Counted over the whole string, as ships always have been (so colony ships have a stealth level of 1)
+        stealth_level=modules.count(module_abbreviations['ecm_suite']),
+        detection_level=modules.count(module_abbreviations['sensor_array'])
+    )
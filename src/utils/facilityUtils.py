@@ -50,6 +50,31 @@ level_to_str = {
     FacilityLevel.ADVANCED: 'Advanced'
 }
 
+factory_multiplier = {
+    FacilityLevel.BASIC: 1,
+    FacilityLevel.INTERMEDIATE: 2,
+    FacilityLevel.ADVANCED: 3
+}
+
+laboratory_output = {
+    FacilityLevel.BASIC: 1,
+    FacilityLevel.INTERMEDIATE: 2,
+    FacilityLevel.ADVANCED: 4
+}
+
+fleet_hq_output = {
+    FacilityLevel.BASIC: 2,
+    FacilityLevel.INTERMEDIATE: 4,
+    FacilityLevel.ADVANCED: 8
+}
+
+# Shots fired per round of combat (see combatUtils)
+defense_grid_weapons = {
+    FacilityLevel.BASIC: 1,
+    FacilityLevel.INTERMEDIATE: 2,
+    FacilityLevel.ADVANCED: 4
+}
+
 all_facility_types = [
     'factory',
     'laboratory',
@@ -0,0 +1,160 @@
+import random
+from collections import namedtuple
+from itertools import accumulate
+
+from src.utils.colonyUtils import ColonyType, maximum_facilities
+from src.utils.designUtils import module_abbreviations
+from src.utils.facilityUtils import FacilityType, FacilityLevel
+from src.utils.planetUtils import SpecialPlanet
+
+# Random maps and synthetic galaxies (for benchmarking). Everything is derived from a seed,
+# so the same parameters and seed always produce the same output (ids included).
+
+GalaxyScale = namedtuple('GalaxyScale', ['planets', 'factions', 'ships'])
+
+galaxy_scales = {
+    'xs': GalaxyScale(planets=100, factions=4, ships=1_000),
+    's': GalaxyScale(planets=1_000, factions=8, ships=10_000),
+    'm': GalaxyScale(planets=10_000, factions=16, ships=100_000),
+    'l': GalaxyScale(planets=50_000, factions=32, ships=500_000)
+}
+
+# factions:   list of faction names
+# planets:    list of planets-file style dicts ('name', 'size', 'resources', 'special', 'connections')
+# colonies:   planet name -> (owner, colony type, garrison points)
+# facilities: list of {'id', 'planet', 'facility_type', 'level'} dicts
+Galaxy = namedtuple('Galaxy', ['scale', 'seed', 'factions', 'planets', 'colonies', 'facilities'])
+
+# Module letters random ship designs are made of, "ABCDHMPSW"
+generated_module_letters = ''.join(module_abbreviations.values())
+
+# Weights for each special planet type; most of a galaxy is standard worlds
+special_weights = {
+    SpecialPlanet.STANDARD: 80,
+    SpecialPlanet.ARTIFACT: 5,
+    SpecialPlanet.LOGISTICS: 5,
+    SpecialPlanet.FORGE: 4,
+    SpecialPlanet.CONDUIT: 4,
+    SpecialPlanet.THRONE: 2
+}
+
+
+def galaxy_id(index: int):
+    """Deterministic 7 character id for generated rows"""
+    return f"{index:07x}"
+
+
+def generate_connections(rng: random.Random, num_planets: int, average_degree: float = 3.0):
+    """
+    Undirected edges (a, b) with a < b. A spanning tree keeps every planet reachable; then extra
+    edges are added until planets have 'average_degree' connections on average. Neighbours are
+    picked close by (in generation order), so the map has local clusters.
+    """
+    locality = max(50, int(2 * average_degree))
+    target_edges = max(num_planets - 1, round(num_planets * average_degree / 2))
+    if target_edges > num_planets * (num_planets - 1) // 2:
+        raise ValueError(f"An average degree of {average_degree} is not possible with {num_planets} planets")
+
+    edges = set()
+    for index in range(1, num_planets):
+        edges.add((rng.randrange(max(0, index - locality), index), index))
+
+    while len(edges) < target_edges:
+        planet_a = rng.randrange(num_planets - 1)
+        planet_b = min(num_planets - 1, planet_a + rng.randint(1, locality))
+        edges.add((planet_a, planet_b))
+
+    return sorted(edges)
+
+
+def _generate_map(rng: random.Random, num_planets: int, average_degree: float, specials: dict):
+    width = len(str(max(num_planets - 1, 0)))
+    names = [f"planet_{index:0{width}d}" for index in range(num_planets)]
+    special_types = list(specials.keys())
+    special_cumulative_weights = list(accumulate(specials.values()))
+
+    planets = [
+        {
+            'name': name,
+            'size': rng.choice('sml'),
+            'resources': rng.randint(1, 5),
+            'special': rng.choices(special_types, cum_weights=special_cumulative_weights)[0].value,
+            'connections': []
+        }
+        for name in names
+    ]
+
+    for planet_a, planet_b in generate_connections(rng, num_planets, average_degree):
+        planets[planet_a]['connections'].append(names[planet_b])
+        planets[planet_b]['connections'].append(names[planet_a])
+
+    return planets
+
+
+def generate_map(num_planets: int, seed: int = 0, average_degree: float = 3.0, specials: dict = None):
+    """
+    A random, connected map as a list of planets-file entries, which passes planetUtils.validate_planets_file.
+    'specials' maps each SpecialPlanet to its relative weight (special_weights by default).
+    """
+    if num_planets < 2:
+        raise ValueError("A map needs at least 2 planets")
+    if average_degree < 1:
+        raise ValueError("Average degree must be at least 1")
+
+    specials = special_weights if specials is None else specials
+    if sum(specials.values()) <= 0 or any(weight < 0 for weight in specials.values()):
+        raise ValueError("Special world weights must not be negative, and at least one must be positive")
+
+    return _generate_map(random.Random(seed), num_planets, average_degree, specials)
+
+
+def generate_galaxy(scale: GalaxyScale, seed: int = 0):
+    rng = random.Random(seed)
+
+    factions = [f"faction_{index}" for index in range(scale.factions)]
+    planets = _generate_map(rng, scale.planets, 3.0, special_weights)
+    names = [planet['name'] for planet in planets]
+
+    colonies = {}
+    facilities = []
+    for name in names:
+        if rng.random() >= 0.6:
+            continue
+
+        colony_type = rng.choice(list(ColonyType))
+        colonies[name] = (rng.choice(factions), colony_type, rng.randint(0, 5))
+
+        for _ in range(rng.randint(0, maximum_facilities[colony_type] // 2)):
+            facilities.append({
+                'id': galaxy_id(len(facilities)),
+                'planet': name,
+                'facility_type': rng.choice(list(FacilityType)),
+                'level': rng.choice(list(FacilityLevel))
+            })
+
+    return Galaxy(scale=scale, seed=seed, factions=factions, planets=planets, colonies=colonies, facilities=facilities)
+
+
+def generate_ships(galaxy: Galaxy):
+    """
+    Yields ship dicts ('id', 'owner', 'modules', 'location') one at a time. Most ships orbit
+    one of their owner's planets, the rest are spread across the galaxy.
+    """
+    rng = random.Random(galaxy.seed + 1)
+
+    names = [planet['name'] for planet in galaxy.planets]
+    planets_by_owner = {}
+    for name, (owner, _, _) in galaxy.colonies.items():
+        planets_by_owner.setdefault(owner, []).append(name)
+
+    for index in range(galaxy.scale.ships):
+        owner = rng.choice(galaxy.factions)
+        home_planets = planets_by_owner.get(owner)
+        location = rng.choice(home_planets) if home_planets and rng.random() < 0.7 else rng.choice(names)
+
+        if rng.random() < 0.05:
+            modules = "COLONY"
+        else:
+            modules = ''.join(f"{rng.choice(generated_module_letters)}{rng.randint(1, 3)}" for _ in range(rng.randint(1, 10)))
+
+        yield {'id': galaxy_id(index), 'owner': owner, 'modules': modules, 'location': location}
@@ -0,0 +1,184 @@
+from array import array
+from bisect import bisect_left
+from collections import deque
+
+# Hop distances from every planet are memoized (filling in an all-pairs table as they are
+# queried) on maps with at most this many planets, i.e. at most 4M distances / 16MB
+all_pairs_limit = 2000
+
+
+class AdjacencyGraph:
+    """
+    Planet connections in compressed sparse row (CSR) form. Planets are numbered 0..n-1 in
+    name order, and the neighbours of planet i are targets[offsets[i]:offsets[i + 1]],
+    sorted by index (and therefore by name).
+    """
+
+    def __init__(self, names: list, offsets: array, targets: array):
+        self.names = names
+        self.indexes = {name: index for index, name in enumerate(names)}
+        self.offsets = offsets
+        self.targets = targets
+        self.memoize_distances = len(names) <= all_pairs_limit
+        self._distances = {}
+        self._components = None
+
+    @classmethod
+    def from_edges(cls, names, edges):
+        """
+        Builds a graph from planet names and (name_a, name_b) edges. Edges are undirected,
+        so each one may be given in either or both directions.
+        """
+        names = sorted(names)
+        indexes = {name: index for index, name in enumerate(names)}
+
+        pairs = set()
+        for name_a, name_b in edges:
+            index_a, index_b = indexes[name_a], indexes[name_b]
+            pairs.add((index_a, index_b))
+            pairs.add((index_b, index_a))
+        pairs = sorted(pairs)
+
+        offsets = array('l', [0] * (len(names) + 1))
+        for index_a, _ in pairs:
+            offsets[index_a + 1] += 1
+        for index in range(len(names)):
+            offsets[index + 1] += offsets[index]
+
+        return cls(names, offsets, array('l', (index_b for _, index_b in pairs)))
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.indexes
+
+    @property
+    def edge_count(self):
+        """Number of undirected connections"""
+        return len(self.targets) // 2
+
+    def neighbor_indexes(self, index: int):
+        return self.targets[self.offsets[index]:self.offsets[index + 1]]
+
+    def neighbors(self, name: str):
+        """Names of the planets connected to the given one, sorted. Unknown planets have no neighbours."""
+        index = self.indexes.get(name)
+        if index is None:
+            return []
+
+        return [self.names[neighbor] for neighbor in self.neighbor_indexes(index)]
+
+    def degree(self, name: str):
+        index = self.indexes.get(name)
+        return 0 if index is None else self.offsets[index + 1] - self.offsets[index]
+
+    def has_edge(self, name_a: str, name_b: str):
+        index_a = self.indexes.get(name_a)
+        index_b = self.indexes.get(name_b)
+        if index_a is None or index_b is None:
+            return False
+
+        start, end = self.offsets[index_a], self.offsets[index_a + 1]
+        position = bisect_left(self.targets, index_b, start, end)
+        return position < end and self.targets[position] == index_b
+
+    def index_of(self, name: str):
+        index = self.indexes.get(name)
+        if index is None:
+            raise ValueError(f"Planet '{name}' does not exist")
+        return index
+
+    def _bfs(self, source: int, max_hops: int = None):
+        """Hop distance from source to every planet (-1 where unreachable, or further than max_hops)"""
+        distances = array('i', [-1]) * len(self.names)
+        distances[source] = 0
+        queue = deque([source])
+
+        while queue:
+            current = queue.popleft()
+            hops = distances[current] + 1
+            if max_hops is not None and hops > max_hops:
+                continue
+
+            for neighbor in self.targets[self.offsets[current]:self.offsets[current + 1]]:
+                if distances[neighbor] == -1:
+                    distances[neighbor] = hops
+                    queue.append(neighbor)
+
+        return distances
+
+    def hop_distances(self, name: str):
+        """Hop distance from the given planet to every planet, indexed like self.names (-1 where unreachable)"""
+        index = self.index_of(name)
+
+        distances = self._distances.get(index)
+        if distances is None:
+            distances = self._bfs(index)
+            if self.memoize_distances:
+                self._distances[index] = distances
+
+        return distances
+
+    def all_pairs_hops(self):
+        """Fills in and returns the whole all-pairs table (one row per planet, indexed like self.names)"""
+        return [self.hop_distances(name) for name in self.names]
+
+    def shortest_path(self, origin: str, destination: str):
+        """
+        Names of the planets on a shortest route from origin to destination, both included,
+        or None if there is no route. Ties are broken by taking the first neighbour by name.
+        """
+        current = self.index_of(origin)
+        distances = self.hop_distances(destination)
+        if distances[current] == -1:
+            return None
+
+        path = [current]
+        while distances[current] > 0:
+            current = next(
+                neighbor for neighbor in self.neighbor_indexes(current)
+                if distances[neighbor] == distances[current] - 1
+            )
+            path.append(current)
+
+        return [self.names[index] for index in path]
+
+    def within_jumps(self, name: str, jumps: int):
+        """{planet name: hops} for every other planet at most 'jumps' hops away, nearest first"""
+        index = self.index_of(name)
+        distances = self._distances.get(index) or self._bfs(index, jumps)
+
+        reachable = [
+            (hops, neighbor) for neighbor, hops in enumerate(distances)
+            if 0 < hops <= jumps
+        ]
+
+        return {self.names[neighbor]: hops for hops, neighbor in sorted(reachable)}
+
+    def connected_components(self):
+        """Lists of planet names that are reachable from each other, each sorted; the largest component first"""
+        if self._components is None:
+            component_ids = array('i', [-1]) * len(self.names)
+            components = []
+
+            for start in range(len(self.names)):
+                if component_ids[start] != -1:
+                    continue
+
+                component_ids[start] = len(components)
+                members = [start]
+                queue = deque([start])
+                while queue:
+                    current = queue.popleft()
+                    for neighbor in self.neighbor_indexes(current):
+                        if component_ids[neighbor] == -1:
+                            component_ids[neighbor] = len(components)
+                            members.append(neighbor)
+                            queue.append(neighbor)
+
+                components.append([self.names[index] for index in sorted(members)])
+
+            self._components = sorted(components, key=lambda component: (-len(component), component[0]))
+
+        return self._components
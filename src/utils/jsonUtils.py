@@ -0,0 +1,111 @@
+import json
+import re
+
+_whitespace = re.compile(r'\s*')
+_decoder = json.JSONDecoder()
+
+
+class _ChunkedReader:
+    """
+    Keeps a window of a text file in memory, reading more in chunks as needed
+    and dropping whatever has already been consumed.
+    """
+
+    def __init__(self, f, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.line = 1
+        self.eof = False
+
+    def fill(self):
+        chunk = self.f.read(self.chunk_size)
+        if chunk == '':
+            self.eof = True
+            return
+
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+
+    def advance(self, new_pos: int):
+        self.line += self.buffer.count('\n', self.pos, new_pos)
+        self.pos = new_pos
+
+    def peek(self):
+        """Skips whitespace and returns the next character, or '' at the end of the file"""
+        while True:
+            self.advance(_whitespace.match(self.buffer, self.pos).end())
+            if self.pos < len(self.buffer) or self.eof:
+                return self.buffer[self.pos:self.pos + 1]
+            self.fill()
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Invalid JSON at line {self.line}: expected '{char}' but found '{found or 'end of file'}'")
+        self.advance(self.pos + 1)
+
+    def decode_value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    error_line = self.line + self.buffer.count('\n', self.pos, e.pos)
+                    raise ValueError(f"Invalid JSON at line {error_line}: {e.msg}")
+                self.fill()
+                continue
+
+            # A number or literal running up to the end of the window may continue in the next chunk
+            if end == len(self.buffer) and not self.eof:
+                self.fill()
+                continue
+
+            self.advance(end)
+            return value
+
+
+def iter_json_array(f, key: str, chunk_size: int = 64 * 1024):
+    """
+    Yields (index, line, value) for each element of the array stored under 'key' in a
+    top level JSON object, reading the file in chunks. Only one element is decoded at a time.
+    Other top level keys are decoded and ignored. Raises a ValueError on malformed JSON
+    or if the key is missing.
+    """
+    reader = _ChunkedReader(f, chunk_size)
+    found = False
+
+    reader.expect('{')
+    if reader.peek() == '}':
+        raise ValueError(f"Missing top level '{key}' array")
+
+    while True:
+        name = reader.decode_value()
+        reader.expect(':')
+
+        if name == key:
+            found = True
+            reader.expect('[')
+            index = 0
+            while reader.peek() != ']':
+                if index > 0:
+                    reader.expect(',')
+
+                reader.peek()
+                line = reader.line
+                yield index, line, reader.decode_value()
+                index += 1
+            reader.expect(']')
+        else:
+            reader.decode_value()
+
+        if reader.peek() != ',':
+            break
+        reader.expect(',')
+
+    reader.expect('}')
+
+    if not found:
+        raise ValueError(f"Missing top level '{key}' array")
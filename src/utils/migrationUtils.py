@@ -0,0 +1,76 @@
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
+from src import models
+
+# Schema changes that create_all can't make to existing databases. Each migration checks
+# whether it is needed, so they are all run (in order) every time a database is opened.
+
+
+def report_cache_chunks(engine):
+    """
+    Cached report sections used to be stored whole, one row per (faction_name, section). They are
+    now stored in chunks, keyed by 'chunk' as well. It is only a cache, so the table is recreated.
+    """
+    if not engine.has_table('ReportCache') or any(column['name'] == 'chunk' for column in inspect(engine).get_columns('ReportCache')):
+        return
+
+    with engine.begin() as conn:
+        conn.execute('DROP TABLE "ReportCache"')
+        models.ReportCache.__table__.create(bind=conn)
+
+
+def canonical_connections(engine):
+    """
+    PlanetConnection used to store every connection twice (once in each direction), with
+    only planet_a_id indexed. Rebuilds the table with one row per connection, lower id first.
+    """
+    if not engine.has_table('PlanetConnection'):
+        return
+
+    indexes = inspect(engine).get_indexes('PlanetConnection')
+    if any(index['column_names'] == ['planet_b_id'] for index in indexes):
+        return
+
+    with engine.begin() as conn:
+        conn.execute('ALTER TABLE "PlanetConnection" RENAME TO "PlanetConnection_old"')
+        for index in indexes:
+            conn.execute(f'DROP INDEX "{index["name"]}"')
+
+        models.PlanetConnection.create(bind=conn)
+        conn.execute(
+            'INSERT INTO "PlanetConnection" (planet_a_id, planet_b_id) '
+            'SELECT DISTINCT min(planet_a_id, planet_b_id), max(planet_a_id, planet_b_id) '
+            'FROM "PlanetConnection_old" WHERE planet_a_id != planet_b_id'
+        )
+        conn.execute('DROP TABLE "PlanetConnection_old"')
+
+
+def ship_designs(engine):
+    """
+    Ships used to store only their modules string. Adds Ship.design_id and gives every existing
+    ship the design of its modules, which also corrects the max_hp, stealth and detection levels of
+    ships that were retrofitted before retrofits updated them. Cached reports are dropped.
+    """
+    if not engine.has_table('Ship') or any(column['name'] == 'design_id' for column in inspect(engine).get_columns('Ship')):
+        return
+
+    # Imported here since the crud modules import src.utils.db, which runs the migrations
+    from src.crud import shipDesignCrud
+
+    with engine.begin() as conn:
+        conn.execute('ALTER TABLE "Ship" ADD COLUMN design_id VARCHAR REFERENCES "ShipDesign" (id)')
+        conn.execute('CREATE INDEX "ix_Ship_design_id" ON "Ship" (design_id)')
+
+        db = Session(bind=conn)
+        shipDesignCrud.assign_missing_designs(db)
+        db.query(models.ReportCache).delete(synchronize_session=False)
+        db.close()
+
+
+migrations = [report_cache_chunks, canonical_connections, ship_designs]
+
+
+def run_migrations(engine):
+    for migration in migrations:
+        migration(engine)
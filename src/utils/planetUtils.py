@@ -1,5 +1,7 @@
 import enum
-import json
+
+from src.utils import jsonUtils
+from src.utils.facilityUtils import FacilityType, factory_multiplier, laboratory_output, fleet_hq_output
 
 
 class SpecialPlanet(enum.Enum):
@@ -21,35 +23,118 @@ special_str_to_enum = {
 }
 
 
-def validate_planets_file(file_name):
-    with open(file_name) as f:
-        planets = json.load(f)['planets']
+def calculate_production(planet, facilities, resource_type: str):
+    """Resource production of a single planet given its facilities.
+    Works with ORM objects as well as snapshot records."""
+    production = 0
+    resource_type = resource_type.lower()
+
+    if resource_type == "mp":
+        for facility in facilities:
+            if facility.facility_type == FacilityType.FACTORY:
+                production += factory_multiplier.get(facility.level, 0) * planet.resources
+    elif resource_type == "rp":
+        for facility in facilities:
+            if facility.facility_type == FacilityType.LABORATORY:
+                production += laboratory_output.get(facility.level, 0)
+                if planet.special == SpecialPlanet.ARTIFACT:
+                    production += 1
+    elif resource_type == "lp":
+        for facility in facilities:
+            if facility.facility_type == FacilityType.FLEET_HQ:
+                production += fleet_hq_output.get(facility.level, 0)
+                if planet.special == SpecialPlanet.LOGISTICS:
+                    production += 1
+    else:
+        raise ValueError("Only 'mp', 'rp', and 'lp' are valid resource types.")
+
+    return production
+
+
+def validate_planet_record(planet):
+    """Checks a single planets-file entry on its own. Returns a list of error messages."""
+    if not isinstance(planet, dict):
+        return ["Planet entries must be JSON objects."]
+
+    name = planet.get('name')
+    if not isinstance(name, str) or name == '':
+        return ["Planet is missing a name."]
 
     errors = []
 
-    planet_names = list(map(lambda p: p['name'], planets))
-    name_counts = {name: planet_names.count(name) for name in planet_names}
+    if planet.get('size') not in ['s', 'm', 'l']:
+        errors.append(f"Invalid size for {name}. Size must be 's', 'm', or 'l'.")
 
-    planet_connections = {planet['name']: planet['connections'] for planet in planets}
+    if 'special' in planet.keys() and planet['special'] not in special_str_to_enum.keys():
+        errors.append(f"Invalid special designation for {name}. Special must be one of: {list(special_str_to_enum.keys())}")
 
-    for planet in planets:
-        if planet['size'] not in ['s', 'm', 'l']:
-            errors.append(f"Invalid size for {planet['name']}. Size must be 's', 'm', or 'l'.")
+    resources = planet.get('resources')
+    if isinstance(resources, bool) or not (isinstance(resources, int) or (isinstance(resources, str) and resources.isdigit())):
+        errors.append(f"Invalid resource value for {name}. Resource values must be integers.")
 
-        if 'special' in planet.keys() and planet['special'] not in special_str_to_enum.keys():
-            errors.append(f"Invalid special designation for {planet['name']}. Special must be one of: {list(special_str_to_enum.keys())}")
+    connections = planet.get('connections')
+    if not isinstance(connections, list) or not all(isinstance(other, str) for other in connections):
+        errors.append(f"Invalid connections for {name}. Connections must be an array of planet names.")
+    elif len(connections) < 1:
+        errors.append(f"{name} has no connections. All planets must have at least one connection.")
 
-        if not planet['resources'].isdigit():
-            errors.append(f"Invalid resource value for {planet['name']}. Resource values must be integers.")
+    return errors
 
-        if name_counts.get(planet['name']) > 1:
-            errors.append(f"Planet name '{planet['name']}' occurs multiple times. Names must be unique.")
 
-        if len(planet['connections']) < 1:
-            errors.append(f"{planet['name']} has no connections. All planets must have at least one connection.")
+def read_planets_file(file_name, chunk_size: int = 64 * 1024, external_connections: bool = False):
+    """
+    Reads and validates a planets file in a single pass, streaming the 'planets' array in chunks.
+    Runs in O(planets + connections). Returns (planets, errors): the planet entries in file order,
+    and every error found, each prefixed with the position of the entry it refers to.
+    The planets are only safe to import if there are no errors.
+    With 'external_connections', planets may list connections to planets that are not in the file
+    (e.g. ones already on the map), which have to be checked when the file is imported.
+    """
+    planets = []
+    errors = []
+    lines = []
+    indexes_by_name = {}
+    connections = {}
+
+    def add_error(index, message):
+        errors.append((index, f"planets[{index}] (line {lines[index]}): {message}"))
+
+    try:
+        with open(file_name) as f:
+            for index, line, planet in jsonUtils.iter_json_array(f, 'planets', chunk_size):
+                lines.append(line)
+                planets.append(planet)
+
+                record_errors = validate_planet_record(planet)
+                for message in record_errors:
+                    add_error(index, message)
+
+                if not isinstance(planet, dict) or not isinstance(planet.get('name'), str):
+                    continue
+
+                name = planet['name']
+                if name in indexes_by_name:
+                    add_error(index, f"Planet name '{name}' occurs multiple times (first at planets[{indexes_by_name[name]}]). Names must be unique.")
+                    continue
+
+                indexes_by_name[name] = index
+                if isinstance(planet.get('connections'), list):
+                    connections[name] = set(other for other in planet['connections'] if isinstance(other, str))
+    except ValueError as e:
+        errors.append((len(lines), str(e)))
+
+    # Connections can only be checked once every planet has been read
+    for name, index in indexes_by_name.items():
+        for other in sorted(connections.get(name, ())):
+            if other not in indexes_by_name:
+                if external_connections:
+                    continue
+                add_error(index, f"{name} lists {other} as a connection, but {other} does not exist.")
+            elif name not in connections.get(other, ()):
+                add_error(index, f"{name} lists {other} as a connection, but {other} does not list {name}. Connections must be bi-directional.")
+
+    return planets, [message for _, message in sorted(errors, key=lambda error: error[0])]
 
-        for other in planet_connections.get(planet['name']):
-            if planet['name'] not in planet_connections.get(other):
-                errors.append(f"{planet['name']} lists {other} as a connection, but {other} does not list {planet['name']}. Connections must be bi-directional.")
 
-    return errors
+def validate_planets_file(file_name):
+    return read_planets_file(file_name)[1]
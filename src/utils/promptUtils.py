@@ -16,3 +16,19 @@ def faction_prompt(database, message="Faction:"):
         message=message,
         choices=factionCrud.get_faction_names(database)
     ).execute()
+
+
+def number_prompt(message, default: str, convert=int):
+    """Prompts for a non-negative number, converted with 'convert'"""
+    def is_valid(value):
+        try:
+            return convert(value) >= 0
+        except ValueError:
+            return False
+
+    return convert(iq.text(
+        message=message,
+        default=default,
+        validate=is_valid,
+        invalid_message="Must be a non-negative number."
+    ).execute())
@@ -1,35 +1,15 @@
+import csv
 import re
 from collections import Counter
 
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from src.crud import shipCrud, planetCrud
-
-module_types = [
-    'armor_plating',
-    'command_bridge',
-    'ecm_suite',
-    'warp_drive',
-    'hangar_bay',
-    'marine_barracks',
-    'point_defense_battery',
-    'sensor_array',
-    'heavy_weapons_bay'
-]
-
-
-module_abbreviations = {
-    'armor_plating': 'A',
-    'command_bridge': 'B',
-    'ecm_suite': 'C',
-    'warp_drive': 'D',
-    'hangar_bay': 'H',
-    'marine_barracks': 'M',
-    'point_defense_battery': 'P',
-    'sensor_array': 'S',
-    'heavy_weapons_bay': 'W'
-}
-
+from src import models
+from src.crud import connectionCrud, shipCrud, planetCrud
+from src.utils import jsonUtils
+from src.utils.designUtils import colony_modules, design_stats
+from src.utils.facilityUtils import FacilityType, FacilityLevel
 
 module_options = [
     {"name": '(A) Armor Plating', "value": 'armor_plating'},
@@ -70,13 +50,74 @@ def determine_effective_detection_level(db: Session, planet_name: str, faction_n
 
     if planet.owner == faction_name and planet_has_radar:
         effective_detection_level += 11
-    for p in planet.connections:
-        if p.owner == faction_name and planetCrud.has_facilities(db, p.name, {'AR'}):
+
+    neighbor_names = planetCrud.get_connection_names(db, planet_name)
+    owned_neighbors = db.query(models.Planet.name).filter(models.Planet.name.in_(neighbor_names), models.Planet.owner == faction_name)
+    for (neighbor_name,) in owned_neighbors:
+        if planetCrud.has_facilities(db, neighbor_name, {'AR'}):
             effective_detection_level += 11
 
     return effective_detection_level
 
 
+def compute_detection_matrix(sensor_levels, radar_planets, advanced_radar_neighbors):
+    """Builds {faction_name: {planet_name: effective detection level}} from
+    - sensor_levels: iterable of (faction_name, planet_name, max detection level of the faction's ships there)
+    - radar_planets: iterable of (planet_name, owner) for planets with at least one radar
+    - advanced_radar_neighbors: iterable of (planet_name, faction_name), one per connected planet
+      owned by the faction that has an advanced radar
+
+    Pairs missing from the matrix have a detection level of 0 (see get_detection_level)."""
+    matrix = {}
+
+    for faction_name, planet_name, level in sensor_levels:
+        faction_levels = matrix.setdefault(faction_name, {})
+        faction_levels[planet_name] = faction_levels.get(planet_name, 0) + level
+
+    for planet_name, owner in radar_planets:
+        faction_levels = matrix.setdefault(owner, {})
+        faction_levels[planet_name] = faction_levels.get(planet_name, 0) + 11
+
+    for planet_name, faction_name in advanced_radar_neighbors:
+        faction_levels = matrix.setdefault(faction_name, {})
+        faction_levels[planet_name] = faction_levels.get(planet_name, 0) + 11
+
+    return matrix
+
+
+def get_detection_matrix(db: Session):
+    """Effective detection level of every faction on every planet, in three queries (plus the cached adjacency graph).
+    Gives the same levels as determine_effective_detection_level."""
+    sensor_levels = db.query(models.Ship.owner, models.Ship.location, func.max(models.Ship.detection_level))\
+        .group_by(models.Ship.owner, models.Ship.location)\
+        .all()
+
+    radar_planets = db.query(models.Planet.name, models.Planet.owner)\
+        .join(models.Facility, models.Facility.planet == models.Planet.name)\
+        .filter(models.Facility.facility_type == FacilityType.RADAR, models.Planet.owner.isnot(None))\
+        .distinct()\
+        .all()
+
+    advanced_radar_planets = db.query(models.Planet.name, models.Planet.owner)\
+        .join(models.Facility, models.Facility.planet == models.Planet.name)\
+        .filter(models.Facility.facility_type == FacilityType.RADAR, models.Facility.level == FacilityLevel.ADVANCED)\
+        .filter(models.Planet.owner.isnot(None))\
+        .distinct()\
+        .all()
+
+    graph = connectionCrud.get_adjacency_graph(db)
+
+    return compute_detection_matrix(
+        sensor_levels,
+        radar_planets,
+        ((neighbor_name, owner) for planet_name, owner in advanced_radar_planets for neighbor_name in graph.neighbors(planet_name))
+    )
+
+
+def get_detection_level(detection_matrix: dict, planet_name: str, faction_name: str):
+    return detection_matrix.get(faction_name, {}).get(planet_name, 0)
+
+
 def get_ships_with_factions(ships):
     grouped_ships = group_ships_by_faction(ships)
 
@@ -98,10 +139,7 @@ def group_ships_by_faction(ships):
 
 
 def get_size(ship):
-    if ship.modules == "COLONY":
-        return 1
-
-    return int(len(ship.modules) / 2)
+    return design_stats(ship.modules).size
 
 
 def ship_to_str_full(ship):
@@ -130,6 +168,61 @@ def ships_to_str_observed(ship_list):
     return ', '.join(ships_to_display)
 
 
+module_str_pattern = re.compile("^([ABCDHMPSWabcdhmpsw][1-9]){1,10}$")  # Example: W1D2M5
+
+ship_fields = ['owner', 'location', 'modules']
+
+
 def validate_module_str(modules_str):
-    pattern = re.compile("^([ABCDHMPSWabcdhmpsw][1-9]){1,10}$")  # Example: W1D2M5
-    return bool(re.match(pattern, modules_str))
+    return module_str_pattern.match(modules_str) is not None
+
+
+def validate_ship_record(ship):
+    if not isinstance(ship, dict):
+        return ["Must be an object with 'owner', 'location' and 'modules'."]
+
+    errors = [f"'{field}' is required and must be a string." for field in ship_fields if not isinstance(ship.get(field), str)]
+    modules = ship.get('modules')
+    if isinstance(modules, str) and modules.upper() != colony_modules and module_str_pattern.match(modules) is None:
+        errors.append(f"Invalid modules string '{modules}'. Must match the regex ^([ABCDHMPSW][1-9]){{1,10}}$ or be {colony_modules}.")
+
+    return errors
+
+
+def _read_ship_records(f, csv_format: bool, chunk_size: int):
+    """Yields (position, line, record) for each ship in a JSON ('ships' array) or CSV (header row) ships file"""
+    if not csv_format:
+        for index, line, ship in jsonUtils.iter_json_array(f, 'ships', chunk_size):
+            yield f"ships[{index}]", line, ship
+        return
+
+    reader = csv.DictReader(f)
+    missing_columns = [field for field in ship_fields if field not in (reader.fieldnames or [])]
+    if len(missing_columns) > 0:
+        raise ValueError(f"Missing column(s) {', '.join(missing_columns)} in the header row")
+
+    for row_number, row in enumerate(reader, start=1):
+        yield f"row {row_number}", reader.line_num, {field: row[field] for field in ship_fields}
+
+
+def read_ships_file(file_name, chunk_size: int = 64 * 1024):
+    """
+    Reads and validates a ships file in a single pass: JSON (a top level 'ships' array) or, for
+    '.csv' files, CSV with 'owner', 'location' and 'modules' columns. Returns (ships, errors): the
+    ships as dicts of those three fields (modules upper cased), and every error found, prefixed
+    with the position of the entry it refers to. Owners and locations are checked on import.
+    """
+    ships = []
+    errors = []
+
+    try:
+        with open(file_name, newline='') as f:
+            for position, line, ship in _read_ship_records(f, file_name.lower().endswith('.csv'), chunk_size):
+                record_errors = validate_ship_record(ship)
+                errors.extend(f"{position} (line {line}): {message}" for message in record_errors)
+                if len(record_errors) == 0:
+                    ships.append({'owner': ship['owner'], 'location': ship['location'], 'modules': ship['modules'].upper()})
+    except (ValueError, csv.Error) as e:
+        errors.append(str(e))
+
+    return ships, errors
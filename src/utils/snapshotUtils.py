@@ -0,0 +1,131 @@
+from collections import namedtuple
+
+from src.crud.planetCrud import get_garrison_contribution
+from src.utils.facilityUtils import FacilityType, FacilityLevel, type_to_abbreviated_str, level_to_abbreviated_str
+from src.utils.shipUtils import compute_detection_matrix, get_detection_level
+
+# Plain, read-only copies of the database rows. A snapshot is loaded once
+# (see snapshotCrud.load_snapshot) and every report is computed from it
+# without going back to the database.
+
+PlanetRecord = namedtuple('PlanetRecord', [
+    'id', 'name', 'size', 'special', 'colony_size', 'resources', 'owner', 'garrison_points'
+])
+
+ShipRecord = namedtuple('ShipRecord', [
+    'id', 'owner', 'modules', 'location', 'max_hp', 'hit_points', 'stealth_level', 'detection_level'
+])
+
+FactionRecord = namedtuple('FactionRecord', ['faction_name', 'mp', 'rp', 'lp', 'research'])
+
+
+class FacilityRecord(namedtuple('FacilityRecord', ['id', 'facility_type', 'level', 'planet', 'shields'])):
+    __slots__ = ()
+
+    def __repr__(self):
+        return f'{level_to_abbreviated_str.get(self.level)}{type_to_abbreviated_str.get(self.facility_type)}'
+
+
+# factions:    faction name -> FactionRecord
+# planets:     planet name -> PlanetRecord (in database order)
+# connections: planet name -> tuple of connected planet names, sorted
+# ships:       planet name -> tuple of ShipRecords in orbit
+# facilities:  planet name -> tuple of FacilityRecords
+# detection:   faction name -> planet name -> effective detection level (see shipUtils.compute_detection_matrix)
+# incomes:     faction name -> {'mp': income, 'rp': income, 'lp': income} (see factionCrud.get_resource_incomes)
+GameSnapshot = namedtuple('GameSnapshot', ['factions', 'planets', 'connections', 'ships', 'facilities', 'detection', 'incomes'])
+
+
+def get_connection_names(snapshot: GameSnapshot, planet_name: str):
+    return list(snapshot.connections.get(planet_name, ()))
+
+
+def get_ships_on_planet(snapshot: GameSnapshot, planet_name: str):
+    return list(snapshot.ships.get(planet_name, ()))
+
+
+def get_planet_facilities(snapshot: GameSnapshot, planet_name: str):
+    return list(snapshot.facilities.get(planet_name, ()))
+
+
+def get_max_garrison_points(snapshot: GameSnapshot, planet_name: str):
+    return sum(map(get_garrison_contribution, snapshot.facilities.get(planet_name, ())))
+
+
+def get_resource_income(snapshot: GameSnapshot, faction_name: str, resource_type: str):
+    return snapshot.incomes.get(faction_name, {}).get(resource_type, 0)
+
+
+def get_planets_by_faction(snapshot: GameSnapshot, faction_name: str):
+    """
+    Returns an object containing planets owned by the given faction
+    and planets observed by (but not owned by) the given faction
+    """
+    controlled = sorted(
+        (planet for planet in snapshot.planets.values() if planet.owner == faction_name),
+        key=lambda planet: planet.name
+    )
+
+    planets_with_ships = set(
+        planet_name for planet_name, ships in snapshot.ships.items()
+        if any(ship.owner == faction_name for ship in ships)
+    )
+
+    observed = sorted(
+        (planet for planet in snapshot.planets.values() if planet.owner != faction_name and planet.name in planets_with_ships),
+        key=lambda planet: planet.name
+    )
+
+    return {
+        'controlled': controlled,
+        'observed': observed
+    }
+
+
+def build_detection_matrix(planets: dict, connections: dict, ships: dict, facilities: dict):
+    """Detection matrix for snapshot data, without any further queries"""
+    sensor_levels = {}
+    for planet_name, ship_list in ships.items():
+        for ship in ship_list:
+            key = (ship.owner, planet_name)
+            sensor_levels[key] = max(sensor_levels.get(key, 0), ship.detection_level)
+
+    radar_planets = []
+    advanced_radar_planets = set()
+    for planet_name, facility_list in facilities.items():
+        planet = planets.get(planet_name)
+        owner = planet.owner if planet is not None else None
+        levels = set(facility.level for facility in facility_list if facility.facility_type == FacilityType.RADAR)
+        if owner is None or len(levels) == 0:
+            continue
+
+        radar_planets.append((planet_name, owner))
+        if FacilityLevel.ADVANCED in levels:
+            advanced_radar_planets.add(planet_name)
+
+    advanced_radar_neighbors = [
+        (planet_name, planets[neighbor_name].owner)
+        for planet_name, neighbor_names in connections.items()
+        for neighbor_name in neighbor_names
+        if neighbor_name in advanced_radar_planets
+    ]
+
+    return compute_detection_matrix(
+        ((faction_name, planet_name, level) for (faction_name, planet_name), level in sensor_levels.items()),
+        radar_planets,
+        advanced_radar_neighbors
+    )
+
+
+def determine_effective_detection_level(snapshot: GameSnapshot, planet_name: str, faction_name: str):
+    return get_detection_level(snapshot.detection, planet_name, faction_name)
+
+
+def get_visible_ships_on_planet(snapshot: GameSnapshot, planet_name: str, faction_name: str):
+    """Gets all ships in orbit of a planet which are visible to a faction"""
+    effective_detection_level = determine_effective_detection_level(snapshot, planet_name, faction_name)
+
+    return [
+        ship for ship in snapshot.ships.get(planet_name, ())
+        if ship.owner == faction_name or ship.stealth_level <= effective_detection_level
+    ]
@@ -4,6 +4,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from src import models
+from src.crud import connectionCrud
 from src.models import Facility, Faction, Ship, Planet
 
 Session = sessionmaker()
@@ -58,3 +59,9 @@ def set_factory_session(session):
     FactionFactory._meta.sqlalchemy_session = session
     PlanetFactory._meta.sqlalchemy_session = session
     ShipFactory._meta.sqlalchemy_session = session
+
+
+@pytest.fixture(scope='function', autouse=True)
+def reset_adjacency_graph():
+    # Each test rolls back its outer transaction, which the cached graph can't see
+    connectionCrud.invalidate_adjacency_graph()
@@ -0,0 +1,93 @@
+import pytest
+
+from src.crud import combatCrud, shipDesignCrud, stateCrud
+from src.utils.facilityUtils import FacilityType, FacilityLevel
+
+from test.conftest import ShipFactory, PlanetFactory, FacilityFactory, FactionFactory, models
+
+
+def test_get_contested_planets(session):
+    FactionFactory(faction_name="faction_a")
+    FactionFactory(faction_name="faction_b")
+    PlanetFactory(name="planet_a")
+    PlanetFactory(name="planet_b")
+    ShipFactory(owner="faction_a", location="planet_a")
+    ShipFactory(owner="faction_b", location="planet_a")
+    ShipFactory(owner="faction_a", location="planet_b")
+    ShipFactory(owner="faction_a", location="planet_b")
+
+    assert [name for (name,) in combatCrud.get_contested_planets(session)] == ["planet_a"]
+
+
+def test_resolve_combat(session):
+    FactionFactory(faction_name="faction_a")
+    FactionFactory(faction_name="faction_b")
+    PlanetFactory(name="planet_a")
+    PlanetFactory(name="planet_b")
+    for index in range(20):
+        ShipFactory(id=f"a{index}", owner="faction_a", location="planet_a", modules="W1W1W1")
+    # Module counts are read from designs where ships have them
+    shipDesignCrud.assign_missing_designs(session)
+    for index in range(20):
+        ShipFactory(id=f"b{index}", owner="faction_b", location="planet_a", modules="W1A1A1")
+    ShipFactory(id="c0", owner="faction_a", location="planet_b", modules="W1")
+    ship_version = stateCrud.get_version(session, stateCrud.SHIPS)
+
+    losses = combatCrud.resolve_combat(session, seed=5)
+
+    assert [(faction_losses.planet, faction_losses.faction, faction_losses.ships) for faction_losses in losses] == [
+        ("planet_a", "faction_a", 20),
+        ("planet_a", "faction_b", 20)
+    ]
+    assert stateCrud.get_version(session, stateCrud.SHIPS) == ship_version + 1
+
+    # The damage and losses reported are the ones written back
+    hit_points = dict(session.query(models.Ship.id, models.Ship.hit_points))
+    for faction_losses, prefix in zip(losses, ["a", "b"]):
+        survivors = [hp for ship_id, hp in hit_points.items() if ship_id.startswith(prefix)]
+        assert faction_losses.destroyed == 20 - len(survivors)
+        assert faction_losses.damage >= 20 * 3 - sum(survivors)
+        assert faction_losses.damage > 0
+    assert hit_points["c0"] == 1
+
+
+def test_resolve_combat__no_contested_planets(session):
+    FactionFactory(faction_name="faction_a")
+    PlanetFactory(name="planet_a")
+    ShipFactory(id="ship_a", owner="faction_a", location="planet_a", modules="W1")
+
+    assert combatCrud.resolve_combat(session, seed=1) == []
+    assert session.query(models.Ship).get("ship_a").hit_points == 1
+
+
+def test_predict_battle(session):
+    FactionFactory(faction_name="faction_a")
+    FactionFactory(faction_name="faction_b")
+    PlanetFactory(name="planet_a", owner="faction_a")
+    FacilityFactory(planet="planet_a", facility_type=FacilityType.DEFENSE_GRID, level=FacilityLevel.ADVANCED, shields=1)
+    FacilityFactory(planet="planet_a", facility_type=FacilityType.FACTORY, level=FacilityLevel.BASIC, shields=0)
+    ShipFactory(owner="faction_a", location="planet_a", modules="W1A1")
+
+    outcomes, draw_probability = combatCrud.predict_battle(session, "planet_a", [("faction_b", "W1W1W1W1", 5)], trials=500, seed=4, workers=1)
+
+    assert [(outcome.faction, outcome.units) for outcome in outcomes] == [("faction_a", 3), ("faction_b", 5)]
+    assert sum(outcome.win_probability for outcome in outcomes) + draw_probability == pytest.approx(1)
+    assert all(0 < outcome.expected_losses <= outcome.units for outcome in outcomes)
+    assert outcomes[1].win_probability > outcomes[0].win_probability
+
+    # Predictions don't change the game
+    assert session.query(models.Ship).count() == 1
+    assert combatCrud.predict_battle(session, "planet_a", [("faction_b", "W1W1W1W1", 5)], trials=500, seed=4, workers=1) == (outcomes, draw_probability)
+
+
+def test_predict_battle__invalid(session):
+    FactionFactory(faction_name="faction_a")
+    PlanetFactory(name="planet_a")
+    ShipFactory(owner="faction_a", location="planet_a", modules="W1")
+
+    with pytest.raises(ValueError):
+        combatCrud.predict_battle(session, "planet_b", workers=1)
+    with pytest.raises(ValueError):
+        combatCrud.predict_battle(session, "planet_a", workers=1)
+    with pytest.raises(ValueError):
+        combatCrud.predict_battle(session, "planet_a", [("faction_b", "W1", 1)], trials=0, workers=1)
@@ -0,0 +1,100 @@
+import pytest
+
+from src import models
+from src.crud import connectionCrud, planetCrud
+
+from test.conftest import PlanetFactory
+
+
+def test_get_adjacency_graph(session):
+    planet_a = PlanetFactory(name="planet_a")
+    planet_b = PlanetFactory(name="planet_b")
+    planet_c = PlanetFactory(name="planet_c")
+    planet_a.make_connection(planet_b)
+    planet_a.make_connection(planet_c)
+    session.flush()
+
+    graph = connectionCrud.get_adjacency_graph(session)
+
+    assert graph.neighbors("planet_a") == ["planet_b", "planet_c"]
+    assert graph.neighbors("planet_c") == ["planet_a"]
+
+    # Served from the cache while nothing changes
+    assert connectionCrud.get_adjacency_graph(session) is graph
+
+
+def test_get_adjacency_graph__invalidated_by_flush(session):
+    planet_a = PlanetFactory(name="planet_a")
+    planet_b = PlanetFactory(name="planet_b")
+    session.flush()
+
+    graph = connectionCrud.get_adjacency_graph(session)
+    assert graph.neighbors("planet_a") == []
+
+    planet_a.make_connection(planet_b)
+    session.flush()
+
+    assert connectionCrud.get_adjacency_graph(session) is not graph
+    assert connectionCrud.get_adjacency_graph(session).neighbors("planet_a") == ["planet_b"]
+
+
+def test_get_adjacency_graph__invalidated_by_build_map(session):
+    PlanetFactory(name="planet_a")
+    session.flush()
+
+    graph = connectionCrud.get_adjacency_graph(session)
+
+    planetCrud.build_map(session, [{"name": "planet_b", "size": "s", "resources": 1, "connections": ["planet_a"]}])
+
+    assert connectionCrud.get_adjacency_graph(session) is not graph
+    assert planetCrud.get_connection_names(session, "planet_a") == ["planet_b"]
+
+
+def test_planet_repr(session):
+    planet_a = PlanetFactory(name="planet_a")
+    planet_b = PlanetFactory(name="planet_b")
+    connectionCrud.invalidate_adjacency_graph()
+
+    # Pending connections are shown, and the adjacency graph isn't built
+    planet_a.make_connection(planet_b)
+    assert repr(planet_a) == '<Planet(name="planet_a", connections="[\'planet_b\']")>'
+    assert connectionCrud._cached_graph is None
+
+
+def test_get_route(session):
+    planetCrud.build_map(session, [
+        {"name": "planet_a", "size": "s", "resources": 1, "connections": ["planet_b"]},
+        {"name": "planet_b", "size": "s", "resources": 1, "connections": ["planet_a", "planet_c"]},
+        {"name": "planet_c", "size": "s", "resources": 1, "connections": ["planet_b"]},
+        {"name": "planet_d", "size": "s", "resources": 1, "connections": []}
+    ])
+
+    assert connectionCrud.get_route(session, "planet_a", "planet_c") == ["planet_a", "planet_b", "planet_c"]
+    assert connectionCrud.get_planets_within_jumps(session, "planet_c", 1) == {"planet_b": 1}
+    assert connectionCrud.get_connected_components(session) == [["planet_a", "planet_b", "planet_c"], ["planet_d"]]
+
+    with pytest.raises(ValueError) as e:
+        connectionCrud.get_route(session, "planet_a", "planet_d")
+
+    assert str(e.value) == "There is no route from planet_a to planet_d"
+
+
+def test_connections_stored_once(session):
+    planet_a = PlanetFactory(name="planet_a")
+    planet_b = PlanetFactory(name="planet_b")
+    planet_a.make_connection(planet_b)
+    planet_b.make_connection(planet_a)
+    planetCrud.build_map(session, [{"name": "planet_c", "size": "s", "resources": 1, "connections": ["planet_a", "planet_b"]}])
+
+    rows = session.query(models.PlanetConnection).all()
+    assert len(rows) == 3
+    assert all(planet_a_id < planet_b_id for planet_a_id, planet_b_id in rows)
+
+    assert sorted(planet.name for planet in planet_a.connections) == ["planet_b", "planet_c"]
+    assert connectionCrud.get_neighbor_names(session, "planet_a") == ["planet_b", "planet_c"]
+    assert connectionCrud.get_neighbor_names(session, "planet_c") == ["planet_a", "planet_b"]
+
+    with pytest.raises(ValueError) as e:
+        connectionCrud.get_neighbor_names(session, "planet_x")
+
+    assert str(e.value) == "Planet 'planet_x' does not exist"
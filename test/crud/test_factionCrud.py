@@ -1,5 +1,8 @@
+import pytest
+
 from src.crud import factionCrud
 from src.utils.facilityUtils import FacilityLevel, FacilityType
+from src.utils.planetUtils import SpecialPlanet
 
 from test.conftest import FactionFactory, PlanetFactory, FacilityFactory
 from src import models
@@ -25,6 +28,48 @@ def test_get_resource_income(session):
     assert factionCrud.get_resource_income(session, "faction_1", "rp") == 6
 
 
+def test_get_resource_income__invalid_resource(session):
+    FactionFactory(faction_name="faction_1")
+
+    with pytest.raises(ValueError) as error_info:
+        factionCrud.get_resource_income(session, "faction_1", "not a resource")
+
+    assert str(error_info.value) == "Only 'mp', 'rp', and 'lp' are valid resource types."
+
+
+def test_get_resource_incomes(session):
+    FactionFactory(faction_name="faction_1")
+    FactionFactory(faction_name="faction_2")
+    FactionFactory(faction_name="faction_3")
+
+    PlanetFactory(name="planet_a", owner="faction_1", resources=2, special=SpecialPlanet.ARTIFACT)
+    PlanetFactory(name="planet_b", owner="faction_1", resources=4, special=SpecialPlanet.LOGISTICS)
+    PlanetFactory(name="planet_c", owner="faction_2", resources=3)
+    PlanetFactory(name="planet_d", resources=5)
+
+    FacilityFactory(planet="planet_a", facility_type=FacilityType.FACTORY, level=FacilityLevel.INTERMEDIATE)    # 4 mp
+    FacilityFactory(planet="planet_a", facility_type=FacilityType.LABORATORY, level=FacilityLevel.BASIC)        # 1 + 1 rp
+    FacilityFactory(planet="planet_a", facility_type=FacilityType.LABORATORY, level=FacilityLevel.ADVANCED)     # 4 + 1 rp
+
+    FacilityFactory(planet="planet_b", facility_type=FacilityType.FLEET_HQ, level=FacilityLevel.INTERMEDIATE)   # 4 + 1 lp
+    FacilityFactory(planet="planet_b", facility_type=FacilityType.FACTORY, level=FacilityLevel.BASIC)           # 4 mp
+
+    FacilityFactory(planet="planet_c", facility_type=FacilityType.FLEET_HQ, level=FacilityLevel.ADVANCED)       # 8 lp
+    FacilityFactory(planet="planet_c", facility_type=FacilityType.RADAR, level=FacilityLevel.ADVANCED)          # nothing
+
+    FacilityFactory(planet="planet_d", facility_type=FacilityType.FACTORY, level=FacilityLevel.ADVANCED)        # unowned
+
+    incomes = factionCrud.get_resource_incomes(session)
+
+    assert incomes == {
+        "faction_1": {'mp': 8, 'rp': 7, 'lp': 5},
+        "faction_2": {'mp': 0, 'rp': 0, 'lp': 8},
+        "faction_3": {'mp': 0, 'rp': 0, 'lp': 0}
+    }
+    assert factionCrud.get_resource_incomes(session, ["faction_2"]) == {"faction_2": {'mp': 0, 'rp': 0, 'lp': 8}}
+    assert factionCrud.get_resource_income(session, "faction_1", "rp") == 7
+
+
 def test_set_research(session):
     FactionFactory(faction_name="faction_1")
 
@@ -75,6 +120,39 @@ def test_update_resources(session):
     assert session.query(models.Faction).filter_by(faction_name="faction_1").first().rp == 11
 
 
+def test_update_all_resources(session):
+    FactionFactory(faction_name="faction_1", mp=10, rp=10, lp=3)
+    FactionFactory(faction_name="faction_2", mp=20, rp=5, lp=3)
+    FactionFactory(faction_name="faction_3", mp=30, rp=30, lp=3)
+    PlanetFactory(name="planet_a", resources=5, owner="faction_1")
+    PlanetFactory(name="planet_b", resources=2, owner="faction_2")
+    FacilityFactory(facility_type=FacilityType.FACTORY, planet="planet_a")
+    FacilityFactory(facility_type=FacilityType.LABORATORY, planet="planet_a")
+    FacilityFactory(facility_type=FacilityType.FLEET_HQ, planet="planet_b")
+
+    assert factionCrud.update_all_resources(session) == 3
+
+    def resources(faction_name):
+        faction = session.query(models.Faction).filter_by(faction_name=faction_name).first()
+        return faction.mp, faction.rp, faction.lp
+
+    assert resources("faction_1") == (15, 11, 0)
+    assert resources("faction_2") == (20, 5, 2)
+    assert resources("faction_3") == (30, 30, 0)
+
+    assert factionCrud.update_all_resources(session, ["faction_1"]) == 1
+
+    assert resources("faction_1") == (20, 12, 0)
+    assert resources("faction_2") == (20, 5, 2)
+
+    # Unknown factions aren't counted
+    assert factionCrud.update_all_resources(session, ["faction_2", "faction_4"]) == 1
+    assert factionCrud.update_all_resources(session, ["faction_4"]) == 0
+
+    assert resources("faction_2") == (20, 5, 2)
+    assert session.query(models.Faction).count() == 3
+
+
 def test_spend_resource(session):
     FactionFactory(faction_name="faction_1", mp=50, rp=20)
 
@@ -0,0 +1,60 @@
+from src import models
+from src.crud import galaxyCrud, planetCrud, shipCrud, stateCrud
+from src.utils.galaxyUtils import GalaxyScale, generate_galaxy, generate_ships
+
+scale = GalaxyScale(planets=30, factions=3, ships=200)
+
+
+def test_generate_galaxy__deterministic():
+    galaxy = generate_galaxy(scale, seed=7)
+
+    assert galaxy == generate_galaxy(scale, seed=7)
+    assert list(generate_ships(galaxy)) == list(generate_ships(generate_galaxy(scale, seed=7)))
+    assert galaxy.planets != generate_galaxy(scale, seed=8).planets
+
+
+def test_generate_galaxy__connections():
+    galaxy = generate_galaxy(scale, seed=7)
+    planets = {planet['name']: planet for planet in galaxy.planets}
+
+    for planet in galaxy.planets:
+        assert len(planet['connections']) == len(set(planet['connections']))
+        for neighbor in planet['connections']:
+            assert planet['name'] in planets[neighbor]['connections']
+
+    # Every planet can be reached from the first one
+    reached = {galaxy.planets[0]['name']}
+    frontier = [galaxy.planets[0]['name']]
+    while frontier:
+        for neighbor in planets[frontier.pop()]['connections']:
+            if neighbor not in reached:
+                reached.add(neighbor)
+                frontier.append(neighbor)
+
+    assert reached == set(planets.keys())
+
+
+def test_load_galaxy(session):
+    galaxy = generate_galaxy(scale, seed=7)
+
+    galaxyCrud.load_galaxy(session, galaxy, batch_size=50)
+
+    assert session.query(models.Faction).count() == scale.factions
+    assert session.query(models.Planet).count() == scale.planets
+    assert session.query(models.Ship).count() == scale.ships
+    assert session.query(models.Facility).count() == len(galaxy.facilities)
+    assert stateCrud.get_versions(session)[stateCrud.SHIPS] == 1
+
+    for planet in galaxy.planets[:5]:
+        assert sorted(planetCrud.get_connection_names(session, planet['name'])) == sorted(planet['connections'])
+
+    for planet_name, (owner, colony_size, garrison_points) in list(galaxy.colonies.items())[:5]:
+        db_planet = planetCrud.get_planet_by_name(session, planet_name)
+        assert (db_planet.owner, db_planet.colony_size, db_planet.garrison_points) == (owner, colony_size, garrison_points)
+
+    # Ship stats are filled in from the modules, as they are for ships created one at a time
+    for ship in shipCrud.get_ships(session)[:20]:
+        if ship.modules != "COLONY":
+            assert ship.max_hp == ship.hit_points == len(ship.modules) / 2
+            assert ship.stealth_level == ship.modules.count('C')
+            assert ship.detection_level == ship.modules.count('S')
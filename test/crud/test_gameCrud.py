@@ -0,0 +1,131 @@
+import io
+import json
+
+import pytest
+from sqlalchemy import select
+
+from src import models
+from src.crud import galaxyCrud, gameCrud, reportCrud, stateCrud
+from src.utils.db import Database
+from src.utils.galaxyUtils import GalaxyScale, generate_galaxy
+
+
+def dump_tables(db):
+    return {
+        table.name: sorted(db.execute(select([table])).fetchall(), key=repr)
+        for table in gameCrud.saved_tables
+    }
+
+
+def saved_galaxy(tmp_path):
+    db = Database(f"sqlite:///{tmp_path / 'saved.db'}").get_db()
+    galaxyCrud.load_galaxy(db, generate_galaxy(GalaxyScale(planets=30, factions=3, ships=200), seed=3))
+
+    save_file = io.StringIO()
+    gameCrud.save_game(db, save_file, batch_size=40)
+    save_file.seek(0)
+    return db, save_file
+
+
+def test_save_and_load_game(tmp_path):
+    saved_db, save_file = saved_galaxy(tmp_path)
+
+    db = Database(f"sqlite:///{tmp_path / 'loaded.db'}").get_db()
+    galaxyCrud.load_galaxy(db, generate_galaxy(GalaxyScale(planets=5, factions=1, ships=5), seed=1))
+    reportCrud.cache_section(db, "faction_0", "ships", "", ["cached"])
+    versions = stateCrud.get_versions(db)
+
+    gameCrud.load_game(db, save_file, batch_size=25)
+
+    assert dump_tables(db) == dump_tables(saved_db)
+    assert db.query(models.ReportCache).count() == 0
+    assert all(stateCrud.get_versions(db)[domain] > versions[domain] for domain in stateCrud.all_domains)
+
+
+def test_load_game__invalid_row(tmp_path):
+    _, save_file = saved_galaxy(tmp_path)
+    lines = save_file.getvalue().splitlines(keepends=True)
+
+    db = Database(f"sqlite:///{tmp_path / 'loaded.db'}").get_db()
+    galaxyCrud.load_galaxy(db, generate_galaxy(GalaxyScale(planets=5, factions=1, ships=5), seed=1))
+    before = dump_tables(db)
+
+    with pytest.raises(ValueError) as e:
+        gameCrud.load_game(db, io.StringIO(''.join(lines[:40] + ['["Planet", \n'] + lines[40:])))
+
+    assert str(e.value) == "Invalid row at line 41"
+    assert dump_tables(db) == before
+
+
+def test_load_game__inconsistent(tmp_path):
+    _, save_file = saved_galaxy(tmp_path)
+    lines = save_file.getvalue().splitlines(keepends=True)
+    header = json.loads(lines[0])
+    owner_index = header['tables']['Ship'].index('owner')
+    ship_line = next(index for index, line in enumerate(lines) if line.startswith('["Ship"'))
+    table_name, values = json.loads(lines[ship_line])
+    values[owner_index] = "missing_faction"
+    lines[ship_line] = json.dumps([table_name, values]) + '\n'
+
+    db = Database(f"sqlite:///{tmp_path / 'loaded.db'}").get_db()
+    galaxyCrud.load_galaxy(db, generate_galaxy(GalaxyScale(planets=5, factions=1, ships=5), seed=1))
+    before = dump_tables(db)
+
+    with pytest.raises(ValueError) as e:
+        gameCrud.load_game(db, io.StringIO(''.join(lines)))
+
+    assert str(e.value) == "Save file is inconsistent: FOREIGN KEY constraint failed"
+    assert dump_tables(db) == before
+
+
+@pytest.mark.parametrize("change", [lambda values: values[:-1], lambda values: values + [None]])
+def test_load_game__wrong_number_of_values(tmp_path, change):
+    _, save_file = saved_galaxy(tmp_path)
+    lines = save_file.getvalue().splitlines(keepends=True)
+    table_name, values = json.loads(lines[1])
+    lines[1] = json.dumps([table_name, change(values)]) + '\n'
+
+    db = Database(f"sqlite:///{tmp_path / 'loaded.db'}").get_db()
+    galaxyCrud.load_galaxy(db, generate_galaxy(GalaxyScale(planets=5, factions=1, ships=5), seed=1))
+    before = dump_tables(db)
+
+    with pytest.raises(ValueError) as e:
+        gameCrud.load_game(db, io.StringIO(''.join(lines)))
+
+    assert str(e.value) == f"Save file is inconsistent: the {table_name} row at line 2 does not have {len(values)} values"
+    assert dump_tables(db) == before
+
+
+def test_load_game__unsupported_version(session):
+    with pytest.raises(ValueError) as e:
+        gameCrud.load_game(session, io.StringIO('{"format": "spaceGame save", "version": 99}\n'))
+
+    assert str(e.value) == f"Unsupported save file version 99 (expected {gameCrud.save_format_version})"
+
+
+def test_load_game__version_1(tmp_path):
+    saved_db, save_file = saved_galaxy(tmp_path)
+
+    # Version 1 saves have no ShipDesign table and no Ship.design_id column
+    lines = save_file.getvalue().splitlines()
+    header = json.loads(lines[0])
+    design_id_index = header['tables']['Ship'].index('design_id')
+    header['version'] = 1
+    del header['tables']['ShipDesign']
+    header['tables']['Ship'].remove('design_id')
+
+    rows = []
+    for line in lines[1:]:
+        table_name, values = json.loads(line)
+        if table_name == 'Ship':
+            del values[design_id_index]
+        if table_name != 'ShipDesign':
+            rows.append(json.dumps([table_name, values]))
+
+    db = Database(f"sqlite:///{tmp_path / 'loaded.db'}").get_db()
+    gameCrud.load_game(db, io.StringIO('\n'.join([json.dumps(header)] + rows) + '\n'))
+
+    ships = dict(db.query(models.Ship.id, models.Ship.modules))
+    assert ships == dict(saved_db.query(models.Ship.id, models.Ship.modules))
+    assert db.query(models.Ship).filter(models.Ship.design_id.is_(None)).count() == 0
+    assert db.query(models.ShipDesign).count() == len(set(ships.values()))
@@ -1,9 +1,10 @@
 import pytest
 
-from src.crud import planetCrud
+from src.crud import connectionCrud, planetCrud, stateCrud
 from src.models import Planet
 from src.utils.colonyUtils import ColonyType
 from src.utils.facilityUtils import FacilityLevel, FacilityType
+from src.utils.galaxyUtils import generate_map
 from src.utils.planetUtils import SpecialPlanet
 from test.conftest import PlanetFactory, ShipFactory, FactionFactory, FacilityFactory
 
@@ -56,11 +57,123 @@ def test_build_map(session):
     )
 
 
+def test_build_map__existing_neighbor(session):
+    planet_a = PlanetFactory(name="planet_a")
+
+    planetCrud.build_map(session, [
+        {"name": "planet_b", "size": "s", "resources": 2, "special": "Forge World", "connections": ["planet_a", "planet_c"]},
+        {"name": "planet_c", "size": "m", "resources": 3, "connections": ["planet_b"]}
+    ])
+
+    assert planetCrud.get_planet_by_name(session, "planet_b").special == SpecialPlanet.FORGE
+    assert sorted(planetCrud.get_connection_names(session, "planet_b")) == ["planet_a", "planet_c"]
+    assert list(map(lambda planet: planet.name, planet_a.connections)) == ["planet_b"]
+
+
+def test_build_map__unknown_neighbor(session):
+    with pytest.raises(ValueError) as e:
+        planetCrud.build_map(session, [
+            {"name": "planet_a", "size": "s", "resources": 2, "connections": ["planet_x"]}
+        ])
+
+    assert str(e.value) == "Planet 'planet_x' does not exist"
+    assert session.query(Planet).count() == 0
+
+
+def test_update_map(session):
+    FactionFactory(faction_name="faction_a")
+    planetCrud.build_map(session, [
+        {"name": "planet_a", "size": "s", "resources": 1, "connections": ["planet_b", "planet_c"]},
+        {"name": "planet_b", "size": "s", "resources": 1, "connections": ["planet_a", "planet_c"]},
+        {"name": "planet_c", "size": "s", "resources": 1, "connections": ["planet_a", "planet_b"]}
+    ])
+    planetCrud.claim_planet(session, "planet_a", "faction_a")
+    ShipFactory(owner="faction_a", location="planet_a")
+    FacilityFactory(planet="planet_a", facility_type=FacilityType.FACTORY)
+    versions = stateCrud.get_versions(session)
+
+    changes = planetCrud.update_map(session, [
+        {"name": "planet_a", "size": "m", "resources": 4, "special": "Forge World", "connections": ["planet_b"]},
+        {"name": "planet_b", "size": "s", "resources": 1, "connections": ["planet_a"]},
+        {"name": "planet_d", "size": "l", "resources": 2, "connections": ["planet_c"]}
+    ], batch_size=2)
+
+    assert changes == planetCrud.MapUpdate(inserted=1, updated=1, connections_added=1, connections_removed=2)
+
+    planet_a = planetCrud.get_planet_by_name(session, "planet_a")
+    assert (planet_a.size, planet_a.resources, planet_a.special, planet_a.owner) == ("m", 4, SpecialPlanet.FORGE, "faction_a")
+    assert len(planet_a.ships) == 1 and len(planet_a.facilities) == 1
+
+    assert planetCrud.get_connection_names(session, "planet_a") == ["planet_b"]
+    assert planetCrud.get_connection_names(session, "planet_c") == ["planet_d"]
+    assert planetCrud.get_connection_names(session, "planet_d") == ["planet_c"]
+
+    new_versions = stateCrud.get_versions(session)
+    assert new_versions[stateCrud.PLANETS] > versions[stateCrud.PLANETS]
+    assert new_versions[stateCrud.CONNECTIONS] > versions[stateCrud.CONNECTIONS]
+
+
+def test_update_map__few_planets(session):
+    # Few enough planets (compared to the map) that rows are looked up by name rather than scanned
+    planets = generate_map(12, seed=2)
+    planetCrud.build_map(session, planets)
+    planet_a = planets[0]
+
+    changes = planetCrud.update_map(session, [
+        dict(planet_a, resources=planet_a['resources'] % 5 + 1, connections=planet_a['connections'][1:] + ["planet_new"]),
+        {"name": "planet_new", "size": "s", "resources": 1, "connections": [planet_a['name']]}
+    ], batch_size=1)
+
+    assert changes == planetCrud.MapUpdate(inserted=1, updated=1, connections_added=1, connections_removed=1)
+    assert planetCrud.get_connection_names(session, planet_a['name']) == sorted(planet_a['connections'][1:] + ["planet_new"])
+
+
+def test_update_map__unchanged(session):
+    planets = [
+        {"name": "planet_a", "size": "s", "resources": 1, "connections": ["planet_b"]},
+        {"name": "planet_b", "size": "m", "resources": "2", "special": "Throne World", "connections": ["planet_a"]}
+    ]
+    planetCrud.build_map(session, planets)
+    versions = stateCrud.get_versions(session)
+
+    assert planetCrud.update_map(session, planets) == planetCrud.MapUpdate(0, 0, 0, 0)
+    assert stateCrud.get_versions(session) == versions
+
+
+def test_update_map__unconnected_planet(session):
+    planetCrud.build_map(session, [
+        {"name": "planet_a", "size": "s", "resources": 1, "connections": ["planet_b"]},
+        {"name": "planet_b", "size": "s", "resources": 1, "connections": ["planet_a"]}
+    ])
+    assert connectionCrud.get_route(session, "planet_a", "planet_b") == ["planet_a", "planet_b"]
+
+    planetCrud.update_map(session, [{"name": "planet_c", "size": "m", "resources": 2, "connections": []}])
+
+    # The adjacency graph cached before the update has to be rebuilt to include the new planet
+    assert connectionCrud.get_route(session, "planet_c", "planet_c") == ["planet_c"]
+    assert connectionCrud.get_connected_components(session) == [["planet_a", "planet_b"], ["planet_c"]]
+    with pytest.raises(ValueError) as e:
+        connectionCrud.get_route(session, "planet_a", "planet_c")
+
+    assert str(e.value) == "There is no route from planet_a to planet_c"
+
+
+def test_update_map__unknown_neighbor(session):
+    PlanetFactory(name="planet_a", size="s", resources=1)
+
+    with pytest.raises(ValueError) as e:
+        planetCrud.update_map(session, [
+            {"name": "planet_a", "size": "l", "resources": 2, "connections": ["planet_x"]}
+        ])
+
+    assert str(e.value) == "Planet 'planet_x' does not exist"
+    assert planetCrud.get_planet_by_name(session, "planet_a").size == "s"
+
+
 def test_get_planets(session):
     planet_a = PlanetFactory(name="planet_a", size="s", resources=4, special=SpecialPlanet.STANDARD)
     planet_b = PlanetFactory(name="planet_b", size="m", resources=3, special=SpecialPlanet.LOGISTICS)
-    planet_a.connections = [planet_b]
-    planet_b.connections = [planet_a]
+    planet_a.make_connection(planet_b)
 
     stored_planets = planetCrud.get_planets(session)
     assert planet_a in stored_planets
@@ -107,6 +220,32 @@ def test_get_planets_by_faction(session):
     assert "planet_c" in list(map(lambda planet: planet.name, observed))
 
 
+def test_get_planets_by_faction__multiple_ships(session):
+    faction_name = "faction_1"
+
+    # Owned planet with a faction ship in orbit is only controlled
+    PlanetFactory(name="planet_a", owner=faction_name)
+    ShipFactory(location="planet_a", owner=faction_name)
+
+    # Several faction ships in orbit of one planet
+    PlanetFactory(name="planet_c", owner="faction_2")
+    ShipFactory(location="planet_c", owner=faction_name)
+    ShipFactory(location="planet_c", owner=faction_name)
+
+    # Observed planets are returned sorted by name
+    PlanetFactory(name="planet_b")
+    ShipFactory(location="planet_b", owner=faction_name)
+
+    # Only other factions' ships in orbit
+    PlanetFactory(name="planet_d")
+    ShipFactory(location="planet_d", owner="faction_2")
+
+    owned_and_controlled = planetCrud.get_planets_by_faction(session, faction_name)
+
+    assert list(map(lambda planet: planet.name, owned_and_controlled['controlled'])) == ["planet_a"]
+    assert list(map(lambda planet: planet.name, owned_and_controlled['observed'])) == ["planet_b", "planet_c"]
+
+
 def test_get_planet_by_name(session):
     PlanetFactory(name="planet_a")
     PlanetFactory(name="planet_b")
@@ -274,6 +413,13 @@ def test_planet_visible_by_faction__unowned_without_ship(session):
     assert not planetCrud.planet_visible_by_faction(session, "planet_a", "faction_1")
 
 
+def test_planet_visible_by_faction__non_existent_planet(session):
+    with pytest.raises(ValueError) as error_info:
+        planetCrud.planet_visible_by_faction(session, "not_a_planet", "faction_1")
+
+    assert str(error_info.value) == "Planet 'not_a_planet' does not exist"
+
+
 def test_get_connection_names(session):
     map_fixture = [
         {
@@ -0,0 +1,61 @@
+from src.crud import reportCrud
+
+
+def cached_text(session, faction_name, section):
+    return ''.join(reportCrud.iter_cached_section(session, faction_name, section))
+
+
+def test_cache_section(session):
+    reportCrud.cache_section(session, "faction_1", "research", "faction:1", ["research text"])
+    reportCrud.cache_section(session, "faction_1", "planets", "planet:1", ["planets ", "text"])
+    reportCrud.cache_section(session, "faction_2", "research", "faction:1", ["other text"])
+    session.commit()
+
+    assert reportCrud.get_cached_versions(session, ["faction_1"]) == {
+        ("faction_1", "research"): "faction:1",
+        ("faction_1", "planets"): "planet:1"
+    }
+    assert list(reportCrud.iter_cached_section(session, "faction_1", "planets")) == ["planets ", "text"]
+
+    # Re-caching a section replaces it
+    reportCrud.cache_section(session, "faction_1", "planets", "planet:2", ["new planets text"])
+    session.commit()
+
+    assert reportCrud.get_cached_versions(session, ["faction_1"])[("faction_1", "planets")] == "planet:2"
+    assert cached_text(session, "faction_1", "planets") == "new planets text"
+
+
+def test_cache_section__empty(session):
+    reportCrud.cache_section(session, "faction_1", "planets", "planet:1", [])
+
+    assert reportCrud.get_cached_versions(session, ["faction_1"]) == {("faction_1", "planets"): "planet:1"}
+    assert cached_text(session, "faction_1", "planets") == ""
+
+
+def test_stream_section_into_cache(session):
+    chunks = (f"entry {i}\n" for i in range(1200))
+
+    streamed = list(reportCrud.stream_section_into_cache(session, "faction_1", "planets", "planet:1", chunks, batch_size=500))
+
+    assert streamed == [f"entry {i}\n" for i in range(1200)]
+    assert list(reportCrud.iter_cached_section(session, "faction_1", "planets")) == streamed
+
+
+def test_stream_section_into_cache__not_exhausted(session):
+    reportCrud.cache_section(session, "faction_1", "planets", "planet:1", ["old text"])
+
+    stream = reportCrud.stream_section_into_cache(session, "faction_1", "planets", "planet:2", ["new ", "text"])
+    next(stream)
+    stream.close()
+
+    # A partially streamed section is never reported as cached
+    assert reportCrud.get_cached_versions(session, ["faction_1"]).get(("faction_1", "planets")) is None
+
+
+def test_clear_report_cache(session):
+    reportCrud.cache_section(session, "faction_1", "research", "faction:1", ["research text"])
+    session.commit()
+
+    reportCrud.clear_report_cache(session)
+
+    assert reportCrud.get_cached_versions(session, ["faction_1"]) == {}
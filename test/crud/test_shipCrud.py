@@ -1,4 +1,6 @@
-from src.crud import shipCrud
+import json
+
+from src.crud import planetCrud, shipCrud, stateCrud
 from src.utils import shipUtils
 from src.utils.facilityUtils import FacilityType, FacilityLevel
 
@@ -23,6 +25,40 @@ def test_validate_module_str():
     assert not shipUtils.validate_module_str('m')
 
 
+def test_read_ships_file__json(tmp_path):
+    ships_file = tmp_path / "ships.json"
+    ships_file.write_text(json.dumps({"ships": [
+        {"owner": "faction_a", "location": "planet_a", "modules": "w1d2"},
+        {"owner": "faction_a", "location": "planet_b", "modules": "COLONY"},
+        {"owner": "faction_b", "location": "planet_a", "modules": "X1"},
+        {"owner": "faction_b", "modules": "W1"}
+    ]}))
+
+    ships, errors = shipUtils.read_ships_file(str(ships_file))
+
+    assert ships == [
+        {"owner": "faction_a", "location": "planet_a", "modules": "W1D2"},
+        {"owner": "faction_a", "location": "planet_b", "modules": "COLONY"}
+    ]
+    assert len(errors) == 2
+    assert errors[0].startswith("ships[2] (line 1): Invalid modules string 'X1'")
+    assert errors[1] == "ships[3] (line 1): 'location' is required and must be a string."
+
+
+def test_read_ships_file__csv(tmp_path):
+    ships_file = tmp_path / "ships.csv"
+    ships_file.write_text("owner,location,modules\nfaction_a,planet_a,W1D2\nfaction_b,planet_b,W0\n")
+
+    ships, errors = shipUtils.read_ships_file(str(ships_file))
+
+    assert ships == [{"owner": "faction_a", "location": "planet_a", "modules": "W1D2"}]
+    assert len(errors) == 1
+    assert errors[0].startswith("row 2 (line 3): Invalid modules string 'W0'")
+
+    ships_file.write_text("owner,modules\nfaction_a,W1\n")
+    assert shipUtils.read_ships_file(str(ships_file)) == ([], ["Missing column(s) location in the header row"])
+
+
 def test_get_ships(session):
     ShipFactory(id='a')
     ShipFactory(id='b')
@@ -121,8 +157,7 @@ def test_get_visible_ships_on_planet__radar_detection(session):
     # Advanced radar adjacent
     planet_e1 = PlanetFactory(name="planet_e1")
     planet_e2 = PlanetFactory(name="planet_e2", owner="faction_1")
-    planet_e1.connections = [planet_e2]
-    planet_e2.connections = [planet_e1]
+    planet_e1.make_connection(planet_e2)
     FacilityFactory(planet="planet_e2", facility_type=FacilityType.RADAR, level=FacilityLevel.ADVANCED)
     ShipFactory(id="l", owner="faction_2", location="planet_e1", modules="C1")
     ShipFactory(id="m", owner="faction_2", location="planet_e1", modules="C1C1")
@@ -143,9 +178,62 @@ def test_get_visible_ships_on_planet__radar_detection(session):
     assert ships_to_id_list(planet_f_ships) == ['n']
 
 
-def test_move_ships(session):
+def test_get_detection_matrix(session):
+    # Sensors only
     PlanetFactory(name="planet_a")
-    PlanetFactory(name="planet_b")
+    ShipFactory(owner="faction_1", location="planet_a", modules="S1")
+    ShipFactory(owner="faction_1", location="planet_a", modules="S1S1")
+    ShipFactory(owner="faction_2", location="planet_a", modules="D1")
+
+    # Owned planet with radar, plus sensors
+    PlanetFactory(name="planet_b", owner="faction_1")
+    FacilityFactory(planet="planet_b", facility_type=FacilityType.RADAR, level=FacilityLevel.BASIC)
+    ShipFactory(owner="faction_1", location="planet_b", modules="S1")
+
+    # Two adjacent advanced radars owned by the same faction
+    planet_c = PlanetFactory(name="planet_c")
+    planet_d = PlanetFactory(name="planet_d", owner="faction_2")
+    planet_e = PlanetFactory(name="planet_e", owner="faction_2")
+    planet_c.make_connection(planet_d)
+    planet_c.make_connection(planet_e)
+    FacilityFactory(planet="planet_d", facility_type=FacilityType.RADAR, level=FacilityLevel.ADVANCED)
+    FacilityFactory(planet="planet_d", facility_type=FacilityType.RADAR, level=FacilityLevel.ADVANCED)
+    FacilityFactory(planet="planet_e", facility_type=FacilityType.RADAR, level=FacilityLevel.ADVANCED)
+
+    # Radar on an unowned planet
+    PlanetFactory(name="planet_f")
+    FacilityFactory(planet="planet_f", facility_type=FacilityType.RADAR, level=FacilityLevel.ADVANCED)
+
+    detection_matrix = shipUtils.get_detection_matrix(session)
+
+    for planet_name in ["planet_a", "planet_b", "planet_c", "planet_d", "planet_e", "planet_f"]:
+        for faction_name in ["faction_1", "faction_2", "faction_3"]:
+            assert shipUtils.get_detection_level(detection_matrix, planet_name, faction_name) == \
+                shipUtils.determine_effective_detection_level(session, planet_name, faction_name)
+
+    assert shipUtils.get_detection_level(detection_matrix, "planet_a", "faction_1") == 2
+    assert shipUtils.get_detection_level(detection_matrix, "planet_b", "faction_1") == 12
+    assert shipUtils.get_detection_level(detection_matrix, "planet_c", "faction_2") == 22
+    assert shipUtils.get_detection_level(detection_matrix, "planet_f", "faction_1") == 0
+
+
+def test_get_visible_ships_on_planet__detection_matrix(session):
+    PlanetFactory(name="planet_a")
+    ShipFactory(id="a", owner="faction_1", location="planet_a", modules="S1")
+    ShipFactory(id="b", owner="faction_2", location="planet_a", modules="C1")
+    ShipFactory(id="c", owner="faction_2", location="planet_a", modules="C1C1")
+
+    detection_matrix = shipUtils.get_detection_matrix(session)
+
+    visible_ships = shipCrud.get_visible_ships_on_planet(session, "planet_a", "faction_1", detection_matrix)
+
+    assert ships_to_id_list(visible_ships) == ['a', 'b']
+
+
+def test_move_ships(session):
+    planet_a = PlanetFactory(name="planet_a")
+    planet_b = PlanetFactory(name="planet_b")
+    planet_a.make_connection(planet_b)
     ShipFactory(id="a", location="planet_a", modules="D1")
     ShipFactory(id="b", location="planet_a", modules="D1")
     ShipFactory(id="c", location="planet_a", modules="D1")
@@ -171,9 +259,29 @@ def test_move_ships__invalid(session):
     assert str(error_info.value) == "Ships must have the same origin location."
 
 
+def test_move_ships__not_connected(session):
+    planet_a = PlanetFactory(name="planet_a")
+    planet_b = PlanetFactory(name="planet_b")
+    PlanetFactory(name="planet_c")
+    planet_a.make_connection(planet_b)
+    ShipFactory(id="a", location="planet_a", modules="D1")
+
+    def move_error(ship_ids, destination_name):
+        with pytest.raises(ValueError) as error_info:
+            shipCrud.move_ships(session, ship_ids, destination_name)
+        return str(error_info.value)
+
+    assert move_error(["a"], "planet_c") == "planet_a is not connected to planet_c"
+    assert move_error(["a"], "planet_x") == "Planet 'planet_x' does not exist"
+    assert move_error(["a", "x"], "planet_b") == "Ship 'x' does not exist"
+    assert move_error([], "planet_b") == "No ships to move."
+    assert shipCrud.get_ship_by_id(session, "a").location == "planet_a"
+
+
 def test_move_ships__singular(session):
-    PlanetFactory(name="planet_a")
-    PlanetFactory(name="planet_b")
+    planet_a = PlanetFactory(name="planet_a")
+    planet_b = PlanetFactory(name="planet_b")
+    planet_a.make_connection(planet_b)
     ShipFactory(id="a", location="planet_a", modules="D1")
 
     shipCrud.move_ship(session, "a", "planet_b")
@@ -181,6 +289,57 @@ def test_move_ships__singular(session):
     assert shipCrud.get_ship_by_id(session, "a").location == "planet_b"
 
 
+def build_line_map(session):
+    """planet_a - planet_b - planet_c - planet_d"""
+    planetCrud.build_map(session, [
+        {"name": "planet_a", "size": "s", "resources": 1, "connections": ["planet_b"]},
+        {"name": "planet_b", "size": "s", "resources": 1, "connections": ["planet_a", "planet_c"]},
+        {"name": "planet_c", "size": "s", "resources": 1, "connections": ["planet_b", "planet_d"]},
+        {"name": "planet_d", "size": "s", "resources": 1, "connections": ["planet_c"]}
+    ])
+
+
+def test_move_fleet_along_route(session):
+    build_line_map(session)
+    ShipFactory(id="a", location="planet_a")
+    ShipFactory(id="b", location="planet_a")
+    ShipFactory(id="c", location="planet_a")
+
+    route = shipCrud.move_fleet_along_route(session, ["a", "b"], "planet_d")
+
+    assert route == ["planet_a", "planet_b", "planet_c", "planet_d"]
+    assert ships_to_id_list(shipCrud.get_ships_on_planet(session, "planet_d")) == ["a", "b"]
+    assert ships_to_id_list(shipCrud.get_ships_on_planet(session, "planet_a")) == ["c"]
+
+
+def test_move_fleet_along_route__given_route(session):
+    build_line_map(session)
+    ShipFactory(id="a", location="planet_b")
+
+    shipCrud.move_fleet_along_route(session, ["a"], "planet_d", route=["planet_b", "planet_c", "planet_d"])
+
+    assert shipCrud.get_ship_by_id(session, "a").location == "planet_d"
+
+
+def test_move_fleet_along_route__invalid(session):
+    build_line_map(session)
+    ShipFactory(id="a", location="planet_a")
+    ShipFactory(id="b", location="planet_b")
+
+    def move_error(*args, **kwargs):
+        with pytest.raises(ValueError) as error_info:
+            shipCrud.move_fleet_along_route(session, *args, **kwargs)
+        return str(error_info.value)
+
+    assert move_error(["a", "b"], "planet_d") == "Ships must have the same origin location."
+    assert move_error(["a", "x"], "planet_d") == "Ship 'x' does not exist"
+    assert move_error(["a"], "planet_d", max_hops=2) == "Route from planet_a to planet_d takes 3 jumps, more than the maximum of 2"
+    assert move_error(["a"], "planet_d", route=["planet_a", "planet_c", "planet_d"]) == "planet_a is not connected to planet_c"
+    assert move_error(["a"], "planet_d", route=["planet_b", "planet_c", "planet_d"]) == "Route must start at planet_a and end at planet_d"
+
+    assert shipCrud.get_ship_by_id(session, "a").location == "planet_a"
+
+
 def test_create_ship_from_dict(session):
     PlanetFactory(name="planet_a")
     PlanetFactory(name="planet_b")
@@ -234,7 +393,10 @@ def test_retrofit_ship(session):
     assert str(error_info_colony.value) == "Cannot retrofit colony ship"
     assert str(error_info_invalid.value) == "New modules 'Q3Z5' includes invalid modules"
     assert str(error_info_length.value) == "Ship 'ship_b' must have exactly 2 modules"
-    assert session.query(models.Ship).filter_by(id="ship_b").first().modules == "W4S2"
+
+    ship_b = session.query(models.Ship).filter_by(id="ship_b").first()
+    assert (ship_b.modules, ship_b.max_hp, ship_b.stealth_level, ship_b.detection_level) == ("W4S2", 2, 0, 1)
+    assert ship_b.design.modules == "W4S2"
 
 
 def test_restore_ship_hp(session):
@@ -258,6 +420,74 @@ def test_restore_all(session):
     assert session.query(models.Ship).filter_by(id="ship_b").first().hit_points == 3
 
 
+def test_restore_all__filtered(session):
+    FactionFactory(faction_name="faction_a")
+    FactionFactory(faction_name="faction_b")
+    PlanetFactory(name="planet_a", owner="faction_a")
+    PlanetFactory(name="planet_b", owner="faction_a")
+    FacilityFactory(planet="planet_a", facility_type=FacilityType.SHIPYARD)
+    FacilityFactory(planet="planet_b", facility_type=FacilityType.FACTORY)
+    ShipFactory(id="ship_a", owner="faction_a", location="planet_a", modules="D1D1", hit_points=1)
+    ShipFactory(id="ship_b", owner="faction_b", location="planet_a", modules="D1D1", hit_points=1)
+    ShipFactory(id="ship_c", owner="faction_a", location="planet_b", modules="D1D1", hit_points=1)
+    ShipFactory(id="ship_d", owner="faction_b", location="planet_b", modules="D1D1", hit_points=1)
+
+    def hit_points():
+        return dict(session.query(models.Ship.id, models.Ship.hit_points))
+
+    # Only faction_a's ship on its own shipyard planet
+    assert shipCrud.restore_all(session, at_friendly_shipyard=True) == 1
+    assert hit_points() == {"ship_a": 2, "ship_b": 1, "ship_c": 1, "ship_d": 1}
+
+    assert shipCrud.restore_all(session, faction_name="faction_b", planet_name="planet_b") == 1
+    assert hit_points() == {"ship_a": 2, "ship_b": 1, "ship_c": 1, "ship_d": 2}
+
+    assert shipCrud.restore_all(session, planet_name="planet_a") == 2
+    assert hit_points() == {"ship_a": 2, "ship_b": 2, "ship_c": 1, "ship_d": 2}
+
+
+def test_import_ships(session):
+    FactionFactory(faction_name="faction_a")
+    FactionFactory(faction_name="faction_b")
+    PlanetFactory(name="planet_a")
+    PlanetFactory(name="planet_b")
+    ship_version = stateCrud.get_version(session, stateCrud.SHIPS)
+
+    imported = shipCrud.import_ships(session, [
+        {"owner": "faction_a", "location": "planet_a", "modules": "W1C1S2"},
+        {"owner": "faction_b", "location": "planet_b", "modules": "W1C1S2"},
+        {"owner": "faction_b", "location": "planet_a", "modules": "COLONY"}
+    ])
+
+    assert imported == 3
+    assert stateCrud.get_version(session, stateCrud.SHIPS) == ship_version + 1
+
+    ships = session.query(models.Ship).order_by(models.Ship.owner, models.Ship.location).all()
+    assert [(ship.owner, ship.location, ship.modules) for ship in ships] == [
+        ("faction_a", "planet_a", "W1C1S2"),
+        ("faction_b", "planet_a", "COLONY"),
+        ("faction_b", "planet_b", "W1C1S2")
+    ]
+    assert [(ship.max_hp, ship.hit_points, ship.stealth_level, ship.detection_level) for ship in ships] == [(3, 3, 1, 1), (1, 1, 1, 0), (3, 3, 1, 1)]
+    assert ships[0].design_id == ships[2].design_id
+    assert len(set(ship.id for ship in ships)) == 3
+
+
+def test_import_ships__unknown_owners_and_locations(session):
+    FactionFactory(faction_name="faction_a")
+    PlanetFactory(name="planet_a")
+
+    with pytest.raises(ValueError) as error:
+        shipCrud.import_ships(session, [
+            {"owner": "faction_a", "location": "planet_a", "modules": "W1"},
+            {"owner": "faction_b", "location": "planet_b", "modules": "W1"},
+            {"owner": "faction_c", "location": "planet_a", "modules": "W1"}
+        ])
+
+    assert str(error.value) == "Faction 'faction_b' does not exist\nFaction 'faction_c' does not exist\nPlanet 'planet_b' does not exist"
+    assert session.query(models.Ship).count() == 0
+
+
 def test_damage_ship(session):
     ShipFactory(id="ship_a", modules="W1D1")
     ShipFactory(id="ship_b", modules="D1D1D1")
@@ -0,0 +1,46 @@
+from src import models
+from src.crud import shipCrud, shipDesignCrud
+from src.schemas import ShipCreate
+from test.conftest import FactionFactory, PlanetFactory, ShipFactory
+
+
+def test_intern_designs(session):
+    design_ids = shipDesignCrud.intern_designs(session, ["W1D1", "C1S1S2", "W1D1"])
+    assert len(set(design_ids.values())) == 2
+
+    # Existing designs are reused
+    assert shipDesignCrud.intern_designs(session, ["C1S1S2", "COLONY"], batch_size=1)["C1S1S2"] == design_ids["C1S1S2"]
+    assert session.query(models.ShipDesign).count() == 3
+
+    design = session.query(models.ShipDesign).get(design_ids["C1S1S2"])
+    assert (design.ecm_suite, design.sensor_array, design.warp_drive) == (1, 2, 0)
+    assert (design.size, design.max_hp, design.stealth_level, design.detection_level) == (3, 3, 1, 2)
+
+
+def test_create_ship__shared_design(session):
+    FactionFactory(faction_name="faction_a")
+    PlanetFactory(name="planet_a")
+
+    ship_a = shipCrud.create_ship(session, ShipCreate(owner="faction_a", modules="W1S1", location="planet_a"))
+    ship_b = shipCrud.create_ship(session, ShipCreate(owner="faction_a", modules="W1S1", location="planet_a"))
+
+    assert ship_a.design_id is not None
+    assert ship_a.design_id == ship_b.design_id
+    assert (ship_a.max_hp, ship_a.detection_level) == (ship_a.design.max_hp, ship_a.design.detection_level)
+
+
+def test_assign_missing_designs(session):
+    ShipFactory(id="ship_a", modules="W1C1", stealth_level=0)
+    ShipFactory(id="ship_b", modules="W1C1", stealth_level=0)
+    ShipFactory(id="ship_c", modules="COLONY")
+    session.flush()
+
+    assert shipDesignCrud.assign_missing_designs(session) == 3
+    assert shipDesignCrud.assign_missing_designs(session) == 0
+
+    session.expire_all()
+    ships = {ship.id: ship for ship in session.query(models.Ship)}
+    assert ships["ship_a"].design_id is not None
+    assert ships["ship_a"].design_id == ships["ship_b"].design_id
+    assert ships["ship_a"].stealth_level == 1
+    assert ships["ship_c"].design.modules == "COLONY"
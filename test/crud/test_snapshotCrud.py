@@ -0,0 +1,66 @@
+from src.crud import snapshotCrud, factionCrud, planetCrud, shipCrud
+from src.utils import snapshotUtils
+from src.utils.facilityUtils import FacilityLevel, FacilityType
+from src.utils.planetUtils import SpecialPlanet
+
+from test.conftest import FactionFactory, PlanetFactory, ShipFactory, FacilityFactory
+
+
+def ships_to_id_list(ships):
+    return sorted(list(map(lambda ship: ship.id, ships)))
+
+
+def build_small_game():
+    FactionFactory(faction_name="faction_1", mp=10, rp=5)
+    FactionFactory(faction_name="faction_2")
+
+    planet_a = PlanetFactory(name="planet_a", owner="faction_1", resources=3, special=SpecialPlanet.ARTIFACT)
+    planet_b = PlanetFactory(name="planet_b", owner="faction_2", resources=2)
+    planet_c = PlanetFactory(name="planet_c", resources=4)
+    planet_a.make_connection(planet_b)
+    planet_b.make_connection(planet_c)
+
+    FacilityFactory(planet="planet_a", facility_type=FacilityType.FACTORY, level=FacilityLevel.INTERMEDIATE)
+    FacilityFactory(planet="planet_a", facility_type=FacilityType.LABORATORY, level=FacilityLevel.BASIC)
+    FacilityFactory(planet="planet_a", facility_type=FacilityType.RADAR, level=FacilityLevel.ADVANCED)
+    FacilityFactory(planet="planet_b", facility_type=FacilityType.FLEET_HQ, level=FacilityLevel.BASIC)
+
+    ShipFactory(id="a", owner="faction_1", location="planet_b", modules="S1")
+    ShipFactory(id="b", owner="faction_2", location="planet_b", modules="C1C1")
+    ShipFactory(id="c", owner="faction_2", location="planet_c", modules="C1")
+    ShipFactory(id="d", owner="faction_1", location="planet_c", modules="D1")
+
+
+def test_load_snapshot(session):
+    build_small_game()
+
+    snapshot = snapshotCrud.load_snapshot(session)
+
+    assert list(snapshot.factions.keys()) == ["faction_1", "faction_2"]
+    assert snapshot.factions["faction_1"].mp == 10
+    assert sorted(snapshot.planets.keys()) == ["planet_a", "planet_b", "planet_c"]
+    assert snapshot.connections["planet_b"] == ("planet_a", "planet_c")
+    assert ships_to_id_list(snapshot.ships["planet_b"]) == ["a", "b"]
+    assert list(map(str, snapshot.facilities["planet_a"])) == ["IF", "BL", "AR"]
+
+
+def test_snapshot_matches_crud(session):
+    build_small_game()
+
+    snapshot = snapshotCrud.load_snapshot(session)
+
+    for faction_name in ["faction_1", "faction_2"]:
+        for resource_type in ["mp", "rp", "lp"]:
+            assert snapshotUtils.get_resource_income(snapshot, faction_name, resource_type) == \
+                factionCrud.get_resource_income(session, faction_name, resource_type)
+
+        by_faction = planetCrud.get_planets_by_faction(session, faction_name)
+        snapshot_by_faction = snapshotUtils.get_planets_by_faction(snapshot, faction_name)
+        for key in ['controlled', 'observed']:
+            assert [p.name for p in snapshot_by_faction[key]] == [p.name for p in by_faction[key]]
+
+        for planet_name in ["planet_a", "planet_b", "planet_c"]:
+            assert ships_to_id_list(snapshotUtils.get_visible_ships_on_planet(snapshot, planet_name, faction_name)) == \
+                ships_to_id_list(shipCrud.get_visible_ships_on_planet(session, planet_name, faction_name))
+
+    assert snapshotUtils.get_max_garrison_points(snapshot, "planet_a") == planetCrud.get_max_garrison_points(session, "planet_a")
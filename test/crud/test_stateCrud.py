@@ -0,0 +1,40 @@
+from src.crud import stateCrud, planetCrud, shipCrud, facilityCrud, factionCrud
+from src.utils.facilityUtils import FacilityType
+
+from test.conftest import FactionFactory, PlanetFactory, ShipFactory, FacilityFactory
+
+
+def test_bump_versions(session):
+    assert stateCrud.get_versions(session) == {'faction': 0, 'planet': 0, 'ship': 0, 'facility': 0, 'connection': 0}
+
+    stateCrud.bump_versions(session, stateCrud.SHIPS)
+    stateCrud.bump_versions(session, stateCrud.SHIPS, stateCrud.PLANETS)
+
+    assert stateCrud.get_versions(session) == {'faction': 0, 'planet': 1, 'ship': 2, 'facility': 0, 'connection': 0}
+    assert stateCrud.get_version(session, stateCrud.SHIPS) == 2
+    assert stateCrud.get_version(session, stateCrud.CONNECTIONS) == 0
+
+
+def test_versions_key(session):
+    versions = {'faction': 3, 'planet': 12}
+
+    assert stateCrud.versions_key(versions, [stateCrud.FACTIONS, stateCrud.PLANETS, stateCrud.SHIPS]) == "faction:3,planet:12,ship:0"
+
+
+def test_crud_writes_bump_versions(session):
+    FactionFactory(faction_name="faction_1")
+    PlanetFactory(name="planet_a", owner="faction_1")
+    ShipFactory(id="a", location="planet_a")
+    FacilityFactory(id="b", planet="planet_a")
+
+    def versions_after(write):
+        before = stateCrud.get_versions(session)
+        write()
+        after = stateCrud.get_versions(session)
+        return {domain for domain in after.keys() if after[domain] != before[domain]}
+
+    assert versions_after(lambda: factionCrud.set_resource(session, "faction_1", "mp", 5)) == {'faction'}
+    assert versions_after(lambda: planetCrud.set_garrison_points(session, "planet_a", 2)) == {'planet'}
+    assert versions_after(lambda: shipCrud.damage_ship(session, "a", 0)) == {'ship'}
+    assert versions_after(lambda: facilityCrud.upgrade_facility(session, "b")) == {'facility'}
+    assert versions_after(lambda: facilityCrud.create_facility_from_dict(session, {'planet': 'planet_a', 'facility_type': FacilityType.RADAR.value})) == {'facility'}
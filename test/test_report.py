@@ -0,0 +1,173 @@
+import pytest
+
+import report
+from src.crud import reportCrud, snapshotCrud, stateCrud
+from src.utils.colonyUtils import ColonyType
+from src.utils.facilityUtils import FacilityType, FacilityLevel
+from src.utils.planetUtils import SpecialPlanet
+
+from test.conftest import ShipFactory, PlanetFactory, FacilityFactory, FactionFactory
+
+
+def create_game(session):
+    FactionFactory(faction_name="faction_1")
+    FactionFactory(faction_name="faction_2")
+    FactionFactory(faction_name="faction_3", mp=12, rp=7)
+    planet_a = PlanetFactory(name="planet_a", size="m", resources=3, owner="faction_1", colony_size=ColonyType.OUTPOST, garrison_points=2)
+    planet_b = PlanetFactory(name="planet_b", size="s", resources=1, special=SpecialPlanet.FORGE)
+    planet_c = PlanetFactory(name="planet_c", size="l", resources=5, owner="faction_2", colony_size=ColonyType.COLONY)
+    planet_a.make_connection(planet_b)
+    planet_b.make_connection(planet_c)
+    FacilityFactory(planet="planet_a", facility_type=FacilityType.FACTORY, level=FacilityLevel.BASIC)
+    FacilityFactory(planet="planet_a", facility_type=FacilityType.SHIPYARD, level=FacilityLevel.INTERMEDIATE)
+    FacilityFactory(planet="planet_c", facility_type=FacilityType.LABORATORY, level=FacilityLevel.ADVANCED)
+    ShipFactory(id="ship_1", owner="faction_1", location="planet_a", modules="W1S2")
+    ShipFactory(id="ship_2", owner="faction_1", location="planet_b", modules="D1")
+    ShipFactory(id="ship_3", owner="faction_2", location="planet_b", modules="W1W1A1")
+    ShipFactory(id="ship_4", owner="faction_2", location="planet_a", modules="C1C1")
+    ShipFactory(id="ship_5", owner="faction_3", location="planet_b", modules="COLONY")
+    session.flush()
+    stateCrud.bump_versions(session, *stateCrud.all_domains)
+
+
+def read_reports(report_paths):
+    contents = {}
+    for path in report_paths:
+        with open(path, 'rb') as f:
+            contents[path.rsplit('/', 1)[-1]] = f.read()
+
+    return contents
+
+
+def test_write_all_reports__independent_of_workers(session, tmp_path):
+    create_game(session)
+
+    serial = read_reports(report.write_all_reports(session, str(tmp_path / "serial"), workers=1))
+    reportCrud.clear_report_cache(session)
+    parallel = read_reports(report.write_all_reports(session, str(tmp_path / "parallel"), workers=2))
+
+    assert sorted(serial.keys()) == ["faction_1.txt", "faction_2.txt", "faction_3.txt"]
+    assert serial == parallel
+
+    # Served from the cache
+    assert len(reportCrud.get_cached_versions(session, ["faction_1", "faction_2", "faction_3"])) == 3 * len(report.report_sections)
+    assert read_reports(report.write_all_reports(session, str(tmp_path / "serial_cached"), workers=1)) == serial
+    assert read_reports(report.write_all_reports(session, str(tmp_path / "parallel_cached"), workers=2)) == serial
+
+
+def test_generate_report(session):
+    create_game(session)
+
+    assert "".join(report.generate_report(snapshotCrud.load_snapshot(session), "faction_1")) == "\n".join([
+        "------------------------",
+        "Available Resources",
+        "------------------------",
+        "25 Research Points (Income: 0)",
+        "40 Material Points (Income: 3)",
+        "0 Logistics Points",
+        "",
+        "------------------------",
+        "Ship Module Research",
+        "------------------------",
+        "Armor (A): 1",
+        "Bridge (B): 1",
+        "ECM (C): 1",
+        "Warp Drive (D): 1",
+        "Hangar (H): 1",
+        "Point Defense (P): 1",
+        "Sensor (S): 1",
+        "Barracks (M): 1",
+        "Heavy Weapons (W): 1",
+        "",
+        "------------------------",
+        "Controlled Planets",
+        "------------------------",
+        "",
+        "planet_a (Medium-3) - Outpost (2/2 GP)",
+        "Special: Standard World",
+        "Owner: faction_1",
+        "Connections: planet_b",
+        "Facilities: [BF, IY, 2 empty]",
+        "Owned Ships:",
+        "    <id: ship_1, W1S2>",
+        "",
+        "",
+        "",
+        "------------------------",
+        "Observed Planets",
+        "------------------------",
+        "",
+        "planet_b (Small-1) ",
+        "Special: Forge World",
+        "Owner: unclaimed",
+        "Connections: planet_a, planet_c",
+        "Facilities: No facilities",
+        "Owned Ships:",
+        "    <id: ship_2, D1>",
+        "Observed Ships:",
+        "    faction_2: class 3 x1",
+        "",
+        "",
+        ""
+    ])
+
+
+def test_get_planet_entries(session):
+    create_game(session)
+    snapshot = snapshotCrud.load_snapshot(session)
+    planets = [snapshot.planets["planet_a"], snapshot.planets["planet_c"]]
+
+    entries = "".join(report.get_planet_entries(snapshot, planets, "faction_2"))
+
+    # Each entry lists the ships the faction owns and observes there, and entries are separated by a blank line
+    assert entries == "\n".join([
+        "",
+        "planet_a (Medium-3) - Outpost (2/2 GP)",
+        "Special: Standard World",
+        "Owner: faction_1",
+        "Connections: planet_b",
+        "Facilities: [BF, IY, 2 empty]",
+        "Owned Ships:",
+        "    <id: ship_4, C1C1>",
+        "Observed Ships:",
+        "    faction_1: class 2 x1",
+        "",
+        "",
+        "planet_c (Large-5) - Colony (0/1 GP)",
+        "Special: Standard World",
+        "Owner: faction_2",
+        "Connections: planet_b",
+        "Facilities: [AL, 1 empty]",
+        "",
+        "",
+        ""
+    ])
+
+
+def test_write_all_reports__faction_names_in_file_names(session, tmp_path):
+    FactionFactory(faction_name="../faction 1")
+    FactionFactory(faction_name="Red Star")
+    FactionFactory(faction_name="Red_Star")
+    session.flush()
+
+    report_paths = report.write_all_reports(session, str(tmp_path / "reports"))
+
+    # Names that had to change get a hash of the original, so they can't take another faction's file
+    stems = report.report_file_stems(["../faction 1", "Red Star", "Red_Star"])
+    assert stems["../faction 1"].startswith(".._faction_1-")
+    assert stems["Red Star"].startswith("Red_Star-")
+    assert stems["Red_Star"] == "Red_Star"
+    assert sorted(report_paths) == sorted(str(tmp_path / "reports" / f"{stem}.txt") for stem in stems.values())
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["reports"]
+
+
+def test_write_all_reports__colliding_file_names(session, tmp_path):
+    FactionFactory(faction_name="Red")
+    FactionFactory(faction_name="red")
+    session.flush()
+
+    with pytest.raises(ValueError) as e:
+        report.write_all_reports(session, str(tmp_path / "reports"))
+
+    assert str(e.value) == "Factions 'Red' and 'red' would share the report file red.txt"
+    assert not (tmp_path / "reports").exists()
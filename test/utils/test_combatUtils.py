@@ -0,0 +1,109 @@
+import numpy as np
+
+from src.utils import combatUtils
+
+
+def combatants(group, side, hit_points, weapons, fighters=None, point_defense=None, armor=None):
+    zeros = [0] * len(group)
+    return combatUtils.sort_combatants(combatUtils.Combatants(*(
+        np.array(column, dtype=np.int64)
+        for column in [group, side, hit_points, weapons, fighters or zeros, point_defense or zeros, armor or zeros]
+    )))[0]
+
+
+def test_module_counts():
+    weapons, fighters, point_defense, armor = combatUtils.module_counts(["W1W2H1", "P3A1A1", "COLONY", "W1W2H1"])
+
+    assert weapons.tolist() == [2, 0, 0, 2]
+    assert fighters.tolist() == [1, 0, 0, 1]
+    assert point_defense.tolist() == [0, 1, 0, 0]
+    assert armor.tolist() == [0, 2, 0, 0]
+
+
+def test_block_bounds():
+    starts, ends = combatUtils.block_bounds(np.array([0, 0, 1, 3, 3, 3]))
+
+    assert starts.tolist() == [0, 0, 2, 3, 3, 3]
+    assert ends.tolist() == [2, 2, 3, 6, 6, 6]
+
+
+def test_fire_round__only_hostiles_in_the_same_group():
+    # Group 0: sides 0 and 1 fight. Group 1: side 0 alone, so its ships don't fire.
+    fleet = combatants(
+        group=[0, 0, 0, 1, 1],
+        side=[0, 0, 1, 0, 0],
+        hit_points=[5, 5, 5, 5, 5],
+        weapons=[10, 10, 10, 10, 10]
+    )
+
+    damage = combatUtils.fire_round(fleet, np.random.default_rng(1))
+
+    assert damage[3:].tolist() == [0, 0]
+    assert damage[2] > 0
+    assert damage[:2].sum() > 0
+    assert damage.sum() <= 30
+
+
+def test_fire_round__seeded():
+    fleet = combatants(
+        group=[0, 0, 1, 1, 1],
+        side=[0, 1, 2, 0, 1],
+        hit_points=[5, 5, 5, 5, 5],
+        weapons=[3, 2, 4, 1, 0],
+        fighters=[1, 2, 0, 3, 0],
+        point_defense=[0, 1, 0, 2, 0],
+        armor=[1, 0, 0, 0, 2]
+    )
+
+    first = combatUtils.fire_round(fleet, np.random.default_rng(7))
+    second = combatUtils.fire_round(fleet, np.random.default_rng(7))
+
+    assert first.tolist() == second.tolist()
+
+
+def test_fire_round__hit_chances():
+    # Many shots at single targets: hit rates approach the chances in combatUtils
+    fleet = combatants(
+        group=[0, 0, 1, 1, 2, 2],
+        side=[0, 1, 0, 1, 0, 1],
+        hit_points=[1, 1, 1, 1, 1, 1],
+        weapons=[0, 20_000, 0, 20_000, 0, 0],
+        fighters=[0, 0, 0, 0, 0, 20_000],
+        point_defense=[0, 0, 0, 0, 1, 0],
+        armor=[0, 0, 2, 0, 0, 0]
+    )
+
+    damage = combatUtils.fire_round(fleet, np.random.default_rng(3)) / 20_000
+
+    assert abs(damage[0] - combatUtils.weapon_hit_chance) < 0.02
+    assert abs(damage[2] - combatUtils.weapon_hit_chance * (1 - combatUtils.armor_deflection) ** 2) < 0.02
+    assert abs(damage[4] - combatUtils.fighter_hit_chance * (1 - combatUtils.point_defense_intercept)) < 0.02
+
+
+def test_is_contested():
+    assert combatUtils.is_contested(combatants(group=[0, 0, 1], side=[0, 1, 0], hit_points=[1, 1, 1], weapons=[0, 0, 0]))
+    assert not combatUtils.is_contested(combatants(group=[0, 1, 1], side=[1, 0, 0], hit_points=[1, 1, 1], weapons=[0, 0, 0]))
+
+
+def test_simulate_battles():
+    # Side 1 can't fire back, so side 0 wins every battle that ends in time
+    fleet = combatants(group=[0, 0, 0], side=[0, 0, 1], hit_points=[2, 2, 3], weapons=[4, 4, 0])
+
+    totals = combatUtils.simulate_battles(fleet, 500, np.random.default_rng(2))
+
+    assert totals.trials == 500
+    assert totals.wins.tolist() == [500 - totals.draws, 0]
+    assert totals.losses.tolist() == [0, 500 - totals.draws]
+
+
+def test_predict_battle__independent_of_workers():
+    fleet = combatants(group=[0, 0, 0, 0], side=[0, 0, 1, 1], hit_points=[3, 2, 4, 1], weapons=[2, 1, 1, 2], fighters=[0, 1, 2, 0])
+
+    serial = combatUtils.predict_battle(fleet, 250, seed=11, workers=1, chunk_size=100)
+    parallel = combatUtils.predict_battle(fleet, 250, seed=11, workers=2, chunk_size=100)
+
+    assert serial.trials == parallel.trials == 250
+    assert serial.wins.tolist() == parallel.wins.tolist()
+    assert serial.draws == parallel.draws
+    assert serial.losses.tolist() == parallel.losses.tolist()
+    assert serial.wins.sum() + serial.draws == 250
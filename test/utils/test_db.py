@@ -0,0 +1,69 @@
+from src.utils import db
+
+from test.conftest import PlanetFactory, ShipFactory, models
+
+
+def test_to_base36():
+    assert [db.to_base36(value) for value in [0, 9, 10, 35, 36, 36 ** 6 - 1]] == ["0", "9", "a", "z", "10", "zzzzzz"]
+
+
+def test_chunks():
+    assert list(db.chunks(iter(range(7)), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(db.chunks([], 3)) == []
+
+
+def test_rows_matching(session):
+    for index in range(8):
+        PlanetFactory(id=f"p{index}", name=f"planet_{index}", owner=None)
+    session.flush()
+    planet_rows = session.query(models.Planet.id, models.Planet.name)
+
+    # Few values are looked up in chunks, many are filtered from one scan; both give the same rows
+    assert sorted(db.rows_matching(planet_rows, [models.Planet.name], ["planet_1", "planet_x"], batch_size=1)) == [("p1", "planet_1")]
+    names = [f"planet_{index}" for index in range(1, 6)]
+    assert sorted(db.rows_matching(planet_rows, [models.Planet.name], names)) == [(f"p{index}", f"planet_{index}") for index in range(1, 6)]
+    assert sorted(db.rows_matching(planet_rows, [models.Planet.id, models.Planet.name], ["p0", "planet_7"])) == [("p0", "planet_0"), ("p7", "planet_7")]
+    assert db.rows_matching(planet_rows, [models.Planet.name], []) == []
+
+
+def test_allocate_ids(session):
+    ship_table = models.Ship.__table__
+
+    first = db.allocate_ids(session, ship_table, 3)
+    second = db.allocate_ids(session, ship_table, 40)
+
+    assert first == ["0", "1", "2"]
+    assert second[:2] == ["3", "4"]
+    assert len(set(first + second)) == 43
+    assert db.allocate_ids(session, ship_table, 0) == []
+    assert db.allocate_ids(session, models.Planet.__table__, 1) == ["0"]
+    assert session.query(models.IdCounter).get("Ship").next_id == 43
+
+
+def test_allocate_ids__existing_ids(session):
+    # Old style ids (the start of a uuid4) and ids that aren't base 36 numbers are kept
+    ShipFactory(id="0c1f3e9")
+    ShipFactory(id="ship_a")
+    session.flush()
+
+    new_ids = db.allocate_ids(session, models.Ship.__table__, 2)
+
+    assert new_ids == [db.to_base36(int("0c1f3e9", 36) + 1), db.to_base36(int("0c1f3e9", 36) + 2)]
+
+
+def test_generate_id(session):
+    ShipFactory(id="5")
+    session.flush()
+    db.reset_id_counters(session)
+
+    ShipFactory(modules="W1")
+    ShipFactory(modules="W1")
+    session.flush()
+
+    assert sorted(ship_id for (ship_id,) in session.query(models.Ship.id)) == ["5", "6", "7"]
+
+    # Rows inserted with their own ids, followed by a reset, are skipped too
+    ShipFactory(id="9")
+    session.flush()
+    db.reset_id_counters(session, models.Ship.__table__)
+    assert db.allocate_ids(session, models.Ship.__table__, 1) == ["a"]
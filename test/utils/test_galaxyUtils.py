@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+from src.utils import galaxyUtils, planetUtils
+from src.utils.planetUtils import SpecialPlanet
+
+
+def test_generate_map__deterministic():
+    assert galaxyUtils.generate_map(200, seed=3) == galaxyUtils.generate_map(200, seed=3)
+    assert galaxyUtils.generate_map(200, seed=3) != galaxyUtils.generate_map(200, seed=4)
+
+
+def test_generate_map__valid_planets_file(tmp_path):
+    planets = galaxyUtils.generate_map(500, seed=1, average_degree=4)
+    planets_file = tmp_path / "planets.json"
+    planets_file.write_text(json.dumps({"planets": planets}))
+
+    assert planetUtils.validate_planets_file(str(planets_file)) == []
+
+    connection_count = sum(len(planet['connections']) for planet in planets)
+    assert connection_count / len(planets) == pytest.approx(4, abs=0.01)
+
+
+def test_generate_map__specials():
+    planets = galaxyUtils.generate_map(100, specials={SpecialPlanet.STANDARD: 0, SpecialPlanet.FORGE: 1})
+
+    assert {planet['special'] for planet in planets} == {SpecialPlanet.FORGE.value}
+
+
+@pytest.mark.parametrize("kwargs", [
+    {'num_planets': 1},
+    {'num_planets': 10, 'average_degree': 0.5},
+    {'num_planets': 4, 'average_degree': 4},
+    {'num_planets': 10, 'specials': {SpecialPlanet.STANDARD: 0}},
+    {'num_planets': 10, 'specials': {SpecialPlanet.STANDARD: 1, SpecialPlanet.FORGE: -1}}
+])
+def test_generate_map__invalid(kwargs):
+    with pytest.raises(ValueError):
+        galaxyUtils.generate_map(**kwargs)
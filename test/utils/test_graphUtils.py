@@ -0,0 +1,85 @@
+import pytest
+
+from src.utils.graphUtils import AdjacencyGraph
+
+
+def test_from_edges():
+    graph = AdjacencyGraph.from_edges(
+        ["planet_c", "planet_a", "planet_b", "planet_d"],
+        [("planet_a", "planet_b"), ("planet_b", "planet_a"), ("planet_c", "planet_a")]
+    )
+
+    assert graph.names == ["planet_a", "planet_b", "planet_c", "planet_d"]
+    assert list(graph.offsets) == [0, 2, 3, 4, 4]
+    assert list(graph.targets) == [1, 2, 0, 0]
+    assert graph.edge_count == 2
+    assert len(graph) == 4
+
+
+def test_neighbors():
+    graph = AdjacencyGraph.from_edges(["planet_a", "planet_b", "planet_c"], [("planet_c", "planet_a"), ("planet_b", "planet_a")])
+
+    assert graph.neighbors("planet_a") == ["planet_b", "planet_c"]
+    assert graph.neighbors("planet_b") == ["planet_a"]
+    assert graph.neighbors("planet_x") == []
+    assert graph.degree("planet_a") == 2
+    assert graph.degree("planet_x") == 0
+
+    assert graph.has_edge("planet_a", "planet_c")
+    assert graph.has_edge("planet_c", "planet_a")
+    assert not graph.has_edge("planet_b", "planet_c")
+    assert not graph.has_edge("planet_a", "planet_x")
+
+
+# planet_a - planet_b - planet_c - planet_d, with a shortcut planet_a - planet_e - planet_d,
+# and planet_f - planet_g on their own
+def build_graph():
+    return AdjacencyGraph.from_edges(
+        ["planet_a", "planet_b", "planet_c", "planet_d", "planet_e", "planet_f", "planet_g"],
+        [
+            ("planet_a", "planet_b"), ("planet_b", "planet_c"), ("planet_c", "planet_d"),
+            ("planet_a", "planet_e"), ("planet_e", "planet_d"),
+            ("planet_f", "planet_g")
+        ]
+    )
+
+
+def test_shortest_path():
+    graph = build_graph()
+
+    assert graph.shortest_path("planet_a", "planet_d") == ["planet_a", "planet_e", "planet_d"]
+    assert graph.shortest_path("planet_b", "planet_d") == ["planet_b", "planet_c", "planet_d"]
+    assert graph.shortest_path("planet_c", "planet_c") == ["planet_c"]
+    assert graph.shortest_path("planet_a", "planet_f") is None
+
+
+def test_shortest_path__unknown_planet():
+    with pytest.raises(ValueError) as e:
+        build_graph().shortest_path("planet_a", "planet_x")
+
+    assert str(e.value) == "Planet 'planet_x' does not exist"
+
+
+def test_hop_distances__memoized():
+    graph = build_graph()
+
+    distances = graph.hop_distances("planet_a")
+
+    assert list(distances) == [0, 1, 2, 2, 1, -1, -1]
+    assert graph.hop_distances("planet_a") is distances
+    assert [list(row) for row in graph.all_pairs_hops()][3] == [2, 2, 1, 0, 1, -1, -1]
+
+
+def test_within_jumps():
+    graph = build_graph()
+
+    assert graph.within_jumps("planet_a", 0) == {}
+    assert graph.within_jumps("planet_a", 1) == {"planet_b": 1, "planet_e": 1}
+    assert list(graph.within_jumps("planet_a", 5).items()) == [("planet_b", 1), ("planet_e", 1), ("planet_c", 2), ("planet_d", 2)]
+
+
+def test_connected_components():
+    assert build_graph().connected_components() == [
+        ["planet_a", "planet_b", "planet_c", "planet_d", "planet_e"],
+        ["planet_f", "planet_g"]
+    ]
@@ -0,0 +1,68 @@
+from sqlalchemy import create_engine, inspect
+
+from src import models
+from src.utils import migrationUtils
+
+
+def test_canonical_connections(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'game.db'}")
+    with engine.begin() as conn:
+        conn.execute('CREATE TABLE "Planet" (id VARCHAR PRIMARY KEY, name VARCHAR)')
+        conn.execute(
+            'CREATE TABLE "PlanetConnection" (planet_a_id VARCHAR REFERENCES "Planet" (id), planet_b_id VARCHAR REFERENCES "Planet" (id), '
+            'CONSTRAINT unique_connections UNIQUE (planet_a_id, planet_b_id))'
+        )
+        conn.execute('CREATE INDEX "ix_PlanetConnection_planet_a_id" ON "PlanetConnection" (planet_a_id)')
+        conn.execute('INSERT INTO "Planet" VALUES (\'a\', \'planet_a\'), (\'b\', \'planet_b\'), (\'c\', \'planet_c\')')
+        conn.execute('INSERT INTO "PlanetConnection" VALUES (\'a\', \'b\'), (\'b\', \'a\'), (\'c\', \'b\'), (\'b\', \'c\')')
+
+    migrationUtils.run_migrations(engine)
+
+    assert sorted(engine.execute(models.PlanetConnection.select()).fetchall()) == [('a', 'b'), ('b', 'c')]
+    assert sorted(index['column_names'] for index in inspect(engine).get_indexes('PlanetConnection')) == [['planet_a_id'], ['planet_b_id']]
+
+    # Already migrated
+    migrationUtils.run_migrations(engine)
+    assert len(engine.execute(models.PlanetConnection.select()).fetchall()) == 2
+
+
+def test_ship_designs(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'game.db'}")
+    models.Base.metadata.create_all(bind=engine, tables=[models.ShipDesign.__table__, models.ReportCache.__table__, models.IdCounter.__table__])
+    with engine.begin() as conn:
+        conn.execute(
+            'CREATE TABLE "Ship" (id VARCHAR PRIMARY KEY, modules VARCHAR, owner VARCHAR, location VARCHAR, '
+            'max_hp INTEGER, hit_points INTEGER, stealth_level INTEGER, detection_level INTEGER)'
+        )
+        # ship_b has a stale max_hp, and kept its detection level when it was retrofitted from W1S1
+        conn.execute('INSERT INTO "Ship" VALUES (\'ship_a\', \'W1C1\', NULL, NULL, 2, 1, 1, 0), (\'ship_b\', \'W1C1\', NULL, NULL, 3, 2, 0, 1)')
+        conn.execute('INSERT INTO "ReportCache" VALUES (\'faction_a\', \'ships\', 0, \'\', \'cached\')')
+
+    migrationUtils.run_migrations(engine)
+
+    ships = engine.execute('SELECT id, design_id, max_hp, hit_points, stealth_level, detection_level FROM "Ship" ORDER BY id').fetchall()
+    designs = engine.execute('SELECT id, modules FROM "ShipDesign"').fetchall()
+    assert len(designs) == 1
+    assert [tuple(ship) for ship in ships] == [("ship_a", designs[0][0], 2, 1, 1, 0), ("ship_b", designs[0][0], 2, 2, 1, 0)]
+    assert len(engine.execute('SELECT * FROM "ReportCache"').fetchall()) == 0
+
+
+def test_report_cache_chunks(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'game.db'}")
+    with engine.begin() as conn:
+        conn.execute(
+            'CREATE TABLE "ReportCache" (faction_name VARCHAR, section VARCHAR, versions VARCHAR, text VARCHAR, '
+            'PRIMARY KEY (faction_name, section))'
+        )
+        conn.execute('INSERT INTO "ReportCache" VALUES (\'faction_a\', \'ships\', \'ship:1\', \'cached\')')
+
+    migrationUtils.run_migrations(engine)
+
+    assert 'chunk' in [column['name'] for column in inspect(engine).get_columns('ReportCache')]
+    assert len(engine.execute('SELECT * FROM "ReportCache"').fetchall()) == 0
+
+    # Already migrated
+    with engine.begin() as conn:
+        conn.execute('INSERT INTO "ReportCache" VALUES (\'faction_a\', \'ships\', 0, \'ship:1\', \'cached\')')
+    migrationUtils.run_migrations(engine)
+    assert len(engine.execute('SELECT * FROM "ReportCache"').fetchall()) == 1
@@ -0,0 +1,67 @@
+import json
+
+from src.utils import planetUtils
+
+
+def write_planets_file(tmp_path, planets):
+    planets_file = tmp_path / "planets.json"
+    planets_file.write_text(json.dumps({"planets": planets}, indent=2))
+    return str(planets_file)
+
+
+def test_read_planets_file(tmp_path):
+    planets = [
+        {"name": "planet_a", "size": "s", "resources": 4, "connections": ["planet_b"]},
+        {"name": "planet_b", "size": "m", "resources": "3", "special": "Forge World", "connections": ["planet_a"]}
+    ]
+
+    # A tiny chunk size makes values span several reads
+    assert planetUtils.read_planets_file(write_planets_file(tmp_path, planets), chunk_size=3) == (planets, [])
+
+
+def test_read_planets_file__errors(tmp_path):
+    planets_file = write_planets_file(tmp_path, [
+        {"name": "planet_a", "size": "x", "resources": 4, "connections": ["planet_b", "planet_x"]},
+        {"name": "planet_b", "size": "s", "resources": 1.5, "connections": []},
+        {"name": "planet_a", "size": "s", "resources": 2, "connections": ["planet_b"]}
+    ])
+
+    planets, errors = planetUtils.read_planets_file(planets_file, chunk_size=16)
+
+    assert len(planets) == 3
+    assert errors == [
+        "planets[0] (line 3): Invalid size for planet_a. Size must be 's', 'm', or 'l'.",
+        "planets[0] (line 3): planet_a lists planet_b as a connection, but planet_b does not list planet_a. Connections must be bi-directional.",
+        "planets[0] (line 3): planet_a lists planet_x as a connection, but planet_x does not exist.",
+        "planets[1] (line 12): Invalid resource value for planet_b. Resource values must be integers.",
+        "planets[1] (line 12): planet_b has no connections. All planets must have at least one connection.",
+        "planets[2] (line 18): Planet name 'planet_a' occurs multiple times (first at planets[0]). Names must be unique."
+    ]
+
+
+def test_read_planets_file__external_connections(tmp_path):
+    planets_file = write_planets_file(tmp_path, [
+        {"name": "planet_a", "size": "s", "resources": 4, "connections": ["planet_x"]}
+    ])
+
+    assert planetUtils.read_planets_file(planets_file, external_connections=True)[1] == []
+    assert planetUtils.read_planets_file(planets_file)[1] == [
+        "planets[0] (line 3): planet_a lists planet_x as a connection, but planet_x does not exist."
+    ]
+
+
+def test_read_planets_file__invalid_json(tmp_path):
+    planets_file = tmp_path / "planets.json"
+    planets_file.write_text('{"planets": [\n  {"name": "planet_a", "size": "s", "resources": 1, "connections": ["planet_a"]},\n  {"name": "planet_b" "size": "s"}\n]}')
+
+    planets, errors = planetUtils.read_planets_file(str(planets_file), chunk_size=8)
+
+    assert [planet['name'] for planet in planets] == ["planet_a"]
+    assert errors == ["Invalid JSON at line 3: Expecting ',' delimiter"]
+
+
+def test_validate_planets_file__missing_planets(tmp_path):
+    planets_file = tmp_path / "planets.json"
+    planets_file.write_text('{"factions": []}')
+
+    assert planetUtils.validate_planets_file(str(planets_file)) == ["Missing top level 'planets' array"]